@@ -28,6 +28,9 @@ interface FileStructure {
 const INDEX_KEY = 'index.json';
 const RECENT_CHANGES_KEY = 'recent-changes.json';
 const MAX_RECENT_CHANGES = 100;
+// Limits of one /upload-scraper-batch request: file parts, and entries in total
+const MAX_BATCH_FILES = 50;
+const MAX_BATCH_ENTRIES = 1000;
 
 interface RecentChange {
   key: string;
@@ -85,13 +88,31 @@ async function appendRecentChange(
   bucket: R2Bucket,
   change: RecentChange,
 ): Promise<void> {
+  await appendRecentChanges(bucket, [change]);
+}
+
+/** Add several changes with one read and one write; `changes` is oldest first. */
+async function appendRecentChanges(
+  bucket: R2Bucket,
+  changes: RecentChange[],
+): Promise<void> {
+  if (changes.length === 0) return;
   const current = await getRecentChanges(bucket);
-  const next = [change, ...current].slice(0, MAX_RECENT_CHANGES);
+  const next = [...changes].reverse().concat(current).slice(0, MAX_RECENT_CHANGES);
   await bucket.put(RECENT_CHANGES_KEY, JSON.stringify(next, null, 2), {
     httpMetadata: { contentType: 'application/json' },
   });
 }
 
+function scraperChange(key: string): RecentChange {
+  return {
+    key,
+    filename: key.split('/').at(-1) ?? key,
+    uploadedAt: new Date().toISOString(),
+    source: 'scraper',
+  };
+}
+
 /**
  * Navigate into the index to a specific path like "fizica/pages/bac".
  */
@@ -108,6 +129,10 @@ function getSubtree(
   return current;
 }
 
+/** True if the index already lists `key` at its path. */
+const isIndexed = (index: FileStructure, key: string): boolean =>
+  getSubtree(index, key.split('/')) === key;
+
 /**
  * Set a value at a nested path, creating intermediate objects as needed.
  */
@@ -392,6 +417,74 @@ function generateUploadPath(data: UploadPathData): { r2Key: string } {
   };
 }
 
+/** Hex SHA-256 of a blob; stored as the `sha256` custom metadata of scraper uploads. */
+async function sha256Hex(data: ArrayBuffer): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', data);
+  return [...new Uint8Array(digest)].map((b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+/**
+ * Store one scraper PDF. `sha256` is its already verified digest; it is kept as
+ * custom metadata, and an object that already has it is left untouched.
+ * Returns false if the object was unchanged.
+ */
+async function putScraperFile(
+  bucket: R2Bucket,
+  key: string,
+  file: File,
+  sha256?: string,
+): Promise<boolean> {
+  if (sha256) {
+    const existing = await bucket.head(key);
+    if (existing?.customMetadata?.sha256 === sha256) return false;
+  }
+  await bucket.put(key, file, {
+    httpMetadata: { contentType: 'application/pdf' },
+    customMetadata: sha256 ? { sha256 } : undefined,
+  });
+  return true;
+}
+
+const isInvalidKey = (key: string): boolean => key.includes('..') || key.startsWith('/');
+
+/** Validators and content headers shared by GET and HEAD /file/:key. */
+function setObjectHeaders(headers: Headers, object: R2Object): void {
+  object.writeHttpMetadata(headers);
+  headers.set('etag', object.httpEtag);
+  headers.set('Last-Modified', object.uploaded.toUTCString());
+  headers.set('Accept-Ranges', 'bytes');
+  headers.set('Cache-Control', 'public, max-age=31536000, immutable');
+  const sha256 = object.customMetadata?.sha256;
+  if (sha256) headers.set('X-Content-SHA256', sha256);
+}
+
+/**
+ * The single byte range of a `Range` header against an object of `size` bytes.
+ * null means the header is ignored (malformed, another unit or several ranges),
+ * as RFC 9110 allows; 'unsatisfiable' means it asks for bytes past the end.
+ */
+function parseByteRange(
+  header: string,
+  size: number,
+): { offset: number; length: number } | 'unsatisfiable' | null {
+  const match = /^bytes=(\d*)-(\d*)$/.exec(header.trim());
+  if (!match || (!match[1] && !match[2])) return null;
+
+  if (!match[1]) {
+    // bytes=-N: the last N bytes
+    const suffix = Number(match[2]);
+    if (suffix === 0 || size === 0) return 'unsatisfiable';
+    const offset = Math.max(0, size - suffix);
+    return { offset, length: size - offset };
+  }
+
+  const start = Number(match[1]);
+  const last = match[2] ? Number(match[2]) : size - 1;
+  if (match[2] && last < start) return null;
+  if (start >= size) return 'unsatisfiable';
+  return { offset: start, length: Math.min(last, size - 1) - start + 1 };
+}
+
 // ── Route registration ─────────────────────────────────────────────────────────
 
 export function registerRoutes(app: Hono<{ Bindings: Bindings }>): void {
@@ -431,6 +524,22 @@ export function registerRoutes(app: Hono<{ Bindings: Bindings }>): void {
     return c.json({ content, extra, years });
   });
 
+  /**
+   * HEAD /file/:key → Size and checksums of a file, without reading its body
+   */
+  app.on('HEAD', '/file/:key{.*}', async (c) => {
+    const key = c.req.param('key');
+    if (!key) return c.body(null, 404);
+
+    const object = await c.env.FILES.head(key);
+    if (!object) return c.body(null, 404);
+
+    const headers = new Headers();
+    setObjectHeaders(headers, object);
+    headers.set('Content-Length', String(object.size));
+    return new Response(null, { headers });
+  });
+
   /**
    * GET /file/:key → Serve a file from R2
    */
@@ -438,14 +547,43 @@ export function registerRoutes(app: Hono<{ Bindings: Bindings }>): void {
     const key = c.req.param('key');
     if (!key) return c.text('Not Found', 404);
 
+    // Range lets download_from_worker.py resume a dropped download
+    const rangeHeader = c.req.header('Range');
+    if (rangeHeader) {
+      const stat = await c.env.FILES.head(key);
+      if (!stat) return c.text('Not Found', 404);
+
+      // If-Range: the client's partial bytes belong to another version, send it whole
+      const ifRange = c.req.header('If-Range');
+      const sameVersion = !ifRange || ifRange === stat.httpEtag || ifRange === stat.uploaded.toUTCString();
+      const range = sameVersion ? parseByteRange(rangeHeader, stat.size) : null;
+
+      if (range === 'unsatisfiable') {
+        const headers = new Headers();
+        setObjectHeaders(headers, stat);
+        headers.set('Content-Range', `bytes */${stat.size}`);
+        return new Response(null, { status: 416, headers });
+      }
+
+      if (range) {
+        // etagMatches pins the bytes to the version the range was checked against
+        const partial = await c.env.FILES.get(key, { range, onlyIf: { etagMatches: stat.etag } });
+        if (partial && 'body' in partial) {
+          const headers = new Headers();
+          setObjectHeaders(headers, partial);
+          headers.set('Content-Range', `bytes ${range.offset}-${range.offset + range.length - 1}/${partial.size}`);
+          headers.set('Content-Length', String(range.length));
+          return new Response(partial.body, { status: 206, headers });
+        }
+        // Replaced since the HEAD: fall through to the whole new version
+      }
+    }
+
     const object = await c.env.FILES.get(key);
     if (!object) return c.text('Not Found', 404);
 
     const headers = new Headers();
-    object.writeHttpMetadata(headers);
-    headers.set('etag', object.httpEtag);
-    headers.set('Cache-Control', 'public, max-age=31536000, immutable');
-
+    setObjectHeaders(headers, object);
     return new Response(object.body, { headers });
   });
 
@@ -520,6 +658,13 @@ export function registerRoutes(app: Hono<{ Bindings: Bindings }>): void {
   /**
    * POST /upload-scraper — Bulk upload from the watchtower/scraper.
    * Accepts multipart with: password, key (R2 path), file (PDF blob).
+   * An `Idempotency-Key` header carries the file's hex SHA-256: it is checked
+   * against the body and stored with the object, and re-sending the same
+   * bytes for a key leaves the object, index and recent changes untouched;
+   * only an unchanged key missing from the index (a failed index write or an
+   * uncommitted deferred upload) is indexed, and answered with `indexed: true`.
+   * With `defer_index=1` the object is stored but not indexed; the key is
+   * committed later through /upload-scraper-batch.
    */
   app.post('/upload-scraper', async (c) => {
     const contentType = c.req.header('Content-Type') || '';
@@ -544,25 +689,159 @@ export function registerRoutes(app: Hono<{ Bindings: Bindings }>): void {
     if (!key || !file) return c.text('Missing key or file', 400);
 
     // Reject path traversal attempts
-    if (key.includes('..') || key.startsWith('/'))
-      return c.text('Invalid key', 400);
+    if (isInvalidKey(key)) return c.text('Invalid key', 400);
+
+    const idempotencyKey = c.req.header('Idempotency-Key')?.toLowerCase();
+    if (idempotencyKey && (await sha256Hex(await file.arrayBuffer())) !== idempotencyKey)
+      return c.text('Idempotency-Key does not match file SHA-256', 400);
+
+    const deferIndex = formData.get('defer_index') === '1';
+    if (!(await putScraperFile(c.env.FILES, key, file, idempotencyKey))) {
+      if (deferIndex) return c.json({ success: true, key, unchanged: true });
+      const index = await getIndex(c.env.FILES);
+      if (isIndexed(index, key)) return c.json({ success: true, key, unchanged: true });
+      setInIndex(index, key.split('/'), key);
+      await putIndex(c.env.FILES, index);
+      await appendRecentChange(c.env.FILES, scraperChange(key));
+      return c.json({ success: true, key, unchanged: true, indexed: true });
+    }
+    if (deferIndex)
+      return c.json({ success: true, key, deferred: true });
 
-    await c.env.FILES.put(key, file, {
-      httpMetadata: { contentType: 'application/pdf' },
+    const index = await getIndex(c.env.FILES);
+    setInIndex(index, key.split('/'), key);
+    await putIndex(c.env.FILES, index);
+
+    await appendRecentChange(c.env.FILES, scraperChange(key));
+
+    return c.json({ success: true, key });
+  });
+
+  /**
+   * POST /upload-scraper-batch — Several scraper uploads with one index commit.
+   * Accepts multipart with: manifest (JSON [{key, sha256?}, ...]) and a part
+   * file<i> for each entry i that carries bytes. Entries without a part must
+   * already be stored (uploaded with defer_index) and are only indexed, as
+   * are unchanged uploads the index does not list yet.
+   * index.json and recent-changes.json are rewritten once per request.
+   */
+  app.post('/upload-scraper-batch', async (c) => {
+    const contentType = c.req.header('Content-Type') || '';
+    if (!contentType.includes('multipart/form-data'))
+      return c.text('Unsupported content type', 415);
+
+    let formData: FormData;
+    try {
+      formData = await c.req.raw.formData();
+    } catch {
+      return c.text('Failed to parse form data', 400);
+    }
+
+    const authError = await enforceUploadAuth(c);
+    if (authError) {
+      return authError;
+    }
+
+    let manifest: unknown;
+    try {
+      manifest = JSON.parse((formData.get('manifest') as string | null) ?? '');
+    } catch {
+      return c.text('Invalid manifest', 400);
+    }
+    if (!Array.isArray(manifest) || manifest.length === 0 || manifest.length > MAX_BATCH_ENTRIES)
+      return c.text(`Manifest must list 1-${MAX_BATCH_ENTRIES} entries`, 400);
+
+    // Validate the whole batch before storing anything
+    const uploads: { key: string; file: File; sha256?: string }[] = [];
+    const indexOnly: string[] = [];
+    for (const [i, entry] of manifest.entries()) {
+      const key = typeof entry?.key === 'string' ? entry.key : '';
+      if (!key || isInvalidKey(key)) return c.text(`Invalid key in entry ${i}`, 400);
+
+      const file = formData.get(`file${i}`) as unknown as File | null;
+      if (!file || typeof file === 'string') {
+        indexOnly.push(key);
+        continue;
+      }
+      const sha256 = typeof entry.sha256 === 'string' ? entry.sha256.toLowerCase() : undefined;
+      if (sha256 && (await sha256Hex(await file.arrayBuffer())) !== sha256)
+        return c.text(`sha256 does not match file ${key}`, 400);
+      uploads.push({ key, file, sha256 });
+    }
+    if (uploads.length > MAX_BATCH_FILES)
+      return c.text(`At most ${MAX_BATCH_FILES} files per batch`, 400);
+
+    const missing: string[] = [];
+    for (const key of indexOnly) {
+      if (!(await c.env.FILES.head(key))) missing.push(key);
+    }
+
+    const stored: string[] = [];
+    const unchanged: string[] = [];
+    const results = await Promise.all(
+      uploads.map(({ key, file, sha256 }) => putScraperFile(c.env.FILES, key, file, sha256)),
+    );
+    uploads.forEach(({ key }, i) => (results[i] ? stored : unchanged).push(key));
+
+    const indexed = [...stored, ...indexOnly.filter((key) => !missing.includes(key))];
+    const index = indexed.length > 0 || unchanged.length > 0 ? await getIndex(c.env.FILES) : {};
+    // Same bytes, but a failed index write or an uncommitted deferred upload left the key out
+    indexed.push(...unchanged.filter((key) => !isIndexed(index, key)));
+    if (indexed.length > 0) {
+      for (const key of indexed) setInIndex(index, key.split('/'), key);
+      await putIndex(c.env.FILES, index);
+      await appendRecentChanges(c.env.FILES, indexed.map(scraperChange));
+    }
+
+    return c.json({ success: true, stored, unchanged, indexed, missing });
+  });
+
+  /**
+   * POST /copy-scraper — Store an existing R2 object under another key.
+   * Accepts JSON with: source (existing R2 key), key (new R2 key) and an
+   * optional deferIndex (true: store only, index through /upload-scraper-batch).
+   * Lets the scraper alias duplicate PDFs without uploading the bytes again.
+   */
+  app.post('/copy-scraper', async (c) => {
+    const authError = await enforceUploadAuth(c);
+    if (authError) {
+      return authError;
+    }
+
+    let body: { source?: unknown; key?: unknown; deferIndex?: unknown };
+    try {
+      body = await c.req.json();
+    } catch {
+      return c.text('Invalid JSON body', 400);
+    }
+
+    const source = typeof body.source === 'string' ? body.source : '';
+    const key = typeof body.key === 'string' ? body.key : '';
+    if (!source || !key) return c.text('Missing source or key', 400);
+
+    // Reject path traversal attempts
+    for (const path of [source, key]) {
+      if (path.includes('..') || path.startsWith('/'))
+        return c.text('Invalid key', 400);
+    }
+
+    const object = await c.env.FILES.get(source);
+    if (!object) return c.text('Source not found', 404);
+
+    await c.env.FILES.put(key, object.body, {
+      httpMetadata: object.httpMetadata ?? { contentType: 'application/pdf' },
+      customMetadata: object.customMetadata,
     });
+    if (body.deferIndex === true)
+      return c.json({ success: true, key, source, deferred: true });
 
     const index = await getIndex(c.env.FILES);
     setInIndex(index, key.split('/'), key);
     await putIndex(c.env.FILES, index);
 
-    await appendRecentChange(c.env.FILES, {
-      key,
-      filename: key.split('/').at(-1) ?? key,
-      uploadedAt: new Date().toISOString(),
-      source: 'scraper',
-    });
+    await appendRecentChange(c.env.FILES, scraperChange(key));
 
-    return c.json({ success: true, key });
+    return c.json({ success: true, key, source });
   });
 
   /**
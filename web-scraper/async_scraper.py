@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""asyncio engine for BacExamScraper.
+
+Listing fetches, ZIP downloads and PDF uploads run as coroutines on a single
+aiohttp session, so hundreds of transfers can be in flight without a thread
+per transfer. Link extraction, classification and R2 keys are delegated to the
+wrapped BacExamScraper, which keeps the output of both engines identical.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ModuleNotFoundError:
+    aiohttp = None
+
+from content_manifest import ContentRef
+from main import USER_AGENT, BacExamScraper
+from utils import RETRY_STATUS_CODES, MultipartStream, multipart_files, retry_backoff
+
+RETRY_AFTER_STATUS_CODES = frozenset([413, 429, 503])
+
+
+def ensure_aiohttp_installed() -> None:
+    if aiohttp is not None:
+        return
+
+    print("Error: the async engine needs the optional Python dependency 'aiohttp'.")
+    print("Install it with one of the following commands:")
+    print("  python3 -m pip install 'aiohttp>=3.9.0,<4.0.0'")
+    print("  source venv/bin/activate && python -m pip install 'aiohttp>=3.9.0,<4.0.0'")
+    raise SystemExit(1)
+
+
+async def read_chunks(body: MultipartStream):
+    """Feed a MultipartStream to aiohttp, reading each chunk off the event loop."""
+    while chunk := await asyncio.to_thread(body.read, body.chunk_size):
+        yield chunk
+
+
+class AsyncBacExamScraper:
+    """Run a BacExamScraper with asyncio instead of blocking requests calls."""
+
+    def __init__(self, scraper: BacExamScraper, total_retries: int = 3, backoff_factor: float = 0.5):
+        ensure_aiohttp_installed()
+        self.scraper = scraper
+        self.total_retries = total_retries
+        self.backoff_factor = backoff_factor
+        self.session: aiohttp.ClientSession | None = None
+
+    async def request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """Send a request with the same retry rules as utils.create_retry_session.
+
+        Connection errors and retryable statuses are retried up to total_retries
+        times; like urllib3 with raise_on_status=False, the last response is
+        returned once retries run out. The caller must release the response.
+        Every response is recorded in the scraper's metrics, with the retries before it.
+        """
+        data_factory = kwargs.pop('data_factory', None)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                attempt += 1
+                if attempt > self.total_retries:
+                    raise
+                await asyncio.sleep(retry_backoff(attempt, self.backoff_factor))
+                if data_factory is not None:
+                    kwargs['data'] = data_factory()
+                continue
+
+            if response.status not in RETRY_STATUS_CODES or attempt >= self.total_retries:
+                self.scraper.metrics.observe_http(method, url, response.status, time.perf_counter() - start, attempt)
+                return response
+
+            attempt += 1
+            retry_after = None
+            if response.status in RETRY_AFTER_STATUS_CODES:
+                retry_after = response.headers.get('Retry-After')
+            response.release()
+            await asyncio.sleep(retry_backoff(attempt, self.backoff_factor, retry_after))
+
+            # Multipart bodies are single-use, so rebuild them for the next attempt
+            if data_factory is not None:
+                kwargs['data'] = data_factory()
+
+    async def fetch_page(self, url: str) -> str | None:
+        """Fetch a listing page, with the sync engine's conditional GET and plain-HTTP fallback.
+
+        Returns the page, None when the cached copy is still current, or ""
+        when the page could not be fetched.
+        """
+        listing_cache = self.scraper.listing_cache
+        headers = {'User-Agent': USER_AGENT}
+        request_url = url
+        if listing_cache:
+            headers.update(listing_cache.conditional_headers(url))
+            request_url = listing_cache.effective_url(url)
+        candidates = [request_url]
+        if request_url.startswith('https://'):
+            candidates.append(request_url.replace('https://', 'http://', 1))
+
+        # Coroutines share a thread, so stages are added up here instead of with metrics.stage()
+        start = time.perf_counter()
+        for candidate in candidates:
+            try:
+                response = await self.request(
+                    'GET',
+                    candidate,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=30),
+                )
+                async with response:
+                    response.raise_for_status()
+                    if candidate != request_url and listing_cache:
+                        listing_cache.mark_http_only(url)
+                    if listing_cache and response.status == 304:
+                        listing_cache.hit()
+                        self.scraper.metrics.add('listing', calls=1, seconds=time.perf_counter() - start)
+                        return None
+                    body = await response.read()
+                    self.scraper.metrics.add('listing', calls=1, bytes=len(body), seconds=time.perf_counter() - start)
+                    encoding = response.get_encoding()
+                    if listing_cache:
+                        listing_cache.store(url, response, body, encoding)
+                    return body.decode(encoding)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if candidate != candidates[-1]:
+                    print(f"HTTPS failed, trying HTTP: {candidates[-1]}")
+                    continue
+                print(f"Error fetching {candidate}: {e}")
+        self.scraper.metrics.add('listing', calls=1, errors=1, seconds=time.perf_counter() - start)
+        return ""
+
+    async def download_file(self, url: str, target_path: Path) -> bool:
+        """Stream a ZIP to disk in 1 MB chunks."""
+        start = time.perf_counter()
+        listing_cache = self.scraper.listing_cache
+        request_url = listing_cache.effective_url(url) if listing_cache else url
+        try:
+            response = await self.request(
+                'GET',
+                request_url,
+                headers={'User-Agent': USER_AGENT},
+                timeout=aiohttp.ClientTimeout(sock_connect=60, sock_read=60),
+            )
+            async with response:
+                response.raise_for_status()
+                with open(target_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(1024 * 1024):
+                        f.write(chunk)
+                self.scraper.zip_manifest.record(url, response.headers)
+            self.scraper.metrics.add(
+                'download', calls=1, items=1, bytes=target_path.stat().st_size, seconds=time.perf_counter() - start
+            )
+            print(f"Downloaded: {target_path.name}")
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.scraper.metrics.add('download', calls=1, errors=1, seconds=time.perf_counter() - start)
+            print(f"Error downloading {url}: {e}")
+            return False
+
+    async def upload_to_r2(self, pdf_path: Path, r2_key: str) -> bool:
+        """Upload a PDF to the worker /upload-scraper endpoint, streaming it from disk."""
+        with multipart_files({'key': r2_key, 'defer_index': '1'}, [('file', pdf_path)]) as body:
+            def rewound_body():
+                # Every attempt sends the same body from its start
+                body.seek(0)
+                return read_chunks(body)
+
+            start = time.perf_counter()
+            try:
+                response = await self.request(
+                    'POST',
+                    f"{self.scraper.worker_url}/upload-scraper",
+                    headers={
+                        **self.scraper._auth_header(),
+                        'Content-Type': body.content_type,
+                        'Content-Length': str(len(body)),
+                    },
+                    data=rewound_body(),
+                    data_factory=rewound_body,
+                    timeout=aiohttp.ClientTimeout(sock_connect=120, sock_read=120),
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"  Upload error: {e}")
+                self.scraper.metrics.add('upload', calls=1, errors=1, seconds=time.perf_counter() - start)
+                return False
+
+            async with response:
+                if response.ok:
+                    print(f"  Uploaded to R2: {r2_key}")
+                    self.scraper.metrics.add(
+                        'upload', calls=1, items=1, bytes=len(body), seconds=time.perf_counter() - start
+                    )
+                    # May commit a batch of keys to the index, which is a blocking request
+                    await asyncio.to_thread(self.scraper.deferred_index.add, r2_key)
+                    return True
+                print(f"  Upload failed ({response.status}): {await response.text()}")
+                self.scraper.metrics.add('upload', calls=1, errors=1, seconds=time.perf_counter() - start)
+                return False
+
+    async def upload_pdf(
+        self, pdf_path: Path, exam_type: str, year: str, content: ContentRef, upload_slots: asyncio.Semaphore
+    ) -> bool:
+        """Async counterpart of BacExamScraper.upload_pdf, using the same R2 keys."""
+        scraper = self.scraper
+        r2_keys = scraper.resolve_r2_keys(pdf_path.name, exam_type, year)
+        if not r2_keys:
+            print(f"Warning: Could not determine subject for: {pdf_path.name}")
+            return False
+
+        # Keys are stored one after another so duplicates become aliases of the first transfer
+        results = []
+        for r2_key in r2_keys:
+            async with upload_slots:
+                if await asyncio.to_thread(scraper.alias_content, content, r2_key):
+                    results.append(True)
+                    continue
+                if scraper.upload_enabled:
+                    ok = await self.upload_to_r2(pdf_path, r2_key)
+                else:
+                    ok = await asyncio.to_thread(scraper.save_file_locally, pdf_path, r2_key)
+            if ok:
+                scraper.content_manifest.record(content, r2_key)
+            results.append(ok)
+        return any(results)
+
+    async def process_zip_url(
+        self,
+        zip_url: str,
+        exam_type: str,
+        job_dir: Path,
+        download_slots: asyncio.Semaphore,
+        extract_slots: asyncio.Semaphore,
+        upload_slots: asyncio.Semaphore,
+    ) -> bool:
+        """Download, extract and upload one ZIP; returns True if any PDF was stored."""
+        scraper = self.scraper
+        zip_filename = os.path.basename(urlparse(zip_url).path)
+        zip_path = job_dir / zip_filename
+        extract_dir = job_dir / f"temp_{zip_path.stem}"
+        scraper.state.begin_zip(zip_url, scraper.current_year, exam_type)
+        try:
+            async with download_slots:
+                if not await self.download_file(zip_url, zip_path):
+                    scraper.state.fail_zip(zip_url, 'download failed')
+                    return False
+
+            async with extract_slots:
+                try:
+                    pdf_files = await asyncio.to_thread(scraper.extract_lro_pdfs, zip_path, extract_dir, zip_url)
+                except Exception as e:
+                    print(f"Error processing {zip_path}: {e}")
+                    scraper.state.fail_zip(zip_url, str(e))
+                    return False
+                finally:
+                    zip_path.unlink(missing_ok=True)
+
+            results = await asyncio.gather(
+                *(
+                    self.upload_pdf(pdf_file, exam_type, scraper.current_year, content, upload_slots)
+                    for pdf_file, content in pdf_files
+                ),
+                return_exceptions=True,
+            )
+            for (pdf_file, _content), result in zip(pdf_files, results):
+                if isinstance(result, Exception):
+                    print(f"Error processing PDF {pdf_file.name}: {result}")
+                scraper.finish_member(
+                    zip_url, pdf_file.relative_to(extract_dir).as_posix(), exam_type, scraper.current_year,
+                    result is True, str(result) if isinstance(result, Exception) else None,
+                )
+            uploaded = any(result is True for result in results)
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+        # Seen only once every member is stored; failed members are retried next run
+        if scraper.state.finish_zip(zip_url):
+            scraper.seen_urls.add(zip_url)
+        return uploaded
+
+    async def _run(self) -> int:
+        scraper = self.scraper
+        download_slots = asyncio.Semaphore(scraper.jobs)
+        extract_slots = asyncio.Semaphore(scraper.extract_jobs)
+        upload_slots = asyncio.Semaphore(scraper.upload_jobs)
+        connector = aiohttp.TCPConnector(limit=scraper.jobs + scraper.upload_jobs)
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            self.session = session
+            pages = await asyncio.gather(*(self.fetch_page(url) for url in scraper.urls))
+
+            scraper.temp_dir.mkdir(exist_ok=True)
+            scheduled: dict[str, str] = {}
+            for url, html_content in zip(scraper.urls, pages):
+                if html_content is None:
+                    # 304: reuse the links extracted on the run that cached this page
+                    zip_links = scraper.listing_cache.links(url)
+                    if zip_links is None:
+                        zip_links = scraper.extract_links(scraper.listing_cache.body(url), url)
+                        scraper.listing_cache.set_links(url, zip_links)
+                    print(f"Listing unchanged (cache hit): {len(zip_links)} ZIP files on {url}")
+                elif not html_content:
+                    continue
+                else:
+                    zip_links = scraper.extract_links(html_content, url)
+                    if scraper.listing_cache:
+                        scraper.listing_cache.set_links(url, zip_links)
+                    print(f"Found {len(zip_links)} ZIP files on {url}")
+                scraper.metrics.add('listing', items=len(zip_links))
+                if scraper.recheck:
+                    await asyncio.to_thread(scraper.recheck_seen_urls, zip_links)
+                for zip_url in zip_links:
+                    if zip_url in scraper.seen_urls or zip_url in scheduled:
+                        continue
+                    zip_filename = os.path.basename(urlparse(zip_url).path)
+                    scheduled[zip_url] = scraper.determine_exam_type(url, zip_filename)
+
+            tasks = []
+            for index, (zip_url, exam_type) in enumerate(scheduled.items(), start=1):
+                job_dir = scraper.temp_dir / f"async_{index:04d}"
+                job_dir.mkdir(exist_ok=True)
+                tasks.append(self.process_zip_url(
+                    zip_url, exam_type, job_dir, download_slots, extract_slots, upload_slots
+                ))
+            results = await asyncio.gather(*tasks)
+
+        self.session = None
+        return sum(1 for result in results if result)
+
+    def run(self) -> int:
+        """Main scraper execution on the asyncio engine."""
+        scraper = self.scraper
+        print(f"Starting BAC exam scraper for year {scraper.current_year} (async engine)")
+        mode = "R2 upload" if scraper.upload_enabled else "local save"
+        print(f"Mode: {mode}")
+        print(f"Worker URL: {scraper.worker_url}")
+
+        zips_count = asyncio.run(self._run())
+        scraper.save_state()
+        return zips_count
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Client for the worker's batch upload route, POST /upload-scraper-batch.
+
+Every /upload-scraper call makes the worker read, change and rewrite the
+whole index.json and recent-changes.json, so N uploads rewrite the index N
+times. A batch request carries a JSON manifest and one part per file, and the
+worker commits the index once for all of them.
+
+Manifest entries without a part name keys that are already stored, by single
+uploads sent with `defer_index`. The scraper streams PDFs one at a time as it
+reads the ZIPs, so it stores them that way and queues their keys in the state
+store; DeferredIndex commits the queue in batches.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+try:
+    import requests
+except ModuleNotFoundError:
+    requests = None
+
+from state_store import StateStore
+from utils import multipart_files
+
+BATCH_ROUTE = '/upload-scraper-batch'
+# Per-request limits of the worker (MAX_BATCH_FILES / MAX_BATCH_ENTRIES in cuza-worker/src/app.ts)
+MAX_BATCH_FILES = 50
+MAX_BATCH_ENTRIES = 1000
+# Keeps a request body well under the worker's request size limit
+MAX_BATCH_BYTES = 32 * 1024 * 1024
+
+
+def plan_batches(
+    uploads: list[tuple[Path, str]], max_files: int = MAX_BATCH_FILES, max_bytes: int = MAX_BATCH_BYTES
+) -> list[list[tuple[Path, str]]]:
+    """Group (path, key) uploads into batches of at most `max_files` files and about `max_bytes` bytes."""
+    max_files = max(1, min(max_files, MAX_BATCH_FILES))
+    batches: list[list[tuple[Path, str]]] = []
+    batch: list[tuple[Path, str]] = []
+    batch_bytes = 0
+    for path, key in uploads:
+        size = path.stat().st_size
+        if batch and (len(batch) >= max_files or batch_bytes + size > max_bytes):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append((path, key))
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def send_batch(
+    session, worker_url: str, headers: dict, files: list[tuple[Path, str]],
+    digests: dict[str, str] | None = None, index_only: list[str] | None = None, timeout: int = 300,
+):
+    """POST one batch: `files` are uploaded, `index_only` keys are only added to the index.
+
+    `digests` maps keys to their SHA-256; the worker checks them and leaves
+    objects that already hold those bytes untouched.
+    """
+    manifest = []
+    for _path, key in files:
+        entry = {'key': key}
+        if digests and digests.get(key):
+            entry['sha256'] = digests[key]
+        manifest.append(entry)
+    manifest.extend({'key': key} for key in index_only or [])
+
+    parts = [(f'file{i}', path) for i, (path, _key) in enumerate(files)]
+    with multipart_files({'manifest': json.dumps(manifest)}, parts) as body:
+        return session.post(
+            f"{worker_url.rstrip('/')}{BATCH_ROUTE}",
+            headers={**headers, 'Content-Type': body.content_type},
+            data=body,
+            timeout=timeout,
+        )
+
+
+class DeferredIndex:
+    """Keys stored with defer_index, committed to the worker's index in batches.
+
+    The queue lives in the state store, so keys left by a crashed run are
+    committed by the next one.
+    """
+
+    def __init__(self, session, worker_url: str, auth_header, state: StateStore, commit_every: int = 100):
+        self.session = session
+        self.worker_url = worker_url
+        self.auth_header = auth_header
+        self.state = state
+        self.commit_every = commit_every
+        self.commits = 0
+        self.lock = threading.Lock()
+
+    def add(self, key: str) -> None:
+        # A thread that finds a commit in progress leaves its key for that one or the next
+        if self.state.defer_index(key) >= self.commit_every and self.lock.acquire(blocking=False):
+            try:
+                self._commit()
+            finally:
+                self.lock.release()
+
+    def commit(self) -> bool:
+        """Index every queued key; keys of a failed request stay queued. True if the queue is empty."""
+        with self.lock:
+            return self._commit()
+
+    def _commit(self) -> bool:
+        keys = self.state.unindexed_keys()
+        for start in range(0, len(keys), MAX_BATCH_ENTRIES):
+            chunk = keys[start:start + MAX_BATCH_ENTRIES]
+            try:
+                response = send_batch(self.session, self.worker_url, self.auth_header(), [], index_only=chunk)
+                result = response.json() if response.ok else None
+            except (requests.RequestException, ValueError) as e:
+                print(f"Index commit error: {e}")
+                return False
+            if result is None:
+                print(f"Index commit failed ({response.status_code}): {response.text}")
+                return False
+
+            self.commits += 1
+            # Keys missing from the bucket cannot be indexed; keeping them would retry forever
+            self.state.mark_indexed(chunk)
+            for key in result.get('missing', []):
+                print(f"Warning: {key} is not stored, left out of the index")
+            print(f"Committed {len(result.get('indexed', []))} key(s) to the worker index")
+        return True
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Compare single-file uploads with /upload-scraper-batch, offline.
+
+Runs local_preview_api.py's upload stand-in in-process on a temporary files
+directory whose index.json is seeded with --existing keys, so every index
+rewrite costs about as much as on the real worker. The same synthetic PDFs
+are then uploaded with one request per file and with batches, and the script
+reports wall time, requests, index rewrites and index bytes written.
+
+Usage:
+  python3 benchmarks/batch_upload_bench.py [--files 500] [--size 200000] [--existing 5000] [--batch 50] [--jobs 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+import local_preview_api  # noqa: E402
+from upload_local_files import upload_bulk  # noqa: E402
+
+
+def make_pdfs(source_dir: Path, count: int, size: int) -> list[tuple[Path, str]]:
+    uploads = []
+    for index in range(count):
+        key = f"fizica/pages/bac/{2000 + index % 25}/Sesiunea_{index % 7}/E_d_fizica_{index}.pdf"
+        path = source_dir / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'%PDF-1.4\n' + os.urandom(size))
+        uploads.append((path, key))
+    return uploads
+
+
+def seed_index(files_dir: Path, existing: int) -> None:
+    index: dict = {}
+    for index_number in range(existing):
+        key = f"seed/pages/bac/{index_number % 40}/Model/E_seed_{index_number}.pdf"
+        node = index
+        segments = key.split('/')
+        for segment in segments[:-1]:
+            node = node.setdefault(segment, {})
+        node[segments[-1]] = key
+    (files_dir / 'index.json').write_text(json.dumps(index, indent=2), encoding='utf-8')
+
+
+def run_mode(uploads: list[tuple[Path, str]], existing: int, jobs: int, batch_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as files_dir:
+        files_root = Path(files_dir)
+        seed_index(files_root, existing)
+        local_preview_api.files_root = files_root
+        local_preview_api.upload_store = local_preview_api.UploadStore(files_root)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), local_preview_api.PreviewRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                report = upload_bulk(
+                    f"http://127.0.0.1:{server.server_port}", 'bench', uploads, jobs, 1_000_000,
+                    batch_size=batch_size,
+                )
+            elapsed = time.perf_counter() - start
+            stats = local_preview_api.upload_store.stats()
+        finally:
+            server.shutdown()
+            server.server_close()
+    return {'elapsed': elapsed, 'uploaded': report.uploaded, 'failed': len(report.failed), **stats}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark batched uploads against the local stand-in')
+    parser.add_argument('--files', type=int, default=500, help='Synthetic PDFs to upload')
+    parser.add_argument('--size', type=int, default=200_000, help='Bytes per PDF')
+    parser.add_argument('--existing', type=int, default=5000, help='Keys already in index.json')
+    parser.add_argument('--batch', type=int, default=50, help='Files per batch request')
+    parser.add_argument('--jobs', type=int, default=4, help='Concurrent requests in both modes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        uploads = make_pdfs(Path(source_dir), args.files, args.size)
+        results = {
+            'single': run_mode(uploads, args.existing, args.jobs, 0),
+            f'batch {args.batch}': run_mode(uploads, args.existing, args.jobs, args.batch),
+        }
+
+    print(f"{args.files} file(s) of {args.size} bytes, {args.existing} key(s) already indexed, {args.jobs} job(s)")
+    print(f"{'mode':<12}{'time':>9}{'requests':>10}{'index writes':>14}{'index MB written':>18}{'failed':>8}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<12}{result['elapsed']:>8.2f}s{result['requests']:>10}{result['indexWrites']:>14}"
+            f"{result['indexBytesWritten'] / (1024 * 1024):>18.1f}{result['failed']:>8}"
+        )
+    return 1 if any(result['failed'] or result['uploaded'] != args.files for result in results.values()) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
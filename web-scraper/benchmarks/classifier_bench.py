@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Golden-output check and benchmark for classifier.py.
+
+The corpus is built from the real ZIP names in filenames/*.txt and
+seen_urls.txt, the example PDF names in the rule tables, and a seeded
+synthetic set of PDF and ZIP names. Every name is classified by the compiled
+classifier and by a verbatim copy of the keyword loops it replaced. Any
+difference is reported and the script exits with status 1.
+
+classifier_golden.json pins the output for the real names and the examples,
+so a rule edit that changes an existing key shows up as a diff.
+Regenerate it with --update-golden after an intentional change.
+
+Usage:
+  python3 benchmarks/classifier_bench.py [--size 200000] [--update-golden]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+import classifier  # noqa: E402
+
+GOLDEN_FILE = Path(__file__).resolve().parent / 'classifier_golden.json'
+
+LISTING_URLS = (
+    'https://subiecte.edu.ro/{year}/bacalaureat/modeledesubiecte/probescrise/',
+    'https://subiecte.edu.ro/{year}/simulare/simulare_bac_XII/',
+    'https://subiecte.edu.ro/{year}/bacalaureat/Subiecte_si_bareme/',
+)
+
+
+# ── Reference rules (the keyword loops classifier.py replaced) ──────────────
+
+def legacy_exam_type(url: str, zip_filename: str = "") -> str:
+    url_lower = url.lower()
+    filename_lower = zip_filename.lower()
+    if 'simulare' in url_lower or 'sim' in filename_lower:
+        return 'Simulare'
+    if 'modeledesubiecte' in url_lower or 'model' in filename_lower:
+        return 'Model'
+    if 'rezerva' in filename_lower:
+        if 'speciala' in filename_lower:
+            return 'Sesiune-olimpici-rezerva'
+        if 'iun' in filename_lower or 'iul' in filename_lower:
+            return 'Sesiunea-I-rezerva'
+        if 'aug' in filename_lower:
+            return 'Sesiunea-II-rezerva'
+    if 'speciala' in filename_lower:
+        return 'Sesiune-olimpici'
+    if '_iun' in filename_lower or '_iul' in filename_lower:
+        return 'Sesiunea-I'
+    if '_aug' in filename_lower:
+        return 'Sesiunea-II'
+    return '-'
+
+
+def legacy_subject(pdf_filename: str) -> str | None:
+    filename_lower = pdf_filename.lower()
+    subject_keywords = {
+        'romana': 'romana',
+        'matematica': 'mate',
+        'istorie': 'istorie',
+        'anat_fiz_gen_ec_um': 'anat',
+        'bio_veg_anim': 'bio',
+        'chimie': 'chimie',
+        'economie': 'economie',
+        'filosofie': 'filosofie',
+        'fizica': 'fizica',
+        'geografie': 'geo',
+        'informatica': 'info',
+        'logica': 'logica',
+        'psihologie': 'psihologie',
+        'sociologie': 'sociologie',
+    }
+    for keyword, folder in subject_keywords.items():
+        if keyword in filename_lower:
+            return folder
+    return None
+
+
+def legacy_subcategory(pdf_filename: str) -> str:
+    filename_lower = pdf_filename.lower()
+    subcategory_keywords = {
+        'real_tehn': 'real',
+        'uman_ped': 'uman',
+        'm_mate-info': 'mate-info',
+        'm_pedagogic': 'pedagogic',
+        'm_st-nat': 'st-nat',
+        'm_tehnologic': 'tehnologic',
+        'anorganica': 'anorganica',
+        'organica': 'organica',
+        'tehnologic': 'tehnologic',
+        'teoretic_vocational': 'teoretic',
+        'sp_mi_c': 'mate-info-C',
+        'sp_mi_p': 'mate-info-Pascal',
+        'sp_mi_pascal': 'mate-info-Pascal',
+        'sp_sn_c': 'st-nat-C',
+        'sp_sn_p': 'st-nat-Pascal',
+        'sp_sn_pascal': 'st-nat-Pascal',
+        'sp_mi_bar': 'mate-info-bareme',
+        'sp_sn_bar': 'st-nat-bareme',
+    }
+    for keyword, folder in subcategory_keywords.items():
+        if keyword in filename_lower:
+            return folder
+    return 'bac'
+
+
+# ── Corpus ───────────────────────────────────────────────────────────────────
+
+def real_zip_cases() -> list[tuple[str, str]]:
+    """(listing URL, ZIP filename) pairs from filenames/*.txt and seen_urls.txt."""
+    cases = []
+    for list_file in sorted((WEB_SCRAPER_DIR / 'filenames').glob('*.txt')):
+        for line in list_file.read_text(encoding='utf-8').splitlines():
+            if line.strip():
+                cases.extend((url.format(year=2025), line.strip()) for url in LISTING_URLS)
+
+    seen_urls_file = WEB_SCRAPER_DIR / 'seen_urls.txt'
+    if seen_urls_file.exists():
+        for line in seen_urls_file.read_text(encoding='utf-8').splitlines():
+            zip_url = line.strip()
+            if zip_url:
+                listing_url, _, zip_filename = zip_url.rpartition('/')
+                cases.append((listing_url + '/', zip_filename))
+    return cases
+
+
+def example_pdf_names() -> list[str]:
+    """The example filenames documented next to the subject rules."""
+    source = (WEB_SCRAPER_DIR / 'classifier.py').read_text(encoding='utf-8')
+    return sorted({word for word in source.split() if word.startswith('E_') and word.endswith('.pdf')})
+
+
+def synthetic_pdf_names(count: int, seed: int = 2026) -> list[str]:
+    rng = random.Random(seed)
+    prefixes = ['E_a_', 'E_b_', 'E_c_', 'E_d_', '']
+    subjects = [keyword for keyword, _ in classifier.SUBJECT_RULES] + [
+        'limba_maghiara', 'Limba_si_literatura_romana', 'desen', 'muzica', 'pentru_minoritatea_romana',
+    ]
+    subcategories = [
+        'M_mate-info', 'M_pedagogic', 'M_st-nat', 'M_tehnologic', 'real_tehn', 'uman_ped',
+        'anorganica', 'organica', 'tehnologic', 'teoretic_vocational', 'sp_MI_C', 'sp_MI_Pascal',
+        'sp_MI_P', 'sp_SN_C', 'sp_SN_Pascal', 'sp_SN_P', 'sp_MI_bar', 'sp_SN_bar', 'mate-info', '',
+    ]
+    kinds = ['var_{:02d}', 'bar_{:02d}', 'var_model', 'bar_model', 'var_simulare', 'bar_simulare', 'model', 'var_rezerva']
+    languages = ['_LRO', '_LMA', '_LGE', '_LSK', '_LSR', '_LUA', '']
+
+    names = []
+    for _ in range(count):
+        parts = [rng.choice(prefixes) + rng.choice(subjects)]
+        if rng.random() < 0.1:
+            # Two subject keywords in one name exercise the first-match ordering
+            parts.append(rng.choice(subjects))
+        subcategory = rng.choice(subcategories)
+        if subcategory:
+            parts.append(subcategory)
+        parts.append(str(rng.randint(2015, 2026)))
+        parts.append(rng.choice(kinds).format(rng.randint(0, 10)))
+        name = '_'.join(parts) + rng.choice(languages) + '.pdf'
+        if rng.random() < 0.2:
+            name = ''.join(ch.upper() if rng.random() < 0.3 else ch for ch in name)
+        names.append(name)
+    return names
+
+
+def synthetic_zip_cases(count: int, seed: int = 2026) -> list[tuple[str, str]]:
+    rng = random.Random(seed + 1)
+    prefixes = ['E_a_', 'E_c_', 'E_d_', 'Bac_{year}_E_c_', 'E_a_romana_']
+    sessions = [
+        'ses_iunie', 'sesiunea_iunie-iulie', 'ses_iulie', 'ses_august', 'sesiune_august', 'ses_speciala',
+        'simulare', 'modele', 'model', 'Matematica_modele', 'sim', '',
+    ]
+    suffixes = ['', '_rezerva', '_Rezerva', '_speciala_rezerva', '_LRO']
+
+    cases = []
+    for _ in range(count):
+        year = rng.randint(2015, 2026)
+        host = f"subiecte{year}" if rng.random() < 0.3 else 'subiecte'
+        url = rng.choice(LISTING_URLS).format(year=year).replace('subiecte.', f'{host}.', 1)
+        session = rng.choice(sessions)
+        if rng.random() < 0.5:
+            name = f"{rng.choice(prefixes).format(year=year)}{year}_{session}{rng.choice(suffixes)}.zip"
+        else:
+            name = f"{rng.choice(prefixes).format(year=year)}{session}_{year}{rng.choice(suffixes)}.zip"
+        cases.append((url, name))
+    return cases
+
+
+# ── Checks ───────────────────────────────────────────────────────────────────
+
+def compare(pdf_names: list[str], zip_cases: list[tuple[str, str]]) -> list[str]:
+    mismatches = []
+    for name, (subject, subcategory) in zip(pdf_names, classifier.classify(pdf_names)):
+        expected = (legacy_subject(name), legacy_subcategory(name))
+        if (subject, subcategory) != expected:
+            mismatches.append(f"{name}: {(subject, subcategory)} != {expected}")
+    for url, name in zip_cases:
+        exam_type = classifier.exam_type_for(url, name)
+        expected = legacy_exam_type(url, name)
+        if exam_type != expected:
+            mismatches.append(f"{url} {name}: {exam_type} != {expected}")
+    return mismatches
+
+
+def golden_output(pdf_names: list[str], zip_cases: list[tuple[str, str]]) -> dict:
+    return {
+        'pdf': {name: list(result) for name, result in zip(pdf_names, classifier.classify(pdf_names))},
+        'zip': {f"{url} {name}": classifier.exam_type_for(url, name) for url, name in zip_cases},
+    }
+
+
+def timed(label: str, count: int, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed * 1000:9.1f} ms  {count / elapsed:12,.0f} names/s")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Check classifier.py against the reference rules and time it')
+    parser.add_argument('--size', type=int, default=200_000, help='Synthetic PDF and ZIP names (default: 200000)')
+    parser.add_argument('--update-golden', action='store_true', help=f'Rewrite {GOLDEN_FILE.name}')
+    args = parser.parse_args()
+
+    real_zips = real_zip_cases()
+    examples = example_pdf_names()
+    golden_pdf_names = examples + synthetic_pdf_names(200, seed=1)
+    pdf_names = golden_pdf_names + synthetic_pdf_names(args.size)
+    zip_cases = real_zips + synthetic_zip_cases(args.size)
+    print(f"Corpus: {len(pdf_names)} PDF names, {len(zip_cases)} ZIP names ({len(real_zips)} real)")
+
+    failed = False
+    mismatches = compare(pdf_names, zip_cases)
+    if mismatches:
+        failed = True
+        print(f"MISMATCH: {len(mismatches)} name(s) classified differently from the reference rules")
+        for line in mismatches[:20]:
+            print(f"  {line}")
+    else:
+        print("Reference rules: identical output")
+
+    golden = golden_output(golden_pdf_names, real_zips)
+    if args.update_golden:
+        GOLDEN_FILE.write_text(json.dumps(golden, indent=2, ensure_ascii=False, sort_keys=True) + '\n', encoding='utf-8')
+        print(f"Wrote {GOLDEN_FILE.name}")
+    elif GOLDEN_FILE.exists():
+        expected = json.loads(GOLDEN_FILE.read_text(encoding='utf-8'))
+        diffs = [
+            f"{section} {name}: {golden[section].get(name)} != {value}"
+            for section in ('pdf', 'zip')
+            for name, value in expected[section].items()
+            if golden[section].get(name) != value
+        ]
+        if diffs:
+            failed = True
+            print(f"GOLDEN DIFF: {len(diffs)} name(s)")
+            for line in diffs[:20]:
+                print(f"  {line}")
+        else:
+            print(f"Golden output: identical ({len(expected['pdf']) + len(expected['zip'])} names)")
+
+    print("\nTimings:")
+    legacy = timed('reference subject + subcategory', len(pdf_names),
+                   lambda: [(legacy_subject(name), legacy_subcategory(name)) for name in pdf_names])
+    classifier.clear_cache()
+    compiled = timed('classifier.classify()', len(pdf_names), lambda: classifier.classify(pdf_names))
+    legacy_zip = timed('reference exam type', len(zip_cases),
+                       lambda: [legacy_exam_type(url, name) for url, name in zip_cases])
+    compiled_zip = timed('classifier.exam_type_for()', len(zip_cases),
+                         lambda: [classifier.exam_type_for(url, name) for url, name in zip_cases])
+    print(f"\nPDF speedup: {legacy / compiled:.2f}x, ZIP speedup: {legacy_zip / compiled_zip:.2f}x")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Check link_extractor.py against the three-pass extract_links it replaced.
+
+Every page is run through the reference implementation and through
+LinkExtractor, fed whole and in chunks of several sizes (down to one byte),
+and the two link sets must be identical. Pages come from
+benchmarks/fixtures/*.html (first line `<!-- url: ... -->`), from the listing
+bodies saved in .cache/ by previous runs, and from any extra files given on
+the command line together with --url/--year. The script also times both
+implementations on a large synthetic listing and reports how far into it the
+first link is emitted.
+
+Usage:
+  python3 benchmarks/link_extractor_check.py [--url URL --year YEAR page.html ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+from link_extractor import LinkExtractor  # noqa: E402
+from utils import load_json_file  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+CHUNK_SIZES = (1, 7, 64, 1024, 16 * 1024)
+URL_COMMENT = re.compile(r'<!-- url: (\S+) -->')
+URL_YEAR = re.compile(r'/(\d{4})/')
+
+
+def reference_extract_links(html_content: str, year: str, base_url: str) -> list[str]:
+    """BacExamScraper.extract_links as it was before link_extractor.py."""
+    patterns = [
+        rf'href=\"([^\"]*E_?[acd]_[^\"]*{year}[^\"]*\.zip)\"',
+        rf'href=\"([^\"]*Bac_{year}_E_?[acd]_[^\"]*\.zip)\"',
+        rf'href=\"([^\"]*{year}[^\"]*E_?[acd][^\"]*\.zip)\"',
+    ]
+    all_matches = []
+    for pattern in patterns:
+        all_matches.extend(re.findall(pattern, html_content, re.IGNORECASE))
+
+    zip_links = []
+    for match in all_matches:
+        if match.startswith('http') or match.startswith('https'):
+            zip_links.append(match)
+        else:
+            zip_links.append(urljoin(base_url, match))
+    return list(set(zip_links))
+
+
+def streamed_links(body: bytes, year: str, base_url: str, chunk_size: int) -> list[str]:
+    extractor = LinkExtractor(year, base_url, 'utf-8')
+    for start in range(0, len(body), chunk_size):
+        extractor.feed(body[start:start + chunk_size])
+    extractor.close()
+    return extractor.links
+
+
+def collect_pages(args) -> list[tuple[str, bytes, str, str]]:
+    """(label, body, year, base_url) for every page to check."""
+    pages = []
+    for path in sorted(FIXTURES_DIR.glob('*.html')):
+        body = path.read_bytes()
+        url = URL_COMMENT.search(body.decode('utf-8', errors='replace')).group(1)
+        pages.append((f"fixtures/{path.name}", body, URL_YEAR.search(url).group(1), url))
+
+    # Listing bodies cached by the scraper: listings.json maps URL -> entry, bodies are sha1(url).html
+    cache_dir = WEB_SCRAPER_DIR / '.cache'
+    entries = load_json_file(cache_dir / 'listings.json', {}).get('entries', {})
+    for url in sorted(entries):
+        body_path = cache_dir / 'listings' / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html"
+        year_match = URL_YEAR.search(url)
+        if body_path.exists() and year_match:
+            pages.append((f".cache {url}", body_path.read_bytes(), year_match.group(1), url))
+
+    for name in args.pages:
+        pages.append((name, Path(name).read_bytes(), str(args.year), args.url))
+    return pages
+
+
+def synthetic_listing(year: int, rows: int) -> bytes:
+    lines = ['<html><body><table>']
+    for index in range(rows):
+        code = 'acd'[index % 3]
+        lines.append(
+            f'<tr><td><a href="Document_{index}.pdf">Document_{index}.pdf</a></td><td>2025-06-30 10:00</td></tr>'
+        )
+        if index % 50 == 0:
+            lines.append(f'<tr><td><a href="E_{code}_{year}_ses_{index}.zip">E_{code}_{year}_ses_{index}.zip</a></td></tr>')
+    lines.append('</table></body></html>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Compare the streaming link extractor with the reference')
+    parser.add_argument('pages', nargs='*', help='Extra saved listing pages')
+    parser.add_argument('--url', default='https://subiecte.edu.ro/2025/bacalaureat/Subiecte_si_bareme/',
+                        help='Listing URL of the extra pages')
+    parser.add_argument('--year', type=int, default=2025, help='Year of the extra pages')
+    parser.add_argument('--rows', type=int, default=200_000, help='Rows in the synthetic benchmark page')
+    args = parser.parse_args()
+
+    failed = False
+    for label, body, year, base_url in collect_pages(args):
+        expected = set(reference_extract_links(body.decode('utf-8', errors='replace'), year, base_url))
+        results = {'whole': streamed_links(body, year, base_url, len(body) or 1)}
+        for chunk_size in CHUNK_SIZES:
+            results[f'{chunk_size}B chunks'] = streamed_links(body, year, base_url, chunk_size)
+
+        bad = {mode: links for mode, links in results.items() if set(links) != expected or len(links) != len(set(links))}
+        if bad:
+            failed = True
+            print(f"MISMATCH {label}")
+            for mode, links in bad.items():
+                print(f"  {mode}: missing {sorted(expected - set(links))}, extra {sorted(set(links) - expected)}")
+        else:
+            print(f"ok  {label}: {len(expected)} link(s)")
+
+    body = synthetic_listing(2025, args.rows)
+    base_url = 'https://subiecte.edu.ro/2025/bacalaureat/Subiecte_si_bareme/'
+    print(f"\nSynthetic listing: {len(body) / (1024 * 1024):.1f} MB")
+
+    start = time.perf_counter()
+    expected = reference_extract_links(body.decode('utf-8'), '2025', base_url)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extractor = LinkExtractor('2025', base_url, 'utf-8')
+    first_link_at = None
+    for offset in range(0, len(body), 16 * 1024):
+        if extractor.feed(body[offset:offset + 16 * 1024]) and first_link_at is None:
+            first_link_at = offset + 16 * 1024
+    extractor.close()
+    streaming_time = time.perf_counter() - start
+
+    if set(extractor.links) != set(expected):
+        failed = True
+        print("MISMATCH synthetic listing")
+    print(f"  reference (3 passes, whole page)   {reference_time * 1000:8.1f} ms")
+    print(f"  LinkExtractor (16 KB chunks)       {streaming_time * 1000:8.1f} ms")
+    print(f"  first link emitted after {first_link_at or 0} of {len(body)} bytes")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
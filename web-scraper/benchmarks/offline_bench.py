@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""End-to-end benchmark of the scraper tools against local stand-ins, no network.
+
+Starts benchmarks/standins.py's FakeListingSite (--zips synthetic ZIPs of
+--pdfs PDFs of --pdf-kb KB) and WorkerEmulator in this process, with
+--latency-ms (+ up to --jitter-ms) before every answer and --error-rate of
+them failed with a 503, then runs each scenario as a child process of the real
+command line, in a temporary working directory:
+
+  scrape    main.py --site-url <site> --work-dir <tmp> --upload, plus --scrape-args
+  upload    upload_local_files.py of --upload-files PDFs of --upload-kb KB
+  download  download_from_worker.py of everything the worker holds
+  cleanup   cleanup_index.py over index.json with --stale dead leaves added,
+            then trigger_deploy.py
+
+Each scenario reports its exit code, wall time, throughput, the latency
+percentiles of every stand-in route (service time, injected latency included),
+the injected errors and the peak RSS of its child process. The JSON report
+(stdout, or --output) names the commit it ran on; with --baseline an earlier
+report is compared scenario by scenario.
+
+Usage:
+  python3 benchmarks/offline_bench.py [--zips 24] [--pdfs 8] [--pdf-kb 256] [--jobs 4] [--latency-ms 5]
+      [--error-rate 0.01] [--scenarios scrape,upload] [--output BENCH.json] [--baseline OLD.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from standins import Faults, FakeListingSite, WorkerEmulator  # noqa: E402
+
+SCENARIOS = ('scrape', 'upload', 'download', 'cleanup')
+PASSWORD = 'bench'
+UPLOAD_PAGES = ('fizica/pages/mecanica', 'matematica/pages/analiza', 'informatica/pages/c', 'romana/pages/opere')
+
+
+def git_revision() -> dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ['git', *args], cwd=WEB_SCRAPER_DIR, capture_output=True, text=True, check=False,
+        ).stdout.strip()
+
+    return {'commit': git('rev-parse', '--short', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain', '.'))}
+
+
+def run_child(command: list[str], cwd: Path, log: Path) -> tuple[int, float, float]:
+    """Run one CLI to completion; (exit code, seconds, peak RSS in MB of that process)."""
+    with log.open('w', encoding='utf-8') as output:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, stdout=output, stderr=subprocess.STDOUT)
+        # wait4 gives the rusage of this child alone; RUSAGE_CHILDREN would mix the scenarios
+        _pid, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    peak = usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+    return process.returncode, elapsed, round(peak, 1)
+
+
+def make_uploads(root: Path, count: int, kb: int, seed: int) -> int:
+    rng = random.Random(seed)
+    for index in range(count):
+        directory = root / UPLOAD_PAGES[index % len(UPLOAD_PAGES)] / str(2000 + index % 25) / 'Sesiunea_iunie'
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"E_upload_{index:05d}.pdf").write_bytes(b'%PDF-1.4\n' + rng.randbytes(kb * 1024))
+    return count * (kb * 1024 + 9)
+
+
+def seed_worker(worker: WorkerEmulator, root: Path, args: argparse.Namespace) -> None:
+    """Store the upload set directly, for download/cleanup runs without a scrape or upload before them."""
+    if worker.objects():
+        return
+    make_uploads(root, args.upload_files, args.upload_kb, args.seed)
+    keys = []
+    for path in sorted(root.rglob('*.pdf')):
+        key = path.relative_to(root).as_posix()
+        worker.store.put(key, path.read_bytes())
+        keys.append(key)
+    worker.store.commit(keys)
+
+
+def add_stale_leaves(worker: WorkerEmulator, count: int) -> None:
+    with worker.store.lock:
+        index = json.loads(worker.store.index_file.read_text(encoding='utf-8'))
+        stale = index.setdefault('stale', {}).setdefault('pages', {}).setdefault('removed', {})
+        for number in range(count):
+            key = f"stale/pages/removed/{2000 + number % 25}/E_gone_{number:05d}.pdf"
+            stale.setdefault(str(2000 + number % 25), {})[key.rsplit('/', 1)[1]] = key
+        worker.store.index_file.write_text(json.dumps(index, indent=2), encoding='utf-8')
+
+
+def run_scenario(
+    name: str, args: argparse.Namespace, work: Path, site: FakeListingSite, worker: WorkerEmulator,
+) -> dict[str, Any]:
+    python = sys.executable
+    auth = ['-w', worker.url, '-p', PASSWORD]
+    site.stats.reset()
+    worker.stats.reset()
+    site_errors, worker_errors = site.faults.injected, worker.faults.injected
+    objects_before = len(worker.objects())
+    result: dict[str, Any] = {}
+
+    if name == 'scrape':
+        command = [
+            python, str(WEB_SCRAPER_DIR / 'main.py'), '--site-url', site.url, '--work-dir', str(work / 'scrape'),
+            '--upload', *auth, '--year', str(args.year), '--jobs', str(args.jobs), *shlex.split(args.scrape_args),
+        ]
+        (work / 'scrape').mkdir(exist_ok=True)
+    elif name == 'upload':
+        base = work / 'upload'
+        upload_bytes = make_uploads(base, args.upload_files, args.upload_kb, args.seed)
+        command = [
+            python, str(WEB_SCRAPER_DIR / 'upload_local_files.py'), str(base), '-b', str(base), *auth,
+            '--jobs', str(args.jobs), '--rate', '1000000',
+        ]
+    elif name == 'download':
+        seed_worker(worker, work / 'seed', args)
+        command = [
+            python, str(WEB_SCRAPER_DIR / 'download_from_worker.py'), '--worker-url', worker.url,
+            '--output-dir', str(work / 'download'), '--jobs', str(args.jobs),
+        ]
+    else:
+        seed_worker(worker, work / 'seed', args)
+        add_stale_leaves(worker, args.stale)
+        command = [python, str(WEB_SCRAPER_DIR / 'cleanup_index.py'), *auth]
+
+    exit_code, elapsed, peak_rss = run_child(command, work, work / f"{name}.log")
+    if name == 'cleanup' and exit_code == 0:
+        deploy_code, deploy_elapsed, deploy_rss = run_child(
+            [python, str(WEB_SCRAPER_DIR / 'trigger_deploy.py'), *auth], work, work / 'deploy.log',
+        )
+        exit_code, elapsed, peak_rss = deploy_code, elapsed + deploy_elapsed, max(peak_rss, deploy_rss)
+
+    if name == 'scrape':
+        stored = len(worker.objects()) - objects_before
+        result['throughput'] = {
+            'zips_per_s': round(site.zip_count / elapsed, 2),
+            'pdfs_stored_per_s': round(stored / elapsed, 2),
+            'source_mb_per_s': round(site.bytes / (1024 * 1024) / elapsed, 2),
+        }
+        result['pdfs_stored'] = stored
+    elif name == 'upload':
+        result['throughput'] = {
+            'files_per_s': round(args.upload_files / elapsed, 2),
+            'mb_per_s': round(upload_bytes / (1024 * 1024) / elapsed, 2),
+        }
+    elif name == 'download':
+        files = [path for path in (work / 'download').rglob('*.pdf')]
+        size = sum(path.stat().st_size for path in files)
+        result['throughput'] = {
+            'files_per_s': round(len(files) / elapsed, 2),
+            'mb_per_s': round(size / (1024 * 1024) / elapsed, 2),
+        }
+        result['files'] = len(files)
+    else:
+        stats = worker.cleanups[-1] if worker.cleanups else {}
+        result['throughput'] = {'leaves_per_s': round(stats.get('checkedLeaves', 0) / elapsed, 2)}
+        result['cleanup'] = stats
+        result['deploys'] = worker.deploys
+
+    routes = {f"site {route}": summary for route, summary in site.stats.summary().items()}
+    routes.update({f"worker {route}": summary for route, summary in worker.stats.summary().items()})
+    return {
+        'exit_code': exit_code,
+        'elapsed_s': round(elapsed, 3),
+        **result,
+        'latency': routes,
+        'injected_errors': (site.faults.injected - site_errors) + (worker.faults.injected - worker_errors),
+        'peak_rss_mb': peak_rss,
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Print throughput and peak RSS of this report against a baseline report."""
+    print(f"vs {baseline.get('git', {}).get('commit')} ({baseline.get('date')})", file=sys.stderr)
+    for name, result in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        for metric, value in result['throughput'].items():
+            old = before.get('throughput', {}).get(metric)
+            if old:
+                print(f"  {name:<9}{metric:<20}{old:>10.2f} -> {value:>10.2f} ({value / old - 1:+.0%})", file=sys.stderr)
+        old_rss = before.get('peak_rss_mb')
+        if old_rss:
+            rss = result['peak_rss_mb']
+            print(f"  {name:<9}{'peak_rss_mb':<20}{old_rss:>10.1f} -> {rss:>10.1f} ({rss / old_rss - 1:+.0%})", file=sys.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the scraper tools against a fake listing site and worker')
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--zips', type=int, default=24, help='ZIPs on the fake listing site')
+    parser.add_argument('--pdfs', type=int, default=8, help='LRO PDFs per ZIP')
+    parser.add_argument('--pdf-kb', type=int, default=256, help='KB per PDF in the ZIPs')
+    parser.add_argument('--upload-files', type=int, default=400, help='PDFs for the upload scenario')
+    parser.add_argument('--upload-kb', type=int, default=64, help='KB per PDF for the upload scenario')
+    parser.add_argument('--stale', type=int, default=200, help='Dead index leaves the cleanup scenario prunes')
+    parser.add_argument('--jobs', type=int, default=4, help='--jobs of every command')
+    parser.add_argument('--scrape-args', default='', help='Extra main.py arguments, e.g. --scrape-args="--stream --jobs 8"')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay before every stand-in answer')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra delay, up to this much')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 503')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument('--output', type=Path, help='Write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', type=Path, help='Earlier JSON report to compare against')
+    parser.add_argument('--keep', action='store_true', help='Keep the working directory and the command logs')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    work = Path(tempfile.mkdtemp(prefix='cuza-bench-')).resolve()
+    site = FakeListingSite(
+        work / 'site', [args.year], args.zips, args.pdfs, args.pdf_kb,
+        Faults(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed), args.seed,
+    ).start()
+    worker = WorkerEmulator(
+        work / 'worker', PASSWORD, Faults(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed + 1),
+    ).start()
+
+    report: dict[str, Any] = {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'config': {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        'scenarios': {},
+    }
+    try:
+        for name in scenarios:
+            print(f"{name} ...", file=sys.stderr)
+            report['scenarios'][name] = run_scenario(name, args, work, site, worker)
+    finally:
+        site.stop()
+        worker.stop()
+        if args.keep:
+            print(f"Working directory kept: {work}", file=sys.stderr)
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text(encoding='utf-8')))
+    return 0 if all(result['exit_code'] == 0 for result in report['scenarios'].values()) else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""What a build pays for its API data: live preview server vs a --export snapshot.
+
+Builds a synthetic files tree (--subjects subjects, --pages pages each, with
+--years years of --files PDFs per session) and fetches what `pnpm build`
+does, /structure and then /files for every subject and page, plus /index:
+
+  live    start the server (tree scan) and fetch every route; each /files
+          answer is computed and encoded on its first request
+  export  local_preview_api.export_static once, then a --static server that
+          sends the written files
+
+The scan is timed with 1 and with --jobs threads. The tree is in the page
+cache here; on a cold cache or a network mount the parallel scan gains more.
+
+Usage:
+  python3 benchmarks/preview_export_bench.py [--subjects 12] [--pages 6] [--years 25] [--files 8] [--jobs 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+import local_preview_api  # noqa: E402
+
+
+def make_tree(root: Path, subjects: int, pages: int, years: int, files: int) -> int:
+    count = 0
+    for subject in range(subjects):
+        for page in range(pages):
+            for year in range(2000, 2000 + years):
+                for session in ('iunie', 'august', 'simulare'):
+                    directory = root / f"subject{subject}/pages/page{page}/{year}/Sesiunea_{session}"
+                    directory.mkdir(parents=True)
+                    for index in range(files):
+                        (directory / f"E_{index}_{year}.pdf").touch()
+                        count += 1
+        (root / f"subject{subject}/extra").mkdir()
+        (root / f"subject{subject}/extra/Formule.pdf").touch()
+    return count
+
+
+def fetch_build_routes(port: int) -> tuple[int, int]:
+    """Fetch /structure, every /files and /index on one keep-alive connection; (requests, bytes)."""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+
+    def get(path: str) -> bytes:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{path}: {response.status}")
+        return body
+
+    body = get('/structure')
+    requests, received = 1, len(body)
+    for subject, pages in json.loads(body).items():
+        for page in pages:
+            received += len(get(f"/files?subject={quote(subject)}&page={quote(page)}"))
+            requests += 1
+    received += len(get('/index'))
+    connection.close()
+    return requests + 1, received
+
+
+async def stop_server(server: asyncio.AbstractServer) -> None:
+    """Close the server and let its connection tasks see their clients go."""
+    server.close()
+    await server.wait_closed()
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    if tasks:
+        await asyncio.wait(tasks, timeout=1)
+
+
+def serve_and_fetch(jobs: int) -> tuple[int, int]:
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(local_preview_api.start_keepalive_server('127.0.0.1', 0, jobs))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    try:
+        return fetch_build_routes(server.sockets[0].getsockname()[1])
+    finally:
+        asyncio.run_coroutine_threadsafe(stop_server(server), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark --export against the live preview server')
+    parser.add_argument('--subjects', type=int, default=12)
+    parser.add_argument('--pages', type=int, default=6)
+    parser.add_argument('--years', type=int, default=25)
+    parser.add_argument('--files', type=int, default=8, help='PDFs per session directory')
+    parser.add_argument('--jobs', type=int, default=local_preview_api.SCAN_JOBS, help='Scan and export threads')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve() / 'files'
+        out_dir = Path(temp_dir).resolve() / 'export'
+        pdfs = make_tree(root, args.subjects, args.pages, args.years, args.files)
+        local_preview_api.files_root = root
+
+        start = time.perf_counter()
+        local_preview_api.TreeIndex(root, 1)
+        scan_serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        local_preview_api.tree_index = local_preview_api.TreeIndex(root, args.jobs)
+        scan_parallel = time.perf_counter() - start
+        requests, received = serve_and_fetch(args.jobs)
+        live = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = local_preview_api.TreeIndex(root, args.jobs)
+        count, written = local_preview_api.export_static(index, out_dir, args.jobs)
+        export = time.perf_counter() - start
+
+        local_preview_api.tree_index = None
+        local_preview_api.static_root = out_dir
+        start = time.perf_counter()
+        static_requests, static_received = serve_and_fetch(args.jobs)
+        static = time.perf_counter() - start
+        if (static_requests, static_received) != (requests, received):
+            print('Static answers differ from the live ones')
+            return 1
+
+    print(f"{pdfs} PDF(s); a build fetches {requests} route(s), {received / (1024 * 1024):.1f} MB")
+    print(f"tree scan: {scan_serial * 1000:.0f} ms on 1 thread, {scan_parallel * 1000:.0f} ms on {args.jobs}")
+    print(f"live server, scan + fetch:  {live * 1000:8.0f} ms per build")
+    print(f"export:                     {export * 1000:8.0f} ms once per snapshot ({count} files, {written / (1024 * 1024):.1f} MB)")
+    print(f"static server, fetch:       {static * 1000:8.0f} ms per build")
+    print(f"saved per build:            {(live - static) * 1000:8.0f} ms ({live / static:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
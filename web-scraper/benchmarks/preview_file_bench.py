@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Peak RSS of local_preview_api's /file/ route under concurrent large downloads.
+
+Each mode runs in its own child process, which serves a temporary files
+directory of --files sparse PDFs of --size MB and downloads every one of them
+--clients times at once, discarding the bytes:
+
+  read      the handler as it was before: file_handle.read() of the whole PDF,
+            then one write
+  sendfile  PreviewRequestHandler._send_file, which hands the file to
+            socket.sendfile
+
+Usage:
+  python3 benchmarks/preview_file_bench.py [--files 4] [--size 64] [--clients 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mimetypes
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+MODES = ('read', 'sendfile')
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def child(mode: str, files_dir: str, clients: int) -> None:
+    import local_preview_api
+
+    class ReadAllHandler(local_preview_api.PreviewRequestHandler):
+        def _send_file(self, file_path: Path, head: bool = False) -> None:
+            with file_path.open('rb') as file_handle:
+                data = file_handle.read()
+            self.send_response(200)
+            self.send_header('Content-Type', mimetypes.guess_type(file_path.name)[0] or 'application/pdf')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    local_preview_api.files_root = Path(files_dir)
+    local_preview_api.tree_index = local_preview_api.TreeIndex(local_preview_api.files_root)
+    handler = ReadAllHandler if mode == 'read' else local_preview_api.PreviewRequestHandler
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/file"
+
+    def download(name: str) -> int:
+        received = 0
+        with urllib.request.urlopen(f"{url}/{name}") as response:
+            while chunk := response.read(1024 * 1024):
+                received += len(chunk)
+        return received
+
+    names = sorted(path.name for path in Path(files_dir).glob('*.pdf')) * clients
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        received = sum(executor.map(download, names))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    print(json.dumps({'baseline': baseline, 'peak': peak_rss_mb(), 'elapsed': elapsed, 'bytes': received}))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measure /file/ peak RSS with and without sendfile')
+    parser.add_argument('--files', type=int, default=4, help='PDFs in the files directory')
+    parser.add_argument('--size', type=int, default=64, help='MB per PDF')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent downloads of each PDF')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--files-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.files_dir, args.clients)
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as files_dir:
+        for index in range(args.files):
+            with (Path(files_dir) / f"E_{index}.pdf").open('wb') as f:
+                f.truncate(args.size * 1024 * 1024)
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--files-dir', files_dir, '--clients', str(args.clients)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{args.files} PDF(s) x {args.size} MB, {args.clients} concurrent download(s) of each")
+    print(f"{'mode':<10}{'peak RSS':>12}{'above baseline':>17}{'time':>9}{'MB/s':>9}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<10}{result['peak']:>9.1f} MB{result['peak'] - result['baseline']:>14.1f} MB"
+            f"{result['elapsed']:>8.2f}s{result['bytes'] / (1024 * 1024) / result['elapsed']:>9.0f}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Per-request cost of local_preview_api's tree routes: directory walk vs TreeIndex.
+
+Builds a synthetic files tree shaped like the real one (--subjects subjects,
+each with --pages pages of --years years, --sessions sessions and --files
+PDFs per session), then times the work behind /structure, /index and
+/files?subject&page:
+
+  walk   build_structure / build_subtree + extract_years + json.dumps, as the
+         server did on every request before
+  index  TreeIndex.response(): the encoded bytes cached for the tree version
+
+It then prints the size of each encoded answer and of its gzip (and, with
+the brotli package installed, br) variant, with the one-off time to compress
+it. It also reports the initial scan, one no-change refresh sweep (the stat pass
+the server runs every --rescan-interval seconds) and the refresh after adding
+one PDF.
+
+Usage:
+  python3 benchmarks/preview_index_bench.py [--subjects 8] [--pages 4] [--years 25] [--sessions 6] [--files 6]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+import local_preview_api  # noqa: E402
+
+
+def make_tree(root: Path, subjects: int, pages: int, years: int, sessions: int, files: int) -> int:
+    count = 0
+    for subject in range(subjects):
+        for page in range(pages):
+            for year in range(2000, 2000 + years):
+                for session in range(sessions):
+                    directory = root / f"subject{subject}/pages/page{page}/{year}/Sesiunea_{session}"
+                    directory.mkdir(parents=True)
+                    for index in range(files):
+                        (directory / f"E_{index}_{year}.pdf").touch()
+                        count += 1
+    return count
+
+
+def timed(call, repeat: int) -> float:
+    """Mean seconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the preview server tree index')
+    parser.add_argument('--subjects', type=int, default=8)
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--years', type=int, default=25)
+    parser.add_argument('--sessions', type=int, default=6)
+    parser.add_argument('--files', type=int, default=6, help='PDFs per session directory')
+    parser.add_argument('--repeat', type=int, default=5, help='Directory walks timed per route')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        pdfs = make_tree(root, args.subjects, args.pages, args.years, args.sessions, args.files)
+        local_preview_api.files_root = root
+
+        start = time.perf_counter()
+        index = local_preview_api.TreeIndex(root)
+        scan = time.perf_counter() - start
+        print(f"{pdfs} PDF(s) in {len(index.dirs)} directories; initial scan {scan * 1000:.0f} ms")
+
+        def walk_files() -> bytes:
+            content_path = local_preview_api.resolve_content_path('subject0', 'page0')
+            content = local_preview_api.build_subtree(root, str(content_path.relative_to(root)))
+            payload = {'content': content, 'extra': {}, 'years': local_preview_api.extract_years(content)}
+            return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+        def index_files() -> dict:
+            content = index.subtree(index.relative(local_preview_api.resolve_content_path('subject0', 'page0')))
+            return {'content': content, 'extra': {}, 'years': local_preview_api.extract_years(content)}
+
+        routes = {
+            '/structure': (
+                lambda: json.dumps(local_preview_api.build_structure()).encode('utf-8'),
+                lambda: index.response('structure', index.structure),
+            ),
+            '/index': (
+                lambda: json.dumps(local_preview_api.build_subtree(root, '.')).encode('utf-8'),
+                lambda: index.response('index', lambda: index.subtree('')),
+            ),
+            '/files': (walk_files, lambda: index.response(('files', 'subject0', 'page0'), index_files)),
+        }
+
+        print(f"{'route':<12}{'walk':>12}{'index':>12}{'speedup':>10}")
+        for route, (walk, cached) in routes.items():
+            walk_time = timed(walk, args.repeat)
+            cached()  # first request encodes, as after every tree change
+            cached_time = timed(cached, 10_000)
+            print(
+                f"{route:<12}{walk_time * 1000:>9.2f} ms{cached_time * 1_000_000:>9.2f} us"
+                f"{walk_time / cached_time:>9.0f}x"
+            )
+
+        codings = ['gzip'] + (['br'] if local_preview_api.brotli else [])
+        print(f"{'route':<12}{'identity':>12}" + ''.join(f"{coding:>12}{'compress':>11}" for coding in codings))
+        for route, (_walk, cached) in routes.items():
+            response = cached()
+            row = f"{route:<12}{len(response.body) / 1024:>9.1f} KB"
+            for coding in codings:
+                start = time.perf_counter()
+                _coding, body, _etag = response.negotiate(coding)
+                row += f"{len(body) / 1024:>9.1f} KB{(time.perf_counter() - start) * 1000:>8.1f} ms"
+            print(row)
+
+        sweep = timed(index.refresh, 3)
+        (root / 'subject0/pages/page0/2000/Sesiunea_0/E_new.pdf').touch()
+        start = time.perf_counter()
+        changed = index.refresh()
+        print(
+            f"refresh sweep, no change: {sweep * 1000:.1f} ms; "
+            f"after adding one PDF: {(time.perf_counter() - start) * 1000:.1f} ms (changed={changed})"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Request rate of local_preview_api's two server modes, as seen by a build.
+
+Serves a synthetic files tree (--subjects subjects with --pages pages each)
+and fetches /files for every subject and page, --rounds times, from --clients
+concurrent clients, each with one http.client connection like a fetch agent:
+
+  threading  ThreadingHTTPServer, HTTP/1.0: a new TCP connection and a new
+             thread for every request (--workers 0)
+  keepalive  the asyncio HTTP/1.1 server: connections are reused and requests
+             run on --workers threads
+
+Usage:
+  python3 benchmarks/preview_server_bench.py [--subjects 10] [--pages 8] [--rounds 20] [--clients 8] [--workers 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+import local_preview_api  # noqa: E402
+
+
+def make_tree(root: Path, subjects: int, pages: int) -> list[str]:
+    paths = []
+    for subject in range(subjects):
+        for page in range(pages):
+            for year in range(2015, 2025):
+                directory = root / f"subject{subject}/pages/page{page}/{year}/Sesiunea_iunie"
+                directory.mkdir(parents=True)
+                (directory / f"E_{year}.pdf").touch()
+            paths.append(f"/files?subject=subject{subject}&page=page{page}")
+    return paths
+
+
+def start_threading() -> tuple[int, Callable[[], None]]:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), local_preview_api.PreviewRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop() -> None:
+        server.shutdown()
+        server.server_close()
+
+    return server.server_port, stop
+
+
+async def stop_server(server: asyncio.AbstractServer) -> None:
+    """Close the server and let its connection tasks see their clients go."""
+    server.close()
+    await server.wait_closed()
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    if tasks:
+        await asyncio.wait(tasks, timeout=1)
+
+
+def start_keepalive(workers: int) -> tuple[int, Callable[[], None]]:
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(local_preview_api.start_keepalive_server('127.0.0.1', 0, workers))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def stop() -> None:
+        asyncio.run_coroutine_threadsafe(stop_server(server), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    return server.sockets[0].getsockname()[1], stop
+
+
+def run_clients(port: int, paths: list[str], rounds: int, clients: int) -> dict:
+    def client(offset: int) -> list[float]:
+        # http.client reconnects by itself when the server closes the connection
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        latencies = []
+        for _ in range(rounds):
+            for path in paths[offset:] + paths[:offset]:
+                start = time.perf_counter()
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"{path}: {response.status}")
+                latencies.append(time.perf_counter() - start)
+        connection.close()
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = sorted(latency for result in executor.map(client, range(clients)) for latency in result)
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'elapsed': elapsed,
+        'p50': statistics.median(latencies),
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the preview server modes')
+    parser.add_argument('--subjects', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=20, help='Passes over every /files URL per client')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent client connections')
+    parser.add_argument('--workers', type=int, default=8, help='Worker threads of the keep-alive server')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir).resolve()
+        paths = make_tree(root, args.subjects, args.pages)
+        local_preview_api.files_root = root
+        local_preview_api.tree_index = local_preview_api.TreeIndex(root)
+
+        for mode, start in (('threading', start_threading), ('keepalive', lambda: start_keepalive(args.workers))):
+            port, stop = start()
+            try:
+                results[mode] = run_clients(port, paths, args.rounds, args.clients)
+            finally:
+                stop()
+
+    print(f"{len(paths)} /files URL(s) x {args.rounds} round(s) x {args.clients} client(s)")
+    print(f"{'mode':<11}{'requests':>10}{'time':>9}{'req/s':>9}{'p50':>10}{'p99':>10}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<11}{result['requests']:>10}{result['elapsed']:>8.2f}s{result['requests'] / result['elapsed']:>9.0f}"
+            f"{result['p50'] * 1000:>7.2f} ms{result['p99'] * 1000:>7.2f} ms"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Local stand-ins for subiecte.edu.ro and the worker, for offline benchmarks.
+
+FakeListingSite writes synthetic exam ZIPs to disk and serves them under the
+listing pages main.BacExamScraper.listing_urls builds for a --site-url, with
+HEAD, ETag/Last-Modified and single Range requests like the real host.
+
+WorkerEmulator keeps objects, index.json and recent-changes.json in a
+directory through local_preview_api.UploadStore, and answers the routes the
+scraper tools call: the upload routes with bearer auth, /index, /structure,
+/files, /recent-changes, /file/, /cleanup-index and /trigger-deploy.
+
+Both wait a configurable latency (plus jitter) before every answer, fail a
+configurable share of requests with an error status, and record the service
+time of every request per route.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import random
+import threading
+import time
+import zipfile
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlparse
+
+import local_preview_api
+from local_preview_api import PreviewRequestHandler, UploadStore, extract_years
+
+# Listing pages of a year, relative to the site root (see BacExamScraper.listing_urls)
+LISTING_PATHS = (
+    'bacalaureat/modeledesubiecte/probescrise',
+    'simulare/simulare_bac_XII',
+    'bacalaureat/Subiecte_si_bareme',
+)
+# LRO member names the classifier maps to a subject; {n} keeps keys unique
+PDF_NAMES = (
+    'E_d_fizica_teoretic_vocational_{year}_var_{n:03d}_LRO.pdf',
+    'E_c_matematica_M_mate-info_{year}_var_{n:03d}_LRO.pdf',
+    'E_a_romana_real_{year}_var_{n:03d}_LRO.pdf',
+    'E_d_informatica_{year}_sp_MI_C_var_{n:03d}_LRO.pdf',
+)
+
+
+def percentiles(durations: list[float]) -> dict[str, float]:
+    ordered = sorted(durations)
+
+    def at(share: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * share))] * 1000
+
+    return {
+        'count': len(ordered),
+        'p50_ms': round(at(0.50), 3),
+        'p90_ms': round(at(0.90), 3),
+        'p99_ms': round(at(0.99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+class Faults:
+    """Latency and error injection shared by every request of a stand-in."""
+
+    def __init__(
+        self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+        error_status: int = 503, seed: int = 0,
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.injected = 0
+
+    def inject(self, handler: PreviewRequestHandler) -> bool:
+        """Sleep the configured latency; True if the request was answered with an injected error."""
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.injected += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            handler.send_response(self.error_status)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+        return fail
+
+
+class RouteStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations: dict[str, list[float]] = {}
+        self.bytes_sent = 0
+
+    def record(self, route: str, seconds: float) -> None:
+        with self.lock:
+            self.durations.setdefault(route, []).append(seconds)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.durations = {}
+            self.bytes_sent = 0
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self.lock:
+            return {route: percentiles(durations) for route, durations in sorted(self.durations.items())}
+
+
+class StandInHandler(PreviewRequestHandler):
+    """Reads the body, injects faults, times the request, then asks the stand-in to answer."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'CuzaStandIn/1.0'
+
+    @property
+    def standin(self):
+        return self.server.standin
+
+    @property
+    def store(self) -> UploadStore | None:
+        return getattr(self.standin, 'store', None)
+
+    def _dispatch(self, method: str) -> None:
+        start = time.perf_counter()
+        path = unquote(urlparse(self.path).path)
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            if not self.standin.faults.inject(self):
+                self.standin.answer(self, method, path, body)
+        finally:
+            self.standin.stats.record(self.standin.route_of(method, path), time.perf_counter() - start)
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._dispatch('GET')
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        self._dispatch('HEAD')
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._dispatch('POST')
+
+
+class StandIn:
+    def __init__(self, faults: Faults | None = None):
+        self.faults = faults or Faults()
+        self.stats = RouteStats()
+        self.server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> 'StandIn':
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def route_of(self, method: str, path: str) -> str:
+        return f"{method} {path}"
+
+    def answer(self, handler: StandInHandler, method: str, path: str, body: bytes) -> None:
+        raise NotImplementedError
+
+
+class FakeListingSite(StandIn):
+    """subiecte.edu.ro with `zips` synthetic ZIPs per year spread over the three listing pages.
+
+    Each ZIP holds `pdfs` LRO PDFs of `pdf_kb` KB (stored, random bytes) and
+    one LMA variant the scraper leaves out.
+    """
+
+    def __init__(
+        self, root: Path, years: list[int], zips: int, pdfs: int, pdf_kb: int,
+        faults: Faults | None = None, seed: int = 0,
+    ):
+        super().__init__(faults)
+        self.root = root
+        self.listings: dict[str, list[str]] = {}
+        self.bytes = 0
+        rng = random.Random(seed)
+        for year in years:
+            number = 0
+            for index in range(zips):
+                listing = f"{year}/{LISTING_PATHS[index % len(LISTING_PATHS)]}"
+                name = f"E_d_{year}_{index:03d}.zip"
+                zip_path = root / listing / name
+                zip_path.parent.mkdir(parents=True, exist_ok=True)
+                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as archive:
+                    for _ in range(pdfs):
+                        number += 1
+                        member = PDF_NAMES[number % len(PDF_NAMES)].format(year=year, n=number)
+                        archive.writestr(member, b'%PDF-1.4\n' + rng.randbytes(pdf_kb * 1024))
+                    archive.writestr(member.replace('_LRO.pdf', '_LMA.pdf'), b'%PDF-1.4\n' + rng.randbytes(1024))
+                self.listings.setdefault(listing, []).append(name)
+                self.bytes += zip_path.stat().st_size
+        self.zip_count = sum(len(names) for names in self.listings.values())
+
+    def route_of(self, method: str, path: str) -> str:
+        return f"{method} {'zip' if path.endswith('.zip') else 'listing'}"
+
+    def answer(self, handler: StandInHandler, method: str, path: str, body: bytes) -> None:
+        relative = path.strip('/')
+        # Archive hosts live under /subiecte{year}/ on the stand-in
+        if relative.startswith('subiecte'):
+            relative = relative.partition('/')[2]
+        if relative.endswith('.zip'):
+            zip_path = (self.root / relative).resolve()
+            if zip_path.is_relative_to(self.root) and zip_path.is_file():
+                handler._send_file(zip_path, head=method == 'HEAD')
+                return
+        elif relative in self.listings:
+            links = ''.join(f'<li><a href="{name}">{name}</a></li>\n' for name in self.listings[relative])
+            page = f"<html><body><ul>\n{links}</ul></body></html>\n".encode('utf-8')
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'text/html; charset=utf-8')
+            handler.send_header('Content-Length', str(len(page)))
+            handler.end_headers()
+            if method != 'HEAD':
+                handler.wfile.write(page)
+            return
+        handler.send_response(404)
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+
+
+class WorkerEmulator(StandIn):
+    """The worker's scraper routes over a directory instead of R2."""
+
+    AUTH_ROUTES = {'/upload-scraper', '/upload-scraper-batch', '/copy-scraper', '/cleanup-index', '/trigger-deploy'}
+
+    def __init__(self, root: Path, password: str, faults: Faults | None = None):
+        super().__init__(faults)
+        root.mkdir(parents=True, exist_ok=True)
+        self.root = root
+        self.password = password
+        self.store = UploadStore(root)
+        self.deploys = 0
+        self.cleanups: list[dict[str, Any]] = []
+
+    def route_of(self, method: str, path: str) -> str:
+        return f"{method} {'/file/' if path.startswith('/file/') else path}"
+
+    def authorized(self, header: str | None) -> bool:
+        """isValidBearerAuth: `Bearer base64(user:password)`, only the password is checked."""
+        scheme, _, token = (header or '').partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return False
+        try:
+            return base64.b64decode(token).decode('utf-8').split(':')[1:2] == [self.password]
+        except (binascii.Error, UnicodeDecodeError):
+            return False
+
+    def read_index(self) -> dict[str, Any]:
+        with self.store.lock:
+            if not self.store.index_file.exists():
+                return {}
+            return json.loads(self.store.index_file.read_text(encoding='utf-8'))
+
+    def objects(self) -> set[str]:
+        """Keys of the stored objects (index.json and recent-changes.json are not listed)."""
+        skip = {self.store.index_file, self.store.recent_changes_file}
+        return {path.relative_to(self.root).as_posix() for path in self.root.rglob('*') if path.is_file() and path not in skip}
+
+    def answer(self, handler: StandInHandler, method: str, path: str, body: bytes) -> None:
+        query = parse_qs(urlparse(handler.path).query)
+        if path in self.AUTH_ROUTES and not self.authorized(handler.headers.get('Authorization')):
+            handler._send_text('Unauthorized', 401)
+            return
+
+        if path == '/ping':
+            handler._send_text('Pong!')
+        elif path.startswith('/file/'):
+            file_path = self.store.resolve(path.removeprefix('/file/'))
+            if file_path is None or not file_path.is_file():
+                handler.send_response(404)
+                handler.send_header('Content-Length', '0')
+                handler.end_headers()
+            else:
+                handler._send_file(file_path, head=method == 'HEAD')
+        elif path == '/index':
+            handler._send_json(self.read_index())
+        elif path == '/structure':
+            structure = {}
+            for subject, branch in self.read_index().items():
+                if not isinstance(branch, dict):
+                    continue
+                if subject == 'admitere':
+                    structure[subject] = [key for key, value in branch.items() if isinstance(value, dict)]
+                elif isinstance(branch.get('pages'), dict):
+                    structure[subject] = list(branch['pages'])
+            handler._send_json(structure)
+        elif path == '/files':
+            subject = query.get('subject', [''])[0]
+            page = query.get('page', [''])[0]
+            if not subject or not page:
+                handler._send_json({'error': 'Missing subject or page'}, 400)
+                return
+            index = self.read_index()
+            content = self.subtree(index, self.segments(subject, page))
+            extra_page = f"{page}/extra" if subject.lower() == 'admitere' else 'extra'
+            extra = self.subtree(index, self.segments(subject, extra_page))
+            handler._send_json({'content': content, 'extra': extra, 'years': extract_years(content)})
+        elif path == '/recent-changes':
+            try:
+                limit = min(max(int(query.get('limit', ['20'])[0]), 1), local_preview_api.MAX_RECENT_CHANGES)
+            except ValueError:
+                limit = 20
+            changes = []
+            if self.store.recent_changes_file.exists():
+                changes = json.loads(self.store.recent_changes_file.read_text(encoding='utf-8'))
+            handler._send_json({'changes': changes[:limit]})
+        elif path in ('/upload-scraper', '/upload-scraper-batch', '/copy-scraper') and method == 'POST':
+            with self.store.lock:
+                self.store.requests += 1
+            if path == '/copy-scraper':
+                handler._copy_scraper(body)
+                return
+            content_type = handler.headers.get('Content-Type', '')
+            if 'multipart/form-data' not in content_type:
+                handler._send_text('Unsupported content type', 415)
+                return
+            fields = local_preview_api.parse_multipart(content_type, body)
+            if path == '/upload-scraper':
+                handler._upload_scraper(fields)
+            else:
+                handler._upload_scraper_batch(fields)
+        elif path == '/cleanup-index' and method == 'POST':
+            handler._send_json(self.cleanup_index(query.get('dryRun', [''])[0] == 'true'))
+        elif path == '/trigger-deploy' and method == 'POST':
+            self.deploys += 1
+            handler._send_json({'success': True})
+        else:
+            handler._send_text('Not Found', 404)
+
+    @staticmethod
+    def segments(subject: str, page: str) -> list[str]:
+        """resolvePathSegments of the worker."""
+        subject, page = subject.lower(), page.lower()
+        if subject == 'admitere':
+            if '/extra' in page:
+                return ['admitere', page.replace('/extra', '', 1), 'extra']
+            return ['admitere', page, 'admitere']
+        if page == 'extra':
+            return [subject, 'extra']
+        return [subject, 'pages', page]
+
+    @staticmethod
+    def subtree(index: dict[str, Any], segments: list[str]) -> dict[str, Any]:
+        node: Any = index
+        for segment in segments:
+            if not isinstance(node, dict) or segment not in node:
+                return {}
+            node = node[segment]
+        return node if isinstance(node, dict) else {}
+
+    def cleanup_index(self, dry_run: bool) -> dict[str, Any]:
+        """Drop index leaves without an object, like the worker's pruneMissingIndexLeaves."""
+        stats = {'checkedLeaves': 0, 'keptLeaves': 0, 'removedLeaves': 0, 'removedBranches': 0}
+        existing = self.objects()
+        stats.update(listedObjects=len(existing), listCalls=1)
+
+        def prune(node: Any) -> Any:
+            if isinstance(node, str):
+                stats['checkedLeaves'] += 1
+                kept = node in existing
+                stats['keptLeaves' if kept else 'removedLeaves'] += 1
+                return node if kept else None
+            cleaned = {key: value for key, value in ((key, prune(value)) for key, value in node.items()) if value is not None}
+            if not cleaned:
+                stats['removedBranches'] += 1
+                return None
+            return cleaned
+
+        with self.store.lock:
+            index = json.loads(self.store.index_file.read_text(encoding='utf-8')) if self.store.index_file.exists() else {}
+            cleaned = prune(index) or {}
+            if not dry_run:
+                self.store.index_file.write_text(json.dumps(cleaned, indent=2), encoding='utf-8')
+        self.cleanups.append(stats)
+        return {'success': True, 'dryRun': dry_run, 'stats': stats, 'subjects': list(cleaned)}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Peak RSS of uploads: requests' files= against utils.MultipartStream.
+
+A local sink server accepts POSTs and throws the bodies away. Each mode runs
+in its own child process, which uploads --files sparse files of --size MB
+with --jobs threads and reports its peak RSS (ru_maxrss) before and after the
+uploads:
+
+  files=  session.post(files=...), as the uploaders did before: requests
+          encodes the whole multipart body in memory first
+  stream  upload_local_files.send_file, which sends a MultipartStream with a
+          precomputed Content-Length, one 64 KB chunk at a time
+
+Usage:
+  python3 benchmarks/upload_memory_bench.py [--files 8] [--size 64] [--jobs 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+WEB_SCRAPER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_SCRAPER_DIR))
+
+MODES = ('files=', 'stream')
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):  # noqa: A002
+        return
+
+    def do_POST(self):  # noqa: N802
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def child(mode: str, url: str, jobs: int, paths: list[str]) -> None:
+    from upload_local_files import send_file
+    from utils import create_retry_session
+
+    session = create_retry_session(pool_maxsize=max(10, jobs))
+    baseline = peak_rss_mb()
+
+    def upload(path: Path):
+        if mode == 'stream':
+            response = send_file(session, url, 'bench', path, f"bench/{path.name}")
+        else:
+            with path.open('rb') as f:
+                response = session.post(
+                    f"{url}/upload-scraper", files={'file': (path.name, f, 'application/pdf')},
+                    data={'key': f"bench/{path.name}"}, timeout=120,
+                )
+        response.raise_for_status()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(upload, [Path(path) for path in paths]))
+    print(json.dumps({'baseline': baseline, 'peak': peak_rss_mb(), 'elapsed': time.perf_counter() - start}))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measure upload peak RSS with and without streaming multipart')
+    parser.add_argument('--files', type=int, default=8, help='Files to upload')
+    parser.add_argument('--size', type=int, default=64, help='MB per file')
+    parser.add_argument('--jobs', type=int, default=4, help='Concurrent uploads')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.url, args.jobs, args.paths)
+        return 0
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for index in range(args.files):
+            path = Path(temp_dir) / f"file_{index}.pdf"
+            with path.open('wb') as f:
+                f.truncate(args.size * 1024 * 1024)
+            paths.append(str(path))
+
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--url', url, '--jobs', str(args.jobs), *paths],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+    server.shutdown()
+
+    total_mb = args.files * args.size
+    print(f"{args.files} file(s) x {args.size} MB, {args.jobs} job(s)")
+    print(f"{'mode':<8}{'peak RSS':>12}{'above baseline':>17}{'time':>9}{'MB/s':>9}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<8}{result['peak']:>9.1f} MB{result['peak'] - result['baseline']:>14.1f} MB"
+            f"{result['elapsed']:>8.2f}s{total_mb / result['elapsed']:>9.1f}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Filename classification rules for subiecte.edu.ro ZIPs and PDFs.
+
+The rules are plain ordered tables: the first matching row wins, exactly as
+the original if-chains in BacExamScraper did. A PDF name is lowercased once
+and classified for subject and subcategory in the same call. Results are
+memoised, because the same names come back on every backfill, --plan and
+re-run.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+# ── Rules ────────────────────────────────────────────────────────────────────
+# Keywords are matched case-insensitively as substrings of the filename.
+
+# Subject folder, first match wins
+SUBJECT_RULES: tuple[tuple[str, str], ...] = (
+    # e_a_
+    ('romana', 'romana'),  # fara "pentru": real/uman | E_a_romana_real_tehn_2025_var_model.pdf
+    # e_c_
+    ('matematica', 'mate'),  # LRO: mate-info/pedagogic/st-nat/tehnologic | E_c_matematica_M_mate-info_2025_var_model_LRO.pdf
+    ('istorie', 'istorie'),  # LRO | E_c_istorie_2025_var_simulare_LRO.pdf
+    # e_d_
+    ('anat_fiz_gen_ec_um', 'anat'),  # LRO | E_d_anat_fiz_gen_ec_um_2025_var_model_LRO.pdf
+    ('bio_veg_anim', 'bio'),  # LRO | E_d_bio_veg_anim_2025_var_model_LRO.pdf
+    ('chimie', 'chimie'),  # LRO: anorganica/organica | E_d_chimie_anorganica_2025_var_model_LRO.pdf
+    ('economie', 'economie'),  # LRO | E_d_economie_2025_var_model_LRO.pdf
+    ('filosofie', 'filosofie'),  # LRO | E_d_filosofie_2025_var_model_LRO.pdf
+    ('fizica', 'fizica'),  # LRO: tehnologic/teoretic | E_d_fizica_teoretic_vocational_2025_var_model_LRO.pdf
+    ('geografie', 'geo'),  # LRO | E_d_geografie_2025_var_model_LRO.pdf
+    ('informatica', 'info'),  # LRO: MI/SN doar pt varianta are si C/Pascal | E_d_informatica_2025_sp_MI_C_var_model_LRO.pdf
+    ('logica', 'logica'),  # LRO | E_d_logica_2025_var_model_LRO.pdf
+    ('psihologie', 'psihologie'),  # LRO | E_d_psihologie_2025_var_model_LRO.pdf
+    ('sociologie', 'sociologie'),  # LRO | E_d_sociologie_2025_var_model_LRO.pdf
+)
+
+# Subcategory folder, first match wins
+SUBCATEGORY_RULES: tuple[tuple[str, str], ...] = (
+    ('real_tehn', 'real'),
+    ('uman_ped', 'uman'),
+    ('m_mate-info', 'mate-info'),
+    ('m_pedagogic', 'pedagogic'),
+    ('m_st-nat', 'st-nat'),
+    ('m_tehnologic', 'tehnologic'),
+    ('anorganica', 'anorganica'),
+    ('organica', 'organica'),
+    ('tehnologic', 'tehnologic'),
+    ('teoretic_vocational', 'teoretic'),
+    ('sp_mi_c', 'mate-info-C'),
+    ('sp_mi_p', 'mate-info-Pascal'),
+    ('sp_mi_pascal', 'mate-info-Pascal'),
+    ('sp_sn_c', 'st-nat-C'),
+    ('sp_sn_p', 'st-nat-Pascal'),
+    ('sp_sn_pascal', 'st-nat-Pascal'),
+    ('sp_mi_bar', 'mate-info-bareme'),
+    ('sp_sn_bar', 'st-nat-bareme'),
+)
+DEFAULT_SUBCATEGORY = 'bac'
+
+# Exam type of a ZIP, first match wins:
+# (listing URL keywords, any filename keyword, required filename keywords, exam type)
+# A row matches if the URL contains one of its URL keywords or the filename
+# contains one of its filename keywords, and the filename has every required keyword.
+EXAM_TYPE_RULES: tuple[tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...], str], ...] = (
+    (('simulare',), ('sim',), (), 'Simulare'),
+    (('modeledesubiecte',), ('model',), (), 'Model'),
+    ((), ('speciala',), ('rezerva',), 'Sesiune-olimpici-rezerva'),
+    ((), ('iun', 'iul'), ('rezerva',), 'Sesiunea-I-rezerva'),
+    ((), ('aug',), ('rezerva',), 'Sesiunea-II-rezerva'),
+    ((), ('speciala',), (), 'Sesiune-olimpici'),
+    ((), ('_iun', '_iul'), (), 'Sesiunea-I'),  # June session
+    ((), ('_aug',), (), 'Sesiunea-II'),  # August session
+)
+DEFAULT_EXAM_TYPE = '-'
+
+
+# ── Lookup ───────────────────────────────────────────────────────────────────
+# On filenames this short, CPython's substring search beats a combined regex
+# scan (see benchmarks/classifier_bench.py), so a lookup is one lowercase()
+# plus `in` checks until the first hit.
+
+@lru_cache(maxsize=65536)
+def _classify_lower(filename_lower: str) -> tuple[str | None, str]:
+    subject = None
+    for keyword, folder in SUBJECT_RULES:
+        if keyword in filename_lower:
+            subject = folder
+            break
+
+    subcategory = DEFAULT_SUBCATEGORY
+    for keyword, folder in SUBCATEGORY_RULES:
+        if keyword in filename_lower:
+            subcategory = folder
+            break
+    return subject, subcategory
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+
+def classify_pdf(pdf_filename: str) -> tuple[str | None, str]:
+    """Return (subject, subcategory) for a PDF filename; subject is None if unknown."""
+    return _classify_lower(pdf_filename.lower())
+
+
+def classify(pdf_filenames) -> list[tuple[str | None, str]]:
+    """classify_pdf() for a batch of filenames, in order."""
+    return [_classify_lower(pdf_filename.lower()) for pdf_filename in pdf_filenames]
+
+
+def clear_cache() -> None:
+    """Forget memoised results, e.g. after editing the rule tables at runtime."""
+    _classify_lower.cache_clear()
+
+
+def subject_for(pdf_filename: str) -> str | None:
+    return classify_pdf(pdf_filename)[0]
+
+
+def subcategory_for(pdf_filename: str) -> str:
+    return classify_pdf(pdf_filename)[1]
+
+
+def exam_type_for(url: str, zip_filename: str = "") -> str:
+    """Exam type (session folder) of a ZIP from its listing URL and filename."""
+    # Called about once per ZIP, so the table is walked as is rather than compiled
+    url_lower = url.lower()
+    filename_lower = zip_filename.lower()
+    for url_any, any_of, all_of, exam_type in EXAM_TYPE_RULES:
+        for keyword in all_of:
+            if keyword not in filename_lower:
+                break
+        else:
+            for keyword in url_any:
+                if keyword in url_lower:
+                    return exam_type
+            for keyword in any_of:
+                if keyword in filename_lower:
+                    return exam_type
+    return DEFAULT_EXAM_TYPE
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Content manifest: which stored keys hold which PDF bytes.
+
+Every PDF the scraper stores is recorded under its SHA-256 digest. Bareme PDFs
+go to both the C and Pascal keys, and many model papers are re-published
+unchanged across sessions and years, so most duplicates can be written as a
+cheap alias of a key that already holds the same bytes instead of being
+transferred again.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+from utils import load_json_file, write_json_atomic
+
+
+class ContentRef:
+    """Digest, size and ZIP CRC-32 of one PDF; digest is None until it has been read."""
+
+    __slots__ = ('digest', 'size', 'crc32')
+
+    def __init__(self, digest: str | None, size: int, crc32: int | None = None):
+        self.digest = digest
+        self.size = size
+        self.crc32 = crc32
+
+
+class ContentManifest:
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = manifest_file
+        # digest -> {'size': int, 'crc32': int | None, 'keys': [key, ...]}
+        self.entries: dict[str, dict] = load_json_file(manifest_file, {})
+        self.lock = threading.Lock()
+
+        self.aliases = 0
+        self.bytes_saved = 0
+
+        self._by_key: dict[str, str] = {}
+        self._by_crc: dict[tuple[int, int], str] = {}
+        for digest, entry in self.entries.items():
+            self._index(digest, entry)
+
+    def _index(self, digest: str, entry: dict) -> None:
+        for key in entry['keys']:
+            self._by_key[key] = digest
+        if entry.get('crc32') is not None:
+            self._by_crc[(entry['size'], entry['crc32'])] = digest
+
+    def keys_for(self, digest: str) -> list[str]:
+        with self.lock:
+            entry = self.entries.get(digest)
+            return list(entry['keys']) if entry else []
+
+    def digest_for_crc(self, size: int, crc32: int) -> str | None:
+        """Digest of stored content with this size and ZIP CRC-32, if there is one."""
+        with self.lock:
+            return self._by_crc.get((size, crc32))
+
+    def record(self, content: ContentRef, key: str) -> None:
+        """Note that `key` now holds `content`, dropping it from any older digest."""
+        if not content.digest:
+            return
+        with self.lock:
+            previous = self._by_key.get(key)
+            if previous and previous != content.digest:
+                old_keys = self.entries[previous]['keys']
+                old_keys.remove(key)
+                if not old_keys:
+                    del self.entries[previous]
+
+            entry = self.entries.setdefault(content.digest, {'size': content.size, 'crc32': None, 'keys': []})
+            if content.crc32 is not None:
+                entry['crc32'] = content.crc32
+            if key not in entry['keys']:
+                entry['keys'].append(key)
+                entry['keys'].sort()
+            self._index(content.digest, entry)
+
+    def count_saved(self, size: int) -> None:
+        with self.lock:
+            self.aliases += 1
+            self.bytes_saved += size
+
+    def save(self) -> None:
+        with self.lock:
+            write_json_atomic(self.manifest_file, self.entries)
@@ -2,10 +2,20 @@ from __future__ import annotations
 
 import argparse
 import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import requests
+
 import utils
+from metrics import Metrics
+from mirror_manifest import MirrorManifest
+
+# MAX_RECENT_CHANGES in cuza-worker/src/app.ts
+RECENT_CHANGES_LIMIT = 100
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 worker_url = os.environ.get("PUBLIC_WORKER_URL", "https://api.my-lab.ro")
@@ -21,6 +31,25 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--dry-run", action="store_true", help="List files without downloading"
     )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Concurrent downloads (default: 1)"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Only download keys that are new or changed since the last sync of --output-dir",
+    )
+    parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="With --sync, remove local files that are no longer on the worker",
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        type=Path,
+        default=os.environ.get("METRICS_DIR") or None,
+        help="Append per-stage metrics to download.jsonl and write cuza_download.prom here at the end of the run",
+    )
     return parser.parse_args()
 
 
@@ -44,6 +73,57 @@ def fetch_index(session, base_url: str) -> dict:
     return resp.json()
 
 
+def fetch_recent_changes(session, base_url: str) -> list[dict]:
+    resp = session.get(
+        f"{base_url}/recent-changes", params={"limit": RECENT_CHANGES_LIMIT}, timeout=30
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    changes = data.get("changes", []) if isinstance(data, dict) else None
+    if not isinstance(changes, list):
+        raise ValueError("no changes list")
+    # One malformed entry makes the feed useless as a cursor; sync() then diffs /index
+    for change in changes:
+        if not (
+            isinstance(change, dict)
+            and isinstance(change.get("key"), str)
+            and isinstance(change.get("uploadedAt"), str)
+        ):
+            raise ValueError(f"malformed entry {change!r}")
+    return changes
+
+
+def changes_since(changes: list[dict], cursor: str) -> tuple[set[str], bool]:
+    """Keys uploaded after `cursor`, and whether the feed reaches back that far.
+
+    `changes` come from fetch_recent_changes, which rejects malformed entries.
+    """
+    newer = {change["key"] for change in changes if change["uploadedAt"] > cursor}
+    covered = len(changes) < RECENT_CHANGES_LIMIT or min(
+        change["uploadedAt"] for change in changes
+    ) <= cursor
+    return newer, covered
+
+
+def list_leaves(session, args: argparse.Namespace) -> list[tuple[str, str]]:
+    if args.subject and args.page:
+        print(
+            f"Fetching index from {args.worker_url}/files?"
+            f"subject={args.subject}&page={args.page}"
+        )
+        leaves = fetch_files(session, args.worker_url, args.subject, args.page)
+    else:
+        print(f"Fetching full index from {args.worker_url}/index")
+        data = fetch_index(session, args.worker_url)
+        if args.subject:
+            data = {args.subject: data.get(args.subject, {})}
+        leaves = walk_leaves(data)
+
+    if args.year:
+        leaves = [e for e in leaves if e[0].startswith(args.year)]
+    return leaves
+
+
 def walk_leaves(tree: dict, prefix: tuple[str, ...] = ()) -> list[tuple[str, str]]:
     entries: list[tuple[str, str]] = []
     for key, value in tree.items():
@@ -55,61 +135,318 @@ def walk_leaves(tree: dict, prefix: tuple[str, ...] = ()) -> list[tuple[str, str
     return entries
 
 
+class AdaptiveBackoff:
+    """Pause shared by all download threads.
+
+    A 429 or 5xx answer (after the session's own retries) doubles the pause,
+    or sets it from Retry-After. Each success halves it again, so a mirror
+    runs at full speed until the worker pushes back.
+    """
+
+    def __init__(self, maximum: float = utils.RETRY_BACKOFF_MAX):
+        self.delay = 0.0
+        self.maximum = maximum
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self.lock:
+            delay = self.delay
+        if delay:
+            time.sleep(delay)
+
+    def slow_down(self, retry_after: str | None = None) -> None:
+        with self.lock:
+            self.delay = min(self.maximum, max(self.delay * 2, 0.5, utils.retry_backoff(0, retry_after=retry_after)))
+
+    def speed_up(self) -> None:
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > 0.05 else 0.0
+
+
+class Progress:
+    """Files and bytes done, with a throughput and ETA line."""
+
+    def __init__(self, total_files: int):
+        self.total_files = total_files
+        self.files_done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add_bytes(self, size: int) -> None:
+        with self.lock:
+            self.bytes += size
+
+    def file_done(self, ok: bool) -> None:
+        with self.lock:
+            self.files_done += 1
+            self.failed += int(not ok)
+
+    def line(self) -> str:
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            done, total, size = self.files_done, self.total_files, self.bytes
+        rate = size / elapsed
+        eta = (total - done) * elapsed / done if done else 0
+        return (
+            f"[{done}/{total}] {size / (1024 * 1024):.1f} MB  "
+            f"{rate / (1024 * 1024):.2f} MB/s  ETA {int(eta // 60)}m{int(eta % 60):02d}s"
+        )
+
+
 def download_file(
-    session, base_url: str, r2_key: str, dest: Path, dry_run: bool
-) -> None:
+    session, base_url: str, r2_key: str, dest: Path, dry_run: bool, progress=None
+):
     if dry_run:
         print(f"  [dry-run] {r2_key}")
-        return
+        return None
 
     dest.parent.mkdir(parents=True, exist_ok=True)
-    resp = session.get(f"{base_url}/file/{r2_key}", timeout=120, stream=True)
-    resp.raise_for_status()
-    with open(dest, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=65536):
-            f.write(chunk)
-    print(f"  {r2_key}  -> {dest}")
+    # Writes dest.part and resumes it with Range/If-Range if the connection drops
+    return utils.download_resumable(
+        session, f"{base_url}/file/{r2_key}", dest, timeout=120, chunk_size=65536, progress=progress
+    )
 
 
-def main() -> None:
-    args = parse_args()
+def download_with_backoff(
+    session, base_url: str, r2_key: str, dest: Path, backoff: AdaptiveBackoff,
+    progress: Progress, attempts: int = 5,
+):
+    """Download one key, retrying 429/5xx; returns the response headers, or None on failure."""
+    for attempt in range(1, attempts + 1):
+        backoff.wait()
+        try:
+            headers = download_file(
+                session, base_url, r2_key, dest, dry_run=False, progress=progress.add_bytes
+            )
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status in utils.RETRY_STATUS_CODES and attempt < attempts:
+                backoff.slow_down(e.response.headers.get("Retry-After"))
+                continue
+            print(f"\n  Failed {r2_key}: {e}")
+            return None
+        except (requests.RequestException, OSError) as e:
+            print(f"\n  Failed {r2_key}: {e}")
+            return None
+        backoff.speed_up()
+        return headers
+    return None
 
-    session = utils.create_retry_session()
 
-    if args.subject and args.page:
-        print(
-            f"Fetching index from {args.worker_url}/files?"
-            f"subject={args.subject}&page={args.page}"
+def report_progress(progress: Progress, stop: threading.Event) -> None:
+    # Redraw in place on a terminal; in logs, print a line every few seconds
+    interactive = sys.stdout.isatty()
+    while not stop.wait(0.5 if interactive else 5.0):
+        if interactive:
+            print(f"\r{progress.line()}\033[K", end="", flush=True)
+        else:
+            print(progress.line(), flush=True)
+
+
+def mirror(
+    session, base_url: str, leaves: list[tuple[str, str]], output_dir: Path, jobs: int,
+    on_file=None, metrics: Metrics | None = None,
+) -> Progress:
+    metrics = metrics or Metrics("download")
+    progress = Progress(len(leaves))
+    backoff = AdaptiveBackoff()
+    stop = threading.Event()
+    # One file at a time keeps the per-file lines; a pool gets the live progress line
+    reporter = threading.Thread(target=report_progress, args=(progress, stop), daemon=True)
+    if jobs > 1:
+        reporter.start()
+
+    def fetch(r2_key: str) -> None:
+        with metrics.stage("download") as stage:
+            headers = download_with_backoff(session, base_url, r2_key, output_dir / r2_key, backoff, progress)
+            if headers is not None:
+                stage.items, stage.bytes = 1, (output_dir / r2_key).stat().st_size
+            else:
+                stage.errors = 1
+        progress.file_done(headers is not None)
+        if headers is not None and on_file:
+            on_file(r2_key, headers)
+        if headers is not None and jobs == 1:
+            print(f"  {r2_key}  -> {output_dir / r2_key}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # map() submits every key up front; the executor bounds the threads
+            list(executor.map(fetch, [r2_key for _display_key, r2_key in leaves]))
+    finally:
+        stop.set()
+        if reporter.is_alive():
+            reporter.join()
+    if jobs > 1:
+        print(f"\r{progress.line()}\033[K" if sys.stdout.isatty() else progress.line())
+    return progress
+
+
+def print_summary(progress: Progress, output_dir: Path) -> None:
+    elapsed = time.monotonic() - progress.started
+    downloaded = progress.files_done - progress.failed
+    print(
+        f"\nDownloaded {downloaded} file(s), {progress.bytes / (1024 * 1024):.1f} MB "
+        f"in {elapsed:.1f}s ({progress.bytes / max(elapsed, 1e-6) / (1024 * 1024):.2f} MB/s) "
+        f"to {output_dir.resolve()}"
+    )
+    if progress.failed:
+        print(f"{progress.failed} file(s) failed; run again to retry them")
+
+
+def remove_orphan(output_dir: Path, key: str) -> None:
+    path = output_dir / key
+    path.unlink(missing_ok=True)
+    # Drop directories the orphan leaves empty, up to output_dir
+    for parent in path.parents:
+        if parent == output_dir or not parent.is_relative_to(output_dir):
+            break
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+
+
+def adopt_existing(session, base_url: str, manifest: MirrorManifest, keys: list[str], jobs: int) -> set[str]:
+    """Keys whose local file matches the worker's copy (see MirrorManifest.adopt); one HEAD each."""
+
+    def check(key: str) -> bool:
+        try:
+            resp = session.head(f"{base_url}/file/{key}", timeout=30)
+        except requests.RequestException:
+            return False
+        return resp.ok and manifest.adopt(key, resp.headers)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return {key for key, ok in zip(keys, executor.map(check, keys)) if ok}
+
+
+def sync(session, args: argparse.Namespace, jobs: int, metrics: Metrics) -> int:
+    """Bring --output-dir up to date; returns the number of failed downloads."""
+    output_dir = Path(args.output_dir)
+    manifest = MirrorManifest(output_dir)
+    full_mirror = not (args.subject or args.page or args.year)
+    if args.delete and not full_mirror:
+        print("Error: --delete needs a full mirror (no --subject, --page or --year).")
+        raise SystemExit(1)
+
+    try:
+        with metrics.stage("index") as stage:
+            changes = fetch_recent_changes(session, args.worker_url)
+            stage.items = len(changes)
+    except (requests.RequestException, ValueError) as e:
+        print(f"Could not read /recent-changes ({e}), diffing /index")
+        changes = None
+    if manifest.cursor and changes is not None:
+        recent, covered = changes_since(changes, manifest.cursor)
+    else:
+        recent, covered = set(), False
+
+    orphans: list[str] = []
+    if full_mirror and covered and not args.delete:
+        # Every upload since the last sync is still on the feed: no /index needed
+        print(f"Fast path: {len(recent)} change(s) on /recent-changes since {manifest.cursor}")
+        wanted = sorted(recent)
+    else:
+        if full_mirror and manifest.cursor and not covered and changes is not None:
+            print(f"/recent-changes does not reach back to {manifest.cursor}, diffing /index")
+        with metrics.stage("index") as stage:
+            remote = {r2_key for _display_key, r2_key in list_leaves(session, args)}
+            stage.items = len(remote)
+        wanted = []
+        candidates = []
+        for key in sorted(remote):
+            if key not in recent and manifest.is_current(key):
+                continue
+            # A file already on disk from an earlier plain download may not need fetching
+            if key not in recent and key not in manifest.files and (output_dir / key).is_file():
+                candidates.append(key)
+                continue
+            wanted.append(key)
+        if candidates:
+            with metrics.stage("adopt") as stage:
+                adopted = adopt_existing(session, args.worker_url, manifest, candidates, jobs)
+                stage.items = len(adopted)
+            wanted = sorted(wanted + [key for key in candidates if key not in adopted])
+            if adopted:
+                print(f"Adopted {len(adopted)} existing local file(s) into {manifest.manifest_file.name}")
+        if full_mirror:
+            orphans = sorted(set(manifest.files) - remote)
+
+    print(f"Sync: {len(wanted)} file(s) to download, {len(orphans)} orphan(s)")
+    if args.dry_run:
+        for key in wanted:
+            print(f"  [dry-run] {key}")
+        for key in orphans:
+            print(f"  [dry-run] orphan {key}")
+        return 0
+
+    failed = 0
+    if wanted:
+        progress = mirror(
+            session, args.worker_url, [(key, key) for key in wanted], output_dir, jobs,
+            on_file=manifest.record, metrics=metrics,
         )
-        leaves = fetch_files(session, args.worker_url, args.subject, args.page)
+        print_summary(progress, output_dir)
+        failed = progress.failed
     else:
-        print(f"Fetching full index from {args.worker_url}/index")
-        data = fetch_index(session, args.worker_url)
-        if args.subject:
-            data = {args.subject: data.get(args.subject, {})}
-        leaves = walk_leaves(data)
+        print("Mirror is up to date")
+
+    if orphans and args.delete:
+        for key in orphans:
+            remove_orphan(output_dir, key)
+            manifest.forget(key)
+        print(f"Removed {len(orphans)} orphan(s)")
+    elif orphans:
+        print(f"{len(orphans)} local file(s) are no longer on the worker; pass --delete to remove them")
+
+    # Keep the old cursor after failures, so the fast path offers those keys again
+    if not failed:
+        manifest.cursor = max((change["uploadedAt"] for change in changes or []), default=manifest.cursor)
+    manifest.last_sync = utils.utc_now()
+    manifest.save()
+    return failed
 
+
+def download(session, args: argparse.Namespace, jobs: int, metrics: Metrics) -> int:
+    """Download every listed key to --output-dir; returns the number of failed downloads."""
+    with metrics.stage("index") as stage:
+        leaves = list_leaves(session, args)
+        stage.items = len(leaves)
     if not leaves:
         print("No files found.")
-        return
-
-    if args.year:
-        leaves = [e for e in leaves if e[0].startswith(args.year)]
+        return 0
 
     print(f"Found {len(leaves)} file(s):")
     for display_key, r2_key in leaves:
         print(f"  {r2_key}")
 
     if args.dry_run:
-        return
+        return 0
 
     output_dir = Path(args.output_dir)
-    for _display_key, r2_key in leaves:
-        dest = output_dir / r2_key
-        download_file(session, args.worker_url, r2_key, dest, dry_run=False)
-        time.sleep(0.1)
+    progress = mirror(session, args.worker_url, leaves, output_dir, jobs, metrics=metrics)
+    print_summary(progress, output_dir)
+    return progress.failed
+
+
+def main() -> None:
+    args = parse_args()
+    jobs = max(1, args.jobs)
+
+    metrics = Metrics("download")
+    session = utils.create_retry_session(pool_maxsize=max(10, jobs), metrics=metrics)
 
-    print(f"\nDownloaded {len(leaves)} file(s) to {output_dir.resolve()}")
+    failed = None
+    try:
+        failed = sync(session, args, jobs, metrics) if args.sync else download(session, args, jobs, metrics)
+    finally:
+        if args.metrics_dir:
+            metrics.write(args.metrics_dir, success=failed == 0, failed=failed, sync=args.sync)
+    # Non-zero so cron and CI notice a mirror that is missing files
+    raise SystemExit(1 if failed else 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Incremental ZIP link extractor for the subiecte.edu.ro listing pages.
+
+The three historical link patterns share the same shape: an href="..." value
+that ends in .zip and contains the exam code and the year. LinkExtractor
+matches every href value ending in .zip with one regular expression. It then
+checks the value against the three patterns combined, so the page is scanned
+once. Chunks can be fed as they arrive from the network. Each link is
+returned the first time it is complete, so downloads can start before the
+page has finished loading.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from urllib.parse import urljoin
+
+HREF_ZIP_PATTERN = re.compile(r'href="([^"]*\.zip)"', re.IGNORECASE)
+HREF_START_PATTERN = re.compile(r'href="', re.IGNORECASE)
+HREF_PREFIX_LENGTH = len('href="')
+
+
+def zip_link_filter(year: str) -> re.Pattern:
+    """The three legacy extract_links patterns, applied to a single href value."""
+    return re.compile(
+        rf'(?:.*E_?[acd]_.*{year}.*|.*Bac_{year}_E_?[acd]_.*|.*{year}.*E_?[acd].*)\.zip',
+        re.IGNORECASE | re.DOTALL,
+    )
+
+
+class LinkExtractor:
+    def __init__(self, year: str, base_url: str, encoding: str | None = None):
+        self.base_url = base_url
+        self.links: list[str] = []
+        self._seen: set[str] = set()
+        self._filter = zip_link_filter(year)
+        self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self._buffer = ''
+
+    def feed(self, chunk: bytes) -> list[str]:
+        """Decode and scan the next chunk of the page; returns the links it completed."""
+        return self.feed_text(self._decoder.decode(chunk))
+
+    def feed_text(self, text: str) -> list[str]:
+        buffer = self._buffer + text
+        new_links = []
+        scanned_to = 0
+        for match in HREF_ZIP_PATTERN.finditer(buffer):
+            scanned_to = match.end()
+            link = self._accept(match.group(1))
+            if link:
+                new_links.append(link)
+
+        # Only the last href=" can still turn into a match: it is the only one
+        # not yet followed by a closing quote. Otherwise keep just enough text
+        # to complete an href=" split across chunks.
+        start = -1
+        for href in HREF_START_PATTERN.finditer(buffer, scanned_to):
+            start = href.start()
+        if start != -1 and '"' not in buffer[start + HREF_PREFIX_LENGTH:]:
+            self._buffer = buffer[start:]
+        else:
+            self._buffer = buffer[max(scanned_to, len(buffer) - HREF_PREFIX_LENGTH + 1):]
+        return new_links
+
+    def close(self) -> list[str]:
+        """Flush the decoder at the end of the page."""
+        return self.feed_text(self._decoder.decode(b'', final=True))
+
+    def _accept(self, href: str) -> str | None:
+        if not self._filter.fullmatch(href):
+            return None
+        link = href if href.startswith('http') else urljoin(self.base_url, href)
+        if link in self._seen:
+            return None
+        self._seen.add(link)
+        self.links.append(link)
+        return link
+
+
+def extract_zip_links(html_content: str, year: str, base_url: str) -> list[str]:
+    """Extract every ZIP link of a whole page, in page order."""
+    extractor = LinkExtractor(year, base_url)
+    extractor.feed_text(html_content)
+    return extractor.links
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Persistent conditional-GET cache for the subiecte.edu.ro listing pages.
+
+For every listing URL the cache keeps the ETag / Last-Modified validators, the
+last body and the ZIP links extracted from it. A 304 answer lets the scraper
+reuse those links without downloading or parsing the page again. It also
+remembers hosts whose HTTPS endpoint is broken, so later requests go straight
+to plain HTTP instead of paying for a failed TLS attempt every time.
+
+The pipeline's listing and download threads share one cache, so its state is
+only touched under a lock.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from utils import load_json_file, write_json_atomic
+
+# Re-probe HTTPS for a downgraded host after this many seconds
+HTTP_ONLY_TTL = 30 * 24 * 3600
+
+
+class ListingCache:
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.index_file = cache_dir / 'listings.json'
+        self.bodies_dir = cache_dir / 'listings'
+
+        data = load_json_file(self.index_file, {})
+        self.entries: dict[str, dict] = data.get('entries', {})
+        self.http_only_hosts: dict[str, float] = data.get('http_only_hosts', {})
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _body_path(self, url: str) -> Path:
+        return self.bodies_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html"
+
+    def effective_url(self, url: str) -> str:
+        """Rewrite https:// to http:// for hosts known to work only over plain HTTP."""
+        parsed = urlparse(url)
+        if parsed.scheme != 'https':
+            return url
+        with self._lock:
+            marked_at = self.http_only_hosts.get(parsed.netloc)
+        if marked_at is None or time.time() - marked_at > HTTP_ONLY_TTL:
+            return url
+        return url.replace('https://', 'http://', 1)
+
+    def mark_http_only(self, url: str) -> None:
+        with self._lock:
+            self.http_only_hosts[urlparse(url).netloc] = time.time()
+
+    def hit(self) -> None:
+        """Count a 304 answered from the cache."""
+        with self._lock:
+            self.hits += 1
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Validators for a conditional GET, only sent when a cached body exists."""
+        with self._lock:
+            entry = self.entries.get(url)
+        if not entry or not self._body_path(url).exists():
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, response, body: bytes | None = None, encoding: str | None = None) -> None:
+        """Record the validators and body of a fresh 200 response.
+
+        Pass `body` when the response was streamed and its content already
+        consumed, and `encoding` for responses without requests' `.encoding`
+        (aiohttp).
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            with self._lock:
+                self.misses += 1
+                self.entries.pop(url, None)
+            return
+
+        body_path = self._body_path(url)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        body_path.write_bytes(response.content if body is None else body)
+        with self._lock:
+            self.misses += 1
+            self.entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'encoding': encoding or response.encoding,
+                'fetched_at': time.time(),
+                'links': None,
+            }
+
+    def body(self, url: str) -> str:
+        with self._lock:
+            entry = self.entries.get(url, {})
+        return self._body_path(url).read_bytes().decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+    def links(self, url: str) -> list[str] | None:
+        with self._lock:
+            entry = self.entries.get(url)
+            return entry.get('links') if entry else None
+
+    def set_links(self, url: str, links: list[str]) -> None:
+        links = sorted(links)
+        with self._lock:
+            if url in self.entries:
+                self.entries[url]['links'] = links
+
+    def save(self) -> None:
+        with self._lock:
+            write_json_atomic(self.index_file, {
+                'entries': self.entries,
+                'http_only_hosts': self.http_only_hosts,
+            })
@@ -3,18 +3,63 @@
 
 This serves the same JSON shape as the production worker for the routes that
 Astro uses during build and for the file links used in the rendered pages.
+
+The directory tree is scanned once at startup into a TreeIndex. A background
+sweep stats every known directory and rescans only those whose mtime changed
+(adding or removing an entry changes its directory's mtime). JSON answers are
+encoded once per tree version and served with a strong ETag, and
+If-None-Match gets a 304, so an Astro build's many identical requests cost a
+dictionary lookup instead of a directory walk. gzip and, with the brotli
+package installed, br variants are compressed on first use and kept beside
+the plain bytes until the tree changes; Accept-Encoding picks one.
+
+/file/ streams from disk with sendfile, answers a single Range (honouring
+If-Range) with 206, and answers If-None-Match / If-Modified-Since with 304.
+HEAD /file/ also sends X-Content-SHA256, like the worker, for
+upload_local_files.py --delta.
+
+By default the server speaks HTTP/1.1 with keep-alive on an asyncio loop:
+connections cost nothing while idle, and each request runs the same
+PreviewRequestHandler on a fixed pool of --workers threads. --workers 0 falls
+back to ThreadingHTTPServer, HTTP/1.0 with one thread per connection.
+
+With --accept-uploads it also stands in for the worker's scraper upload
+routes (/upload-scraper, /upload-scraper-batch, /copy-scraper). Files are
+written under --files-dir, and index.json and recent-changes.json are read,
+changed and rewritten there the way the worker does it in R2, so upload
+protocols can be compared offline (see benchmarks/batch_upload_bench.py).
+There is no authentication: bind it to localhost only.
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import gzip
+import hashlib
+import io
 import json
 import mimetypes
+import os
+import posixpath
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from email.utils import formatdate, parsedate_to_datetime
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Any
 from urllib.parse import parse_qs, unquote, urlparse
 
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
+
 
 def is_pdf(path: Path) -> bool:
     return path.is_file() and path.suffix.lower() == ".pdf"
@@ -112,9 +157,483 @@ def build_structure() -> dict[str, list[str]]:
     return structure
 
 
+MAX_RECENT_CHANGES = 100
+# Seconds an idle keep-alive connection stays open
+KEEPALIVE_TIMEOUT = 15
+MAX_HEADER_BYTES = 64 * 1024
+# Threads of the initial tree scan and of --export
+SCAN_JOBS = 8
+# JSON bodies below this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+# Distinct /files queries kept encoded; past that the cache starts over
+MAX_CACHED_RESPONSES = 4096
+
+
+class DirNode:
+    __slots__ = ("mtime_ns", "entries")
+
+    def __init__(self, mtime_ns: int, entries: list[tuple[str, bool]]):
+        self.mtime_ns = mtime_ns
+        # (name, is_dir) of subdirectories and PDFs, sorted by name
+        self.entries = entries
+
+
+def accepts_encoding(accept_encoding: str | None, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows `coding` (q > 0, directly or through *)."""
+    qualities: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        quality = params.strip().lower().removeprefix("q=") if params else "1"
+        try:
+            qualities[name.strip().lower()] = float(quality)
+        except ValueError:
+            continue
+    return qualities.get(coding, qualities.get("*", 0)) > 0
+
+
+class CachedResponse:
+    """Encoded JSON of one route, with compressed variants made on first use."""
+
+    __slots__ = ("body", "etag", "variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        # coding -> (body, etag); every representation needs its own strong ETag
+        self.variants: dict[str, tuple[bytes, str]] = {}
+
+    def negotiate(self, accept_encoding: str | None) -> tuple[str | None, bytes, str]:
+        """(content coding or None, body, ETag) of the smallest variant the client accepts."""
+        if len(self.body) >= MIN_COMPRESS_BYTES and accept_encoding:
+            for coding in ("br", "gzip"):
+                if coding == "br" and brotli is None:
+                    continue
+                if accepts_encoding(accept_encoding, coding):
+                    variant = self.variants.get(coding)
+                    if variant is None:
+                        # Concurrent first requests may both compress; either result is kept
+                        if coding == "br":
+                            compressed = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                        else:
+                            compressed = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                        variant = self.variants.setdefault(coding, (compressed, f'{self.etag[:-1]}-{coding}"'))
+                    return coding, *variant
+        return None, self.body, self.etag
+
+
+class TreeIndex:
+    """In-memory copy of the files tree, kept current from directory mtimes."""
+
+    def __init__(self, root: Path, jobs: int = SCAN_JOBS):
+        self.root = root
+        self.dirs: dict[str, DirNode] = {}
+        self.responses: dict[Any, CachedResponse] = {}
+        self.version = 0
+        self.lock = threading.Lock()
+        with self.lock:
+            self._scan_tree(jobs)
+
+    @staticmethod
+    def _join(rel: str, name: str) -> str:
+        return f"{rel}/{name}" if rel else name
+
+    def _read(self, rel: str) -> DirNode:
+        path = self.root / rel if rel else self.root
+        # mtime first: a change during the listing is caught by the next sweep
+        mtime_ns = path.stat().st_mtime_ns
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    entries.append((entry.name, True))
+                elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                    entries.append((entry.name, False))
+        entries.sort()
+        return DirNode(mtime_ns, entries)
+
+    def _scan_tree(self, jobs: int) -> None:
+        """Initial scan, one directory level at a time on `jobs` threads (scandir releases the GIL)."""
+
+        def read(rel: str) -> DirNode | None:
+            try:
+                return self._read(rel)
+            except (FileNotFoundError, NotADirectoryError):
+                return None  # removed while scanning
+
+        self.dirs[""] = self._read("")
+        level = [""]
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            while level:
+                children = [
+                    self._join(rel, name) for rel in level for name, is_dir in self.dirs[rel].entries if is_dir
+                ]
+                level = []
+                for rel, node in zip(children, executor.map(read, children)):
+                    if node is not None:
+                        self.dirs[rel] = node
+                        level.append(rel)
+
+    def _scan(self, rel: str) -> None:
+        node = self._read(rel)
+        old = self.dirs.get(rel)
+        old_subdirs = {name for name, is_dir in old.entries if is_dir} if old else set()
+        subdirs = {name for name, is_dir in node.entries if is_dir}
+        self.dirs[rel] = node
+        for name in old_subdirs - subdirs:
+            self._drop(self._join(rel, name))
+        # Known subdirectories are checked against their own mtime
+        for name in sorted(subdirs - old_subdirs):
+            self._scan(self._join(rel, name))
+
+    def _drop(self, rel: str) -> None:
+        prefix = rel + "/"
+        for key in [key for key in self.dirs if key == rel or key.startswith(prefix)]:
+            del self.dirs[key]
+
+    def refresh(self) -> bool:
+        """Rescan the directories whose mtime changed; True if the tree changed."""
+        with self.lock:
+            known = [(rel, node.mtime_ns) for rel, node in self.dirs.items()]
+        # The stat pass runs unlocked, so requests are not held up by it
+        stale = []
+        for rel, mtime_ns in known:
+            try:
+                if os.stat(os.path.join(self.root, rel)).st_mtime_ns != mtime_ns:
+                    stale.append(rel)
+            except OSError:
+                stale.append(rel)
+        if not stale:
+            return False
+
+        with self.lock:
+            changed = False
+            for rel in sorted(stale):
+                if rel not in self.dirs:
+                    continue  # dropped with a parent earlier in this sweep
+                try:
+                    self._scan(rel)
+                except (FileNotFoundError, NotADirectoryError):
+                    self._drop(rel)
+                changed = True
+            if changed:
+                self.version += 1
+                self.responses.clear()
+            return changed
+
+    def invalidate(self, key: str) -> None:
+        """Rescan the directory a file was just written to, without waiting for the sweep."""
+        rel = posixpath.dirname(key)
+        with self.lock:
+            # New directories are picked up by rescanning their closest known ancestor
+            while rel and rel not in self.dirs:
+                rel = posixpath.dirname(rel)
+            self._scan(rel)
+            self.version += 1
+            self.responses.clear()
+
+    def watch(self, interval: float) -> None:
+        """Refresh from a daemon thread every `interval` seconds."""
+
+        def loop() -> None:
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except OSError as error:
+                    print(f"Tree refresh failed: {error}")
+
+        threading.Thread(target=loop, name="tree-index", daemon=True).start()
+
+    def subtree(self, rel: str) -> dict[str, Any]:
+        """Same shape as build_subtree(root, rel), from the index."""
+        node = self.dirs.get(rel)
+        if node is None:
+            return {}
+        subtree: dict[str, Any] = {}
+        for name, is_dir in node.entries:
+            child_rel = self._join(rel, name)
+            if is_dir:
+                child = self.subtree(child_rel)
+                if child:
+                    subtree[name] = child
+            else:
+                subtree[name] = child_rel
+        return subtree
+
+    def structure(self) -> dict[str, list[str]]:
+        """Same shape as build_structure(), from the index."""
+
+        def subdirs(rel: str) -> list[str]:
+            node = self.dirs.get(rel)
+            return [name for name, is_dir in node.entries if is_dir] if node else []
+
+        structure: dict[str, list[str]] = {}
+        for subject in subdirs(""):
+            if subject == "temp":
+                continue
+            pages = subdirs(subject if subject == "admitere" else f"{subject}/pages")
+            if pages:
+                structure[subject] = pages
+        return structure
+
+    def relative(self, path: Path) -> str | None:
+        """Index key of a path under the root, or None if it points outside."""
+        try:
+            rel = posixpath.normpath(path.relative_to(self.root).as_posix())
+        except ValueError:
+            # An absolute subject or page replaces the root when joined
+            return None
+        if rel == ".":
+            return ""
+        return None if rel == ".." or rel.startswith("../") else rel
+
+    def response(self, key: Any, build) -> CachedResponse:
+        """The encoded JSON of `build()`, cached until the tree changes."""
+        with self.lock:
+            cached = self.responses.get(key)
+            if cached is None:
+                if len(self.responses) >= MAX_CACHED_RESPONSES:
+                    self.responses.clear()
+                cached = CachedResponse(json.dumps(build(), ensure_ascii=False).encode("utf-8"))
+                self.responses[key] = cached
+            return cached
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict[str, tuple[str | None, bytes]]:
+    """Form fields of a multipart/form-data body: name -> (filename, bytes)."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    fields: dict[str, tuple[str | None, bytes]] = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return fields
+
+
+class UploadStore:
+    """Local stand-in for the worker's R2 writes, with counters for benchmarks."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.index_file = root / "index.json"
+        self.recent_changes_file = root / "recent-changes.json"
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.files_stored = 0
+        self.index_writes = 0
+        self.index_bytes_written = 0
+
+    def resolve(self, key: str) -> Path | None:
+        if not key or ".." in key or key.startswith("/"):
+            return None
+        path = (self.root / key).resolve()
+        return path if path.is_relative_to(self.root.resolve()) else None
+
+    def put(self, key: str, data: bytes, sha256: str | None = None) -> bool:
+        """Write one file; False if it already holds these bytes (the worker's idempotent path)."""
+        path = self.resolve(key)
+        if sha256 and path.is_file() and hashlib.sha256(path.read_bytes()).hexdigest() == sha256:
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        with self.lock:
+            self.files_stored += 1
+        if tree_index:
+            tree_index.invalidate(key)
+        return True
+
+    def unindexed(self, keys: list[str]) -> list[str]:
+        """The keys index.json does not list yet."""
+        if not keys:
+            return []
+        with self.lock:
+            if not self.index_file.exists():
+                return list(keys)
+            index = json.loads(self.index_file.read_text(encoding="utf-8"))
+
+        def listed(key: str) -> bool:
+            node = index
+            for segment in key.split("/"):
+                if not isinstance(node, dict):
+                    return False
+                node = node.get(segment)
+            return node == key
+
+        return [key for key in keys if not listed(key)]
+
+    def commit(self, keys: list[str]) -> None:
+        """Add keys to index.json and recent-changes.json: one read and one rewrite of each."""
+        if not keys:
+            return
+        with self.lock:
+            if self.index_file.exists():
+                index = json.loads(self.index_file.read_text(encoding="utf-8"))
+            else:
+                index = build_subtree(self.root, ".")
+            for key in keys:
+                node = index
+                segments = key.split("/")
+                for segment in segments[:-1]:
+                    if not isinstance(node.get(segment), dict):
+                        node[segment] = {}
+                    node = node[segment]
+                node[segments[-1]] = key
+
+            recent = []
+            if self.recent_changes_file.exists():
+                recent = json.loads(self.recent_changes_file.read_text(encoding="utf-8"))
+            uploaded_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+            changes = [
+                {"key": key, "filename": key.split("/")[-1], "uploadedAt": uploaded_at, "source": "scraper"}
+                for key in reversed(keys)
+            ]
+
+            index_body = json.dumps(index, indent=2).encode("utf-8")
+            recent_body = json.dumps((changes + recent)[:MAX_RECENT_CHANGES], indent=2).encode("utf-8")
+            self.index_file.write_bytes(index_body)
+            self.recent_changes_file.write_bytes(recent_body)
+            self.index_writes += 1
+            self.index_bytes_written += len(index_body) + len(recent_body)
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "filesStored": self.files_stored,
+                "indexWrites": self.index_writes,
+                "indexBytesWritten": self.index_bytes_written,
+            }
+
+
+upload_store: UploadStore | None = None
+tree_index: TreeIndex | None = None
+# Directory written by --export, served by --static instead of the tree index
+static_root: Path | None = None
+
+
+def build_files_payload(index: TreeIndex, subject: str, page: str) -> dict[str, Any]:
+    """The /files answer for one subject and page."""
+    content_rel = index.relative(resolve_content_path(subject, page))
+    extra_rel = index.relative(resolve_extra_path(subject, page))
+    content = index.subtree(content_rel) if content_rel is not None else {}
+    extra = index.subtree(extra_rel) if extra_rel is not None else {}
+    return {"content": content, "extra": extra, "years": extract_years(content)}
+
+
+def export_static(index: TreeIndex, out_dir: Path, jobs: int = SCAN_JOBS) -> tuple[int, int]:
+    """Write every response a build requests as JSON files under `out_dir`.
+
+    Layout: structure.json, index.json and files/<subject>/<page>.json for
+    every page in /structure. The bytes are those the live server sends.
+    Stale files/ answers from an earlier export are removed. Returns the
+    number of files and bytes written.
+    """
+    structure = index.structure()
+    outputs = {
+        out_dir / "structure.json": ("structure", index.structure),
+        out_dir / "index.json": ("index", lambda: index.subtree("")),
+    }
+    for subject, pages in structure.items():
+        for page in pages:
+            outputs[out_dir / "files" / subject / f"{page}.json"] = (
+                ("files", subject, page),
+                lambda subject=subject, page=page: build_files_payload(index, subject, page),
+            )
+
+    def write(item: tuple[Path, tuple[Any, Any]]) -> int:
+        path, (key, build) = item
+        body = index.response(key, build).body
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.tmp")
+        temp_path.write_bytes(body)
+        os.replace(temp_path, path)
+        return len(body)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        written = sum(executor.map(write, outputs.items()))
+    for stale in (out_dir / "files").rglob("*.json"):
+        if stale not in outputs:
+            stale.unlink()
+    return len(outputs), written
+
+
+def resolve_file_key(key: str) -> Path | None:
+    """Path of a /file/ key inside the files directory, or None for an invalid key."""
+    if not key or ".." in key or key.startswith("/"):
+        return None
+    file_path = (files_root / key).resolve()
+    return file_path if file_path.is_relative_to(files_root.resolve()) else None
+
+
+# path -> (size, mtime_ns, sha256) of files hashed for HEAD /file/
+file_digests: dict[Path, tuple[int, int, str]] = {}
+
+
+def file_sha256(path: Path, stat: os.stat_result) -> str:
+    """SHA-256 of a file, hashed again only when its size or mtime changes."""
+    cached = file_digests.get(path)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    digest = hashlib.sha256()
+    with path.open("rb") as file_handle:
+        while chunk := file_handle.read(1024 * 1024):
+            digest.update(chunk)
+    file_digests[path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """(first, last) byte of a single `bytes=` range, clamped to the file.
+
+    Returns None for headers to ignore (multiple ranges, other units, bad
+    syntax) and raises ValueError for a range that starts past the end.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first.isdigit() or last.isdigit()) or not all(p.isdigit() for p in (first, last) if p):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError(header)
+        return max(0, size - int(last)), size - 1
+    if int(first) >= size or (last and int(last) < int(first)):
+        raise ValueError(header)
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+def not_modified_since(if_modified_since: str | None, mtime: float) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
 class PreviewRequestHandler(BaseHTTPRequestHandler):
     server_version = "CuzaPreviewAPI/1.0"
 
+    @property
+    def store(self) -> UploadStore | None:
+        """Where the upload routes write; subclasses may point them at another store."""
+        return upload_store
+
     def _send_json(self, payload: Any, status: int = 200) -> None:
         body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
         self.send_response(status)
@@ -124,6 +643,28 @@ class PreviewRequestHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_cached_json(self, cached: CachedResponse) -> None:
+        coding, body, etag = cached.negotiate(self.headers.get("Accept-Encoding"))
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if coding:
+            self.send_header("Content-Encoding", coding)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
     def _send_text(self, payload: str, status: int = 200, content_type: str = "text/plain; charset=utf-8") -> None:
         body = payload.encode("utf-8")
         self.send_response(status)
@@ -139,8 +680,10 @@ class PreviewRequestHandler(BaseHTTPRequestHandler):
     def do_OPTIONS(self) -> None:  # noqa: N802
         self.send_response(204)
         self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header(
+            "Access-Control-Allow-Methods", "GET, HEAD, POST, OPTIONS" if upload_store else "GET, HEAD, OPTIONS"
+        )
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, Range, If-Range")
         self.end_headers()
 
     def do_GET(self) -> None:  # noqa: N802
@@ -151,8 +694,20 @@ class PreviewRequestHandler(BaseHTTPRequestHandler):
             self._send_text("Pong!", 200)
             return
 
+        if static_root and path in ("/structure", "/index"):
+            self._send_file(static_root / f"{path.removeprefix('/')}.json", cache_control="no-cache")
+            return
+
         if path == "/structure":
-            self._send_json(build_structure())
+            self._send_cached_json(tree_index.response("structure", tree_index.structure))
+            return
+
+        if path == "/index":
+            self._send_cached_json(tree_index.response("index", lambda: tree_index.subtree("")))
+            return
+
+        if path == "/upload-stats" and upload_store:
+            self._send_json(upload_store.stats())
             return
 
         if path == "/files":
@@ -163,44 +718,329 @@ class PreviewRequestHandler(BaseHTTPRequestHandler):
                 self._send_json({"error": "Missing subject or page"}, 400)
                 return
 
-            content_path = resolve_content_path(subject, page)
-            extra_path = resolve_extra_path(subject, page)
-            content = build_subtree(files_root, str(content_path.relative_to(files_root))) if content_path.exists() else {}
-            extra = build_subtree(files_root, str(extra_path.relative_to(files_root))) if extra_path.exists() else {}
-            self._send_json({"content": content, "extra": extra, "years": extract_years(content)})
+            if static_root:
+                exported = static_root / "files" / subject / f"{page}.json"
+                if "/" in subject + page or ".." in subject + page or not exported.is_file():
+                    self._send_json({"content": {}, "extra": {}, "years": []})
+                else:
+                    self._send_file(exported, cache_control="no-cache")
+                return
+
+            self._send_cached_json(
+                tree_index.response(("files", subject, page), lambda: build_files_payload(tree_index, subject, page))
+            )
             return
 
         if path.startswith("/file/"):
-            key = unquote(path.removeprefix("/file/"))
-            if not key or ".." in key or key.startswith("/"):
+            file_path = resolve_file_key(unquote(path.removeprefix("/file/")))
+            if file_path is None:
                 self._send_text("Invalid key", 400)
                 return
 
-            file_path = (files_root / key).resolve()
-            try:
-                file_path.relative_to(files_root.resolve())
-            except ValueError:
-                self._send_text("Invalid key", 400)
+            if not file_path.is_file():
+                self._send_text("Not Found", 404)
                 return
 
-            if not file_path.exists() or not file_path.is_file():
-                self._send_text("Not Found", 404)
+            self._send_file(file_path)
+            return
+
+        self._send_text("Not Found", 404)
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        path = urlparse(self.path).path
+        file_path = resolve_file_key(unquote(path.removeprefix("/file/"))) if path.startswith("/file/") else None
+        if file_path is None or not file_path.is_file():
+            self.send_response(400 if path.startswith("/file/") and file_path is None else 404)
+            self.send_header("Content-Length", "0")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            return
+        self._send_file(file_path, head=True)
+
+    def _send_file(
+        self, file_path: Path, head: bool = False, cache_control: str = "public, max-age=31536000, immutable"
+    ) -> None:
+        with file_path.open("rb") as file_handle:
+            stat = os.fstat(file_handle.fileno())
+            size = stat.st_size
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+            if_none_match = self.headers.get("If-None-Match")
+            if etag_matches(if_none_match, etag) or (
+                if_none_match is None and not_modified_since(self.headers.get("If-Modified-Since"), stat.st_mtime)
+            ):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
                 return
 
-            with file_path.open("rb") as file_handle:
-                data = file_handle.read()
+            status, first, last = 200, 0, size - 1
+            range_header = self.headers.get("Range")
+            if_range = self.headers.get("If-Range")
+            # If-Range needs a strong match: the exact ETag or the exact Last-Modified date
+            if range_header and (if_range is None or if_range.strip() in (etag, last_modified)):
+                try:
+                    byte_range = parse_range(range_header, size)
+                except ValueError:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.send_header("Access-Control-Allow-Origin", "*")
+                    self.end_headers()
+                    return
+                if byte_range:
+                    status, (first, last) = 206, byte_range
 
             content_type = mimetypes.guess_type(file_path.name)[0] or "application/pdf"
-            self.send_response(200)
+            self.send_response(status)
             self.send_header("Content-Type", content_type)
-            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Content-Length", str(last - first + 1))
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            if head:
+                self.send_header("X-Content-SHA256", file_sha256(file_path, stat))
             self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            self.send_header("Cache-Control", cache_control)
             self.end_headers()
-            self.wfile.write(data)
+            if head or size == 0:
+                return
+            try:
+                # Zero-copy from the page cache to the socket (plain send() where sendfile is missing)
+                self.connection.sendfile(file_handle, first, last - first + 1)
+            except (BrokenPipeError, ConnectionResetError):
+                # Viewers drop range requests they no longer need
+                self.close_connection = True
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.store is None:
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_text("Uploads are disabled; start with --accept-uploads", 405)
+            return
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.close_connection = True
+            self._send_text("Length Required", 411)
             return
+        body = self.rfile.read(int(length))
+        with self.store.lock:
+            self.store.requests += 1
 
-        self._send_text("Not Found", 404)
+        path = urlparse(self.path).path
+        if path == "/copy-scraper":
+            self._copy_scraper(body)
+            return
+
+        content_type = self.headers.get("Content-Type", "")
+        if "multipart/form-data" not in content_type:
+            self._send_text("Unsupported content type", 415)
+            return
+        fields = parse_multipart(content_type, body)
+
+        if path == "/upload-scraper":
+            self._upload_scraper(fields)
+        elif path == "/upload-scraper-batch":
+            self._upload_scraper_batch(fields)
+        else:
+            self._send_text("Not Found", 404)
+
+    def _upload_scraper(self, fields: dict[str, tuple[str | None, bytes]]) -> None:
+        key = fields.get("key", (None, b""))[1].decode("utf-8")
+        if "file" not in fields or not key:
+            self._send_text("Missing key or file", 400)
+            return
+        if self.store.resolve(key) is None:
+            self._send_text("Invalid key", 400)
+            return
+
+        data = fields["file"][1]
+        sha256 = (self.headers.get("Idempotency-Key") or "").lower() or None
+        if sha256 and hashlib.sha256(data).hexdigest() != sha256:
+            self._send_text("Idempotency-Key does not match file SHA-256", 400)
+            return
+        defer_index = fields.get("defer_index", (None, b""))[1] == b"1"
+        if not self.store.put(key, data, sha256):
+            # Same bytes, but a failed index write or an uncommitted deferred upload may have left the key out
+            if not defer_index and self.store.unindexed([key]):
+                self.store.commit([key])
+                self._send_json({"success": True, "key": key, "unchanged": True, "indexed": True})
+                return
+            self._send_json({"success": True, "key": key, "unchanged": True})
+            return
+        if defer_index:
+            self._send_json({"success": True, "key": key, "deferred": True})
+            return
+        self.store.commit([key])
+        self._send_json({"success": True, "key": key})
+
+    def _upload_scraper_batch(self, fields: dict[str, tuple[str | None, bytes]]) -> None:
+        try:
+            manifest = json.loads(fields.get("manifest", (None, b""))[1])
+        except ValueError:
+            self._send_text("Invalid manifest", 400)
+            return
+        if not isinstance(manifest, list) or not manifest:
+            self._send_text("Invalid manifest", 400)
+            return
+
+        uploads, index_only = [], []
+        for i, entry in enumerate(manifest):
+            key = entry.get("key") if isinstance(entry, dict) else None
+            if not isinstance(key, str) or self.store.resolve(key) is None:
+                self._send_text(f"Invalid key in entry {i}", 400)
+                return
+            part = fields.get(f"file{i}")
+            if part is None or part[0] is None:
+                index_only.append(key)
+                continue
+            sha256 = entry.get("sha256")
+            if sha256 and hashlib.sha256(part[1]).hexdigest() != sha256.lower():
+                self._send_text(f"sha256 does not match file {key}", 400)
+                return
+            uploads.append((key, part[1], sha256))
+
+        stored = [key for key, data, sha256 in uploads if self.store.put(key, data, sha256)]
+        unchanged = [key for key, _data, _sha256 in uploads if key not in stored]
+        missing = [key for key in index_only if not self.store.resolve(key).is_file()]
+        indexed = stored + [key for key in index_only if key not in missing] + self.store.unindexed(unchanged)
+        self.store.commit(indexed)
+        self._send_json({"success": True, "stored": stored, "unchanged": unchanged, "indexed": indexed, "missing": missing})
+
+    def _copy_scraper(self, body: bytes) -> None:
+        try:
+            request = json.loads(body)
+        except ValueError:
+            self._send_text("Invalid JSON body", 400)
+            return
+        source_path = self.store.resolve(str(request.get("source") or ""))
+        key = str(request.get("key") or "")
+        if source_path is None or self.store.resolve(key) is None:
+            self._send_text("Invalid key", 400)
+            return
+        if not source_path.is_file():
+            self._send_text("Source not found", 404)
+            return
+        self.store.put(key, source_path.read_bytes())
+        if request.get("deferIndex") is True:
+            self._send_json({"success": True, "key": key, "source": request["source"], "deferred": True})
+            return
+        self.store.commit([key])
+        self._send_json({"success": True, "key": key, "source": request["source"]})
+
+
+class DeferredSendfile:
+    """Stands in for the socket of a KeepAliveExchange.
+
+    _send_file hands its file to connection.sendfile(); the file is kept open
+    here and the event loop sends it with loop.sendfile after the headers.
+    """
+
+    def __init__(self):
+        self.file = None
+        self.offset = 0
+        self.count: int | None = None
+
+    def sendfile(self, file, offset: int = 0, count: int | None = None) -> None:
+        self.file = os.fdopen(os.dup(file.fileno()), "rb")
+        self.offset = offset
+        self.count = count
+
+
+class KeepAliveExchange(PreviewRequestHandler):
+    """One request already read off a keep-alive connection, run on a pool thread."""
+
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, request: bytes, client_address: tuple[str, int]):
+        # No socket: the handler reads the buffered request and writes into memory
+        self.client_address = client_address
+        self.server = None
+        self.connection = DeferredSendfile()
+        self.rfile = io.BytesIO(request)
+        self.wfile = io.BytesIO()
+        self.close_connection = True
+        self.handle_one_request()
+
+    def handle_expect_100(self) -> bool:
+        # serve_connection already sent "100 Continue" before reading the body
+        return True
+
+
+async def serve_connection(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, executor: ThreadPoolExecutor
+) -> None:
+    """Read requests off one connection until it closes, idles out or asks to close."""
+    loop = asyncio.get_running_loop()
+    client_address = writer.get_extra_info("peername")[:2]
+    # Set once a response's status line is written; a failure after that can only close
+    responded = False
+    try:
+        while True:
+            responded = False
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                return
+
+            length = 0
+            chunked = False
+            continue_expected = False
+            for line in head.split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                name = name.strip().lower()
+                if name == b"content-length":
+                    length = int(value) if value.strip().isdigit() else -1
+                elif name == b"transfer-encoding":
+                    chunked = True
+                elif name == b"expect" and value.strip().lower() == b"100-continue":
+                    continue_expected = True
+            if chunked:
+                # Bodies are only framed by Content-Length; reading on would parse the chunks as the next request
+                writer.write(b"HTTP/1.1 411 Length Required\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+            if length < 0:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+            if continue_expected:
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            body = await reader.readexactly(length) if length else b""
+
+            exchange = await loop.run_in_executor(executor, KeepAliveExchange, head + body, client_address)
+            responded = True
+            writer.write(exchange.wfile.getvalue())
+            deferred = exchange.connection
+            if deferred.file:
+                with deferred.file:
+                    await loop.sendfile(writer.transport, deferred.file, deferred.offset, deferred.count)
+            await writer.drain()
+            if exchange.close_connection:
+                return
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return
+    except Exception:
+        # Like socketserver's handle_error: report the traceback and drop the connection
+        print(f"Exception while serving {client_address}:")
+        traceback.print_exc()
+        if not responded:
+            writer.write(
+                b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+            )
+    finally:
+        writer.close()
+
+
+async def start_keepalive_server(host: str, port: int, workers: int) -> asyncio.AbstractServer:
+    """Listen on host:port; requests run on `workers` threads."""
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+    return await asyncio.start_server(
+        lambda reader, writer: serve_connection(reader, writer, executor), host, port, limit=MAX_HEADER_BYTES
+    )
 
 
 def main() -> int:
@@ -208,17 +1048,93 @@ def main() -> int:
     parser.add_argument("--files-dir", required=True, help="Directory containing the local scraper snapshot")
     parser.add_argument("--port", type=int, default=8788, help="Port to bind (default: 8788)")
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind (default: 127.0.0.1)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Request threads of the HTTP/1.1 keep-alive server; 0 serves HTTP/1.0 with a thread per connection (default: 8)",
+    )
+    parser.add_argument(
+        "--rescan-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between directory mtime checks of the tree index (default: 2)",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="DIR",
+        help="Write /structure, /index and every /files answer as JSON files under DIR, then exit",
+    )
+    parser.add_argument(
+        "--static",
+        metavar="DIR",
+        help="Serve /structure, /index and /files from a directory written by --export, without scanning",
+    )
+    parser.add_argument(
+        "--scan-jobs",
+        type=int,
+        default=SCAN_JOBS,
+        help=f"Threads for the initial tree scan and --export (default: {SCAN_JOBS})",
+    )
+    parser.add_argument(
+        "--accept-uploads",
+        action="store_true",
+        help="Accept the worker's scraper upload routes and write into --files-dir (no auth)",
+    )
     args = parser.parse_args()
 
-    global files_root
+    global files_root, upload_store, tree_index, static_root
     files_root = Path(args.files_dir).expanduser().resolve()
 
     if not files_root.exists():
         raise SystemExit(f"Files directory not found: {files_root}")
+    if args.static:
+        static_root = Path(args.static).expanduser().resolve()
+        if not (static_root / "structure.json").is_file():
+            raise SystemExit(f"No export found in {static_root}; write one with --export")
+        print(f"Serving tree routes from the export in {static_root}")
+    else:
+        started = time.perf_counter()
+        tree_index = TreeIndex(files_root, args.scan_jobs)
+        print(f"Indexed {len(tree_index.dirs)} directories in {time.perf_counter() - started:.2f}s")
+        if args.export:
+            out_dir = Path(args.export).expanduser().resolve()
+            if out_dir.is_relative_to(files_root):
+                # It would overwrite the snapshot's own index.json and show up in the tree
+                raise SystemExit("The export directory must be outside --files-dir")
+            count, written = export_static(tree_index, out_dir, args.scan_jobs)
+            print(
+                f"Exported {count} response(s), {written / (1024 * 1024):.1f} MB, to {out_dir} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+            return 0
+        tree_index.watch(args.rescan_interval)
+    if args.accept_uploads:
+        upload_store = UploadStore(files_root)
+
+    def announce() -> None:
+        print(f"Preview API listening on http://{args.host}:{args.port}")
+        print(f"Using local files directory: {files_root}")
+        if upload_store:
+            print("Accepting uploads into the local files directory")
+
+    if args.workers > 0:
+
+        async def serve() -> None:
+            server = await start_keepalive_server(args.host, args.port, args.workers)
+            announce()
+            print(f"HTTP/1.1 keep-alive, {args.workers} worker thread(s)")
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
 
     server = ThreadingHTTPServer((args.host, args.port), PreviewRequestHandler)
-    print(f"Preview API listening on http://{args.host}:{args.port}")
-    print(f"Using local files directory: {files_root}")
+    announce()
     try:
         server.serve_forever()
     except KeyboardInterrupt:
@@ -7,228 +7,289 @@ Downloads and uploads exam PDFs to R2 via the cuza-worker API.
 """
 
 import argparse
+import copy
 import os
-import re
+import queue
 import shutil
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import requests
 
-from utils import build_bearer_auth_header, create_retry_session, load_local_env
+from batch_upload import DeferredIndex
+import classifier
+from content_manifest import ContentManifest, ContentRef
+from link_extractor import LinkExtractor, extract_zip_links
+from listing_cache import ListingCache
+from metrics import Metrics
+from remote_zip import RemoteZipFile
+import state_store
+from state_store import StateStore
+from utils import (
+    HashingReader, HostLimiter, MultipartStream, build_bearer_auth_header, create_retry_session, download_resumable,
+    load_local_env, multipart_files,
+)
+from zip_manifest import ZipManifest
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+class _ZipJob:
+    """Book-keeping for one ZIP moving through the concurrent pipeline."""
+
+    def __init__(self, url: str, exam_type: str, zip_path: Path, year: str):
+        self.url = url
+        self.exam_type = exam_type
+        self.year = year
+        self.zip_path = zip_path
+        self.extract_dir = zip_path.parent / f"temp_{zip_path.stem}"
+        self.remote = None
+        self.pending = 0
+        self.uploaded = 0
+        self.lock = threading.Lock()
 
 
 class BacExamScraper:
-    def __init__(self, worker_url: str, upload_password: str, year: int | None = None, upload_enabled: bool = False):
+    def __init__(
+        self,
+        worker_url: str,
+        upload_password: str,
+        year: int | None = None,
+        upload_enabled: bool = False,
+        jobs: int = 1,
+        extract_jobs: int | None = None,
+        upload_jobs: int | None = None,
+        use_cache: bool = True,
+        recheck: bool = False,
+        stream: bool = False,
+        ranged: bool = False,
+        host_jobs: int | None = None,
+        site_url: str | None = None,
+        work_dir: Path | None = None,
+        metrics: Metrics | None = None,
+    ):
         self.worker_url = worker_url.rstrip('/')
+        # Replaces https://subiecte.edu.ro and its archive hosts, e.g. with a local stand-in
+        self.site_url = site_url.rstrip('/') if site_url else None
         self.upload_password = upload_password
         self.upload_enabled = upload_enabled
+        self.recheck = recheck
+        self.stream = stream
+        self.ranged = ranged
+
+        # Per-stage concurrency caps; jobs == 1 keeps the sequential run()
+        self.jobs = max(1, jobs)
+        self.extract_jobs = max(1, extract_jobs or min(self.jobs, os.cpu_count() or 1))
+        self.upload_jobs = max(1, upload_jobs or self.jobs * 2)
+        # Concurrent ZIP transfers per source host; only binds when several hosts share the pool
+        self.host_limiter = HostLimiter(host_jobs or self.jobs)
 
-        self.web_scraper_dir = Path(__file__).parent
+        # Root of files/, temp/, .cache/ and the state files
+        self.web_scraper_dir = Path(work_dir) if work_dir else Path(__file__).parent
         self.seen_urls_file = self.web_scraper_dir / "seen_urls.txt"
+        self.zip_manifest = ZipManifest(self.web_scraper_dir / "zip_manifest.json")
         self.temp_dir = self.web_scraper_dir / "temp"
         self.files_dir = self.web_scraper_dir / "files"
-        self.session = create_retry_session()
+        self.listing_cache = ListingCache(self.web_scraper_dir / ".cache") if use_cache else None
+        # R2 keys are shared across machines, local files are not
+        if upload_enabled:
+            self.content_manifest = ContentManifest(self.web_scraper_dir / "content_manifest.json")
+        else:
+            self.content_manifest = ContentManifest(self.web_scraper_dir / ".cache" / "local_content.json")
+        # Per-stage counters and HTTP latencies, written by main() with --metrics-dir
+        self.metrics = metrics or Metrics('scrape')
+        self.session = create_retry_session(pool_maxsize=max(10, self.jobs + self.upload_jobs), metrics=self.metrics)
         
         self.current_year = str(year) if year else str(datetime.now().year)
         
         # URL patterns for the current year
         self.archive_on = False
-        self.set_archive = self.current_year if self.archive_on else ""
-
-        self.urls = [
-            f"https://subiecte{self.set_archive}.edu.ro/{self.current_year}/bacalaureat/modeledesubiecte/probescrise/",
-            f"https://subiecte{self.set_archive}.edu.ro/{self.current_year}/simulare/simulare_bac_XII/",
-            f"https://subiecte{self.set_archive}.edu.ro/{self.current_year}/bacalaureat/Subiecte_si_bareme/"
-        ]
+        self.urls = self.listing_urls(self.current_year, self.archive_on, self.site_url)
         
+        # Per-ZIP and per-member status, committed as the run goes
+        self.state = StateStore(self.web_scraper_dir / ".cache" / "state.sqlite3")
+        # Uploads skip the worker's per-file index rewrite; their keys are committed in batches
+        self.deferred_index = DeferredIndex(self.session, self.worker_url, self._auth_header, self.state)
+
         # Load previously seen URLs
         self.seen_urls = self.load_seen_urls()
+        self.seen_lock = threading.Lock()
         
+    @staticmethod
+    def listing_urls(year: str, archive: bool, site_url: str | None = None) -> list[str]:
+        """Listing pages of a year, on subiecte.edu.ro or on its subiecte{year}.edu.ro archive host.
+
+        With `site_url` the main host is `site_url` and an archive host is
+        `site_url/subiecte{year}`.
+        """
+        if site_url:
+            root = f"{site_url}/subiecte{year}" if archive else site_url
+        else:
+            root = f"https://subiecte{year}.edu.ro" if archive else "https://subiecte.edu.ro"
+        return [
+            f"{root}/{year}/bacalaureat/modeledesubiecte/probescrise/",
+            f"{root}/{year}/simulare/simulare_bac_XII/",
+            f"{root}/{year}/bacalaureat/Subiecte_si_bareme/"
+        ]
+
+    def for_year(self, year: str, archive: bool) -> 'BacExamScraper':
+        """A view of this scraper for another year.
+
+        The copy shares the session, seen URLs, manifests, caches and locks, so
+        every year of a backfill feeds the same pipeline and the same state files.
+        """
+        scraper = copy.copy(self)
+        scraper.current_year = str(year)
+        scraper.archive_on = archive
+        scraper.urls = self.listing_urls(scraper.current_year, archive, self.site_url)
+        return scraper
+
+    def detect_archive(self, year: str) -> bool | None:
+        """True if `year` lives on its archive host, False for the main host, None if neither answers."""
+        for archive in (False, True):
+            url = self.listing_urls(year, archive, self.site_url)[-1]
+            request_url = self.listing_cache.effective_url(url) if self.listing_cache else url
+            candidates = [request_url]
+            if request_url.startswith('https://'):
+                candidates.append(request_url.replace('https://', 'http://', 1))
+
+            for candidate in candidates:
+                try:
+                    response = self.session.head(
+                        candidate, headers={'User-Agent': USER_AGENT}, timeout=15, allow_redirects=True
+                    )
+                except requests.RequestException:
+                    continue
+                # A redirect to another host means the listing does not live here
+                if response.ok and urlparse(response.url).hostname == urlparse(candidate).hostname:
+                    if candidate != request_url and self.listing_cache:
+                        self.listing_cache.mark_http_only(url)
+                    return archive
+        return None
+
     def load_seen_urls(self) -> set:
-        """Load previously processed URLs from file."""
-        if self.seen_urls_file.exists():
-            with open(self.seen_urls_file, 'r', encoding='utf-8') as f:
-                return set(line.strip() for line in f if line.strip())
-        return set()
-    
+        """Finished ZIP URLs from the state store, importing seen_urls.txt into a new store."""
+        imported = self.state.import_seen_urls(self.seen_urls_file)
+        if imported:
+            print(f"Imported {imported} seen URL(s) into {self.state.db_path.name}")
+        return self.state.finished_urls()
+
     def save_seen_urls(self):
-        """Save processed URLs to file."""
-        with open(self.seen_urls_file, 'w', encoding='utf-8') as f:
+        """Export finished ZIP URLs to seen_urls.txt."""
+        with self.seen_lock, open(self.seen_urls_file, 'w', encoding='utf-8') as f:
             for url in sorted(self.seen_urls):
                 f.write(url + '\n')
     
-    def fetch_page(self, url: str) -> str:
-        """Fetch webpage content."""
+    def request_page(self, url: str):
+        """Start a streamed GET for a listing page.
+
+        Returns the open response, None when the cached copy is still current,
+        or "" when the page could not be fetched.
+        """
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            'User-Agent': USER_AGENT
         }
+        request_url = url
+        if self.listing_cache:
+            headers.update(self.listing_cache.conditional_headers(url))
+            request_url = self.listing_cache.effective_url(url)
+
         try:
-            response = self.session.get(url, headers=headers, timeout=30)
+            response = self.session.get(request_url, headers=headers, timeout=30, stream=True)
             response.raise_for_status()
-            return response.text
         except requests.RequestException as e:
-            if url.startswith('https://'):
-                http_url = url.replace('https://', 'http://', 1)
-                print(f"HTTPS failed, trying HTTP: {http_url}")
-                try:
-                    response = self.session.get(http_url, headers=headers, timeout=30)
-                    response.raise_for_status()
-                    return response.text
-                except requests.RequestException as e2:
-                    print(f"Error fetching {http_url}: {e2}")
-                    return ""
-            print(f"Error fetching {url}: {e}")
-            return ""
-    
+            if not request_url.startswith('https://'):
+                print(f"Error fetching {request_url}: {e}")
+                return ""
+            http_url = request_url.replace('https://', 'http://', 1)
+            print(f"HTTPS failed, trying HTTP: {http_url}")
+            try:
+                response = self.session.get(http_url, headers=headers, timeout=30, stream=True)
+                response.raise_for_status()
+            except requests.RequestException as e2:
+                print(f"Error fetching {http_url}: {e2}")
+                return ""
+            if self.listing_cache:
+                self.listing_cache.mark_http_only(url)
+
+        if self.listing_cache and response.status_code == 304:
+            response.close()
+            self.listing_cache.hit()
+            return None
+        return response
+
+    def stream_links(self, url: str, response):
+        """Yield the ZIP links of a listing page while its body is still arriving."""
+        extractor = LinkExtractor(self.current_year, url, response.encoding)
+        body = []
+        try:
+            with response:
+                for chunk in self.metrics.timed('listing', response.iter_content(chunk_size=16 * 1024)):
+                    if self.listing_cache:
+                        body.append(chunk)
+                    yield from extractor.feed(chunk)
+                yield from extractor.close()
+        except requests.RequestException as e:
+            print(f"Error reading {url}: {e}")
+            return
+
+        if self.listing_cache:
+            self.listing_cache.store(url, response, b''.join(body))
+            self.listing_cache.set_links(url, extractor.links)
+        self.metrics.add('listing', items=len(extractor.links))
+        print(f"Found {len(extractor.links)} ZIP files")
+
     def extract_links(self, html_content: str, base_url: str) -> list:
         """Extract ZIP file links matching the exam pattern."""
-        # Multiple patterns to match different ZIP file formats:
-        # 1. Standard: E_[acd]_...2025...zip
-        # 2. Model: Bac_2025_E_[acd]_...zip  
-        # 3. Various other formats with year
-        patterns = [
-            rf'href=\"([^\"]*E_?[acd]_[^\"]*{self.current_year}[^\"]*\.zip)\"',
-            rf'href=\"([^\"]*Bac_{self.current_year}_E_?[acd]_[^\"]*\.zip)\"',
-            rf'href=\"([^\"]*{self.current_year}[^\"]*E_?[acd][^\"]*\.zip)\"',
-        ]
-        
-        all_matches = []
-        for pattern in patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE)
-            all_matches.extend(matches)
-        
-        # Convert relative URLs to absolute
-        zip_links = []
-        for match in all_matches:
-            if match.startswith('http') or match.startswith('https'):
-                zip_links.append(match)
-            else:
-                zip_links.append(urljoin(base_url, match))
-        
-        return list(set(zip_links))  # Remove duplicates
+        # One pass over the page; see link_extractor.py for the accepted formats
+        return extract_zip_links(html_content, self.current_year, base_url)
     
     def determine_exam_type(self, url: str, zip_filename: str = "") -> str:
         """Determine the exam type based on URL and filename."""
-        url_lower = url.lower()
-        filename_lower = zip_filename.lower()
-        
-        # Check url for exam type indicators first
-        if 'simulare' in url_lower or 'sim' in filename_lower:
-            return 'Simulare'
-        
-        if 'modeledesubiecte' in url_lower or 'model' in filename_lower:
-            return 'Model'
-        
-        # For regular bac URL, determine based on filename patterns
-        if 'rezerva' in filename_lower:
-            if 'speciala' in filename_lower:
-                return 'Sesiune-olimpici-rezerva'
-            if 'iun' in filename_lower or 'iul' in filename_lower:
-                return 'Sesiunea-I-rezerva'
-            if 'aug' in filename_lower:
-                return 'Sesiunea-II-rezerva'
-        if 'speciala' in filename_lower:
-            return 'Sesiune-olimpici'
-        if '_iun' in filename_lower or '_iul' in filename_lower:
-            return 'Sesiunea-I'  # June session
-        if '_aug' in filename_lower:
-            return 'Sesiunea-II'  # August session
-        
-        # Default fallback
-        return '-'
-    
+        return classifier.exam_type_for(url, zip_filename)
+
     def download_file(self, url: str, target_path: Path) -> bool:
         """Download file from URL to target path."""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = self.session.get(url, headers=headers, timeout=60, stream=True)
-            response.raise_for_status()
+        with self.metrics.stage('download') as stage:
+            try:
+                headers = {
+                    'User-Agent': USER_AGENT
+                }
+                request_url = self.listing_cache.effective_url(url) if self.listing_cache else url
+                # Dropped connections resume from target_path.part instead of byte zero
+                response_headers = download_resumable(self.session, request_url, target_path, headers, timeout=60)
 
-            with open(target_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=1024 * 1024):
-                    if chunk:
-                        f.write(chunk)
-
-            print(f"Downloaded: {target_path.name}")
-            return True
-        except requests.RequestException as e:
-            print(f"Error downloading {url}: {e}")
-            return False
+                self.zip_manifest.record(url, response_headers)
+                stage.items, stage.bytes = 1, target_path.stat().st_size
+                print(f"Downloaded: {target_path.name}")
+                return True
+            except requests.RequestException as e:
+                stage.errors = 1
+                print(f"Error downloading {url}: {e}")
+                return False
 
     # ── Subject & subcategory extraction ────────────────────────────────────────
 
     def extract_subject_from_pdf_name(self, pdf_filename: str) -> str | None:
         """Extract subject from PDF filename to determine correct folder."""
-        filename_lower = pdf_filename.lower()
-        
-        # Map keywords in filename to subject folders
-        subject_keywords = {
-            # e_a_
-            'romana': 'romana', # fara "pentru": real/uman | E_a_romana_real_tehn_2025_var_model.pdf
-            # e_c_
-            'matematica': 'mate', # LRO: mate-info/pedagogic/st-nat/tehnologic | E_c_matematica_M_mate-info_2025_var_model_LRO.pdf
-            'istorie': 'istorie', # LRO | E_c_istorie_2025_var_simulare_LRO.pdf
-            # e_d_
-            'anat_fiz_gen_ec_um': 'anat', # LRO | E_d_anat_fiz_gen_ec_um_2025_var_model_LRO.pdf
-            'bio_veg_anim': 'bio', # LRO | E_d_bio_veg_anim_2025_var_model_LRO.pdf
-            'chimie': 'chimie', # LRO: anorganica/organica | E_d_chimie_anorganica_2025_var_model_LRO.pdf
-            'economie': 'economie', # LRO | E_d_economie_2025_var_model_LRO.pdf
-            'filosofie': 'filosofie', # LRO | E_d_filosofie_2025_var_model_LRO.pdf
-            'fizica': 'fizica', # LRO: tehnologic/teoretic | E_d_fizica_teoretic_vocational_2025_var_model_LRO.pdf
-            'geografie': 'geo', # LRO | E_d_geografie_2025_var_model_LRO.pdf
-            'informatica': 'info', # LRO: MI/SN doar pt varianta are si C/Pascal | E_d_informatica_2025_sp_MI_C_var_model_LRO.pdf
-            'logica': 'logica', # LRO | E_d_logica_2025_var_model_LRO.pdf
-            'psihologie': 'psihologie', # LRO | E_d_psihologie_2025_var_model_LRO.pdf
-            'sociologie': 'sociologie', # LRO | E_d_sociologie_2025_var_model_LRO.pdf
-        }
-        
-        # Check for exact matches first, then partial matches
-        for keyword, folder in subject_keywords.items():
-            if keyword in filename_lower:
-                return folder
-        
-        return None
+        return classifier.subject_for(pdf_filename)
 
     def extract_subcategory_from_pdf_name(self, pdf_filename: str) -> str:
         """Extract subcategory from PDF filename."""
-        filename_lower = pdf_filename.lower()
-        
-        # Define subcategory keywords
-        subcategory_keywords = {
-            'real_tehn': 'real',
-            'uman_ped': 'uman',
-            'm_mate-info': 'mate-info',
-            'm_pedagogic': 'pedagogic',
-            'm_st-nat': 'st-nat',
-            'm_tehnologic': 'tehnologic',
-            'anorganica': 'anorganica',
-            'organica': 'organica',
-            'tehnologic': 'tehnologic',
-            'teoretic_vocational': 'teoretic',
-            'sp_mi_c': 'mate-info-C',
-            'sp_mi_p': 'mate-info-Pascal',
-            'sp_mi_pascal': 'mate-info-Pascal',
-            'sp_sn_c': 'st-nat-C',
-            'sp_sn_p': 'st-nat-Pascal',
-            'sp_sn_pascal': 'st-nat-Pascal',
-            'sp_mi_bar': 'mate-info-bareme',
-            'sp_sn_bar': 'st-nat-bareme',
-        }
-        
-        for keyword, folder in subcategory_keywords.items():
-            if keyword in filename_lower:
-                return folder
-        
-        return 'bac'
+        return classifier.subcategory_for(pdf_filename)
 
     # ── R2 upload ───────────────────────────────────────────────────────────────
 
     def build_r2_key(self, pdf_filename: str, exam_type: str, year: str) -> tuple[str | None, str | None]:
         """Build the R2 object key for a PDF file."""
+        r2_key, clean_filename, _subcategory = self._build_r2_key(pdf_filename, exam_type, year)
+        return r2_key, clean_filename
+
+    def _build_r2_key(self, pdf_filename: str, exam_type: str, year: str) -> tuple[str | None, str | None, str]:
+        """build_r2_key() plus the subcategory, classifying the filename only once."""
         filename = pdf_filename
         # Clean up filename by removing language suffixes
         clean_filename = filename
@@ -238,14 +299,13 @@ class BacExamScraper:
                 clean_filename = clean_filename.replace(suffix + '.pdf', '.pdf')
                 break
 
-        # Extract subject from filename
-        subject = self.extract_subject_from_pdf_name(filename)
+        # Extract subject and subcategory from filename
+        subject, subcategory = classifier.classify_pdf(filename)
         if not subject:
-            return None, None
-        
-        subcategory = self.extract_subcategory_from_pdf_name(filename)
+            return None, None, subcategory
+
         r2_key = f"{subject}/pages/{subcategory}/{year}/{exam_type}/{clean_filename}"
-        return r2_key, clean_filename
+        return r2_key, clean_filename, subcategory
 
     def _auth_header(self) -> dict:
         """Build a Bearer Authorization header using the upload password."""
@@ -253,103 +313,375 @@ class BacExamScraper:
 
     def upload_to_r2(self, pdf_path: Path, r2_key: str) -> bool:
         """Upload a PDF file to R2 via the worker API."""
-        try:
-            with open(pdf_path, 'rb') as f:
+        with self.metrics.stage('upload') as stage:
+            try:
+                with multipart_files({'key': r2_key, 'defer_index': '1'}, [('file', pdf_path)]) as body:
+                    response = self.session.post(
+                        f"{self.worker_url}/upload-scraper",
+                        headers={**self._auth_header(), 'Content-Type': body.content_type},
+                        data=body,
+                        timeout=120,
+                    )
+                if response.ok:
+                    print(f"  Uploaded to R2: {r2_key}")
+                    self.deferred_index.add(r2_key)
+                    stage.items, stage.bytes = 1, pdf_path.stat().st_size
+                    return True
+                else:
+                    print(f"  Upload failed ({response.status_code}): {response.text}")
+                    stage.errors = 1
+                    return False
+            except requests.RequestException as e:
+                print(f"  Upload error: {e}")
+                stage.errors = 1
+                return False
+
+    def upload_fileobj_to_r2(self, fileobj, filename: str, size: int, r2_key: str) -> bool:
+        """Upload a PDF from an open binary stream, sending it in fixed-size chunks."""
+        body = MultipartStream({'key': r2_key, 'defer_index': '1'}, [('file', filename, fileobj, size)])
+        # Streamed members are inflated (or range-fetched) while they are sent, so that time counts here
+        with self.metrics.stage('upload') as stage:
+            try:
                 response = self.session.post(
                     f"{self.worker_url}/upload-scraper",
-                    headers=self._auth_header(),
-                    files={'file': (pdf_path.name, f, 'application/pdf')},
-                    data={'key': r2_key},
+                    headers={**self._auth_header(), 'Content-Type': body.content_type},
+                    data=body,
                     timeout=120,
                 )
-            if response.ok:
-                print(f"  Uploaded to R2: {r2_key}")
-                return True
-            else:
+                if response.ok:
+                    print(f"  Uploaded to R2: {r2_key}")
+                    self.deferred_index.add(r2_key)
+                    stage.items, stage.bytes = 1, size
+                    return True
                 print(f"  Upload failed ({response.status_code}): {response.text}")
+                stage.errors = 1
+                return False
+            except requests.RequestException as e:
+                print(f"  Upload error: {e}")
+                stage.errors = 1
+                return False
+
+    def save_fileobj_locally(self, fileobj, r2_key: str) -> bool:
+        """Copy an open binary stream to its final local path in 1 MB chunks."""
+        with self.metrics.stage('save') as stage:
+            try:
+                target = self.files_dir / Path(r2_key)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with open(target, 'wb') as f:
+                    shutil.copyfileobj(fileobj, f, 1024 * 1024)
+                    stage.items, stage.bytes = 1, f.tell()
+                print(f"  Saved locally: {target.relative_to(self.web_scraper_dir)}")
+                return True
+            except OSError as e:
+                print(f"  Local save error: {e}")
+                stage.errors = 1
                 return False
-        except requests.RequestException as e:
-            print(f"  Upload error: {e}")
-            return False
 
     def save_file_locally(self, pdf_path: Path, r2_key: str) -> bool:
         """Save a PDF file to local files directory using the R2 key structure."""
+        with self.metrics.stage('save') as stage:
+            try:
+                target = self.files_dir / Path(r2_key)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(pdf_path, target)
+                stage.items, stage.bytes = 1, pdf_path.stat().st_size
+                print(f"  Saved locally: {target.relative_to(self.web_scraper_dir)}")
+                return True
+            except OSError as e:
+                print(f"  Local save error: {e}")
+                stage.errors = 1
+                return False
+
+    def copy_in_r2(self, source_key: str, r2_key: str) -> bool:
+        """Ask the worker to copy an object that is already in R2 to a new key."""
+        with self.metrics.stage('copy') as stage:
+            try:
+                response = self.session.post(
+                    f"{self.worker_url}/copy-scraper",
+                    headers=self._auth_header(),
+                    json={'source': source_key, 'key': r2_key, 'deferIndex': True},
+                    timeout=60,
+                )
+            except requests.RequestException as e:
+                print(f"  Copy error: {e}")
+                stage.errors = 1
+                return False
+            if response.ok:
+                print(f"  Copied in R2: {r2_key} (same as {source_key})")
+                self.deferred_index.add(r2_key)
+                stage.items = 1
+                return True
+            print(f"  Copy failed ({response.status_code}): {response.text}")
+            stage.errors = 1
+            return False
+
+    def alias_locally(self, source_key: str, r2_key: str) -> bool:
+        """Hard-link (or copy) an already saved local file to a new key."""
+        source = self.files_dir / Path(source_key)
+        target = self.files_dir / Path(r2_key)
+        if not source.is_file():
+            return False
         try:
-            target = self.files_dir / Path(r2_key)
             target.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(pdf_path, target)
-            print(f"  Saved locally: {target.relative_to(self.web_scraper_dir)}")
+            target.unlink(missing_ok=True)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+            print(f"  Saved locally: {target.relative_to(self.web_scraper_dir)} (same as {source_key})")
             return True
         except OSError as e:
             print(f"  Local save error: {e}")
             return False
 
-    def upload_pdf(self, pdf_path: Path, exam_type: str, year: str) -> bool:
-        """Upload a single PDF to R2 or save it locally with the correct key."""
-        filename = pdf_path.name
-        r2_key, _clean_filename = self.build_r2_key(filename, exam_type, year)
-        if not r2_key:
-            print(f"Warning: Could not determine subject for: {filename}")
-            return False
+    def alias_content(self, content: ContentRef, r2_key: str) -> bool:
+        """Store `r2_key` without transferring the bytes, if that content is already stored."""
+        source_keys = self.content_manifest.keys_for(content.digest)
+        if r2_key in source_keys and (self.upload_enabled or (self.files_dir / Path(r2_key)).is_file()):
+            print(f"  Unchanged: {r2_key}")
+            self.content_manifest.count_saved(content.size)
+            return True
+
+        alias = self.copy_in_r2 if self.upload_enabled else self.alias_locally
+        for source_key in source_keys:
+            if source_key != r2_key and alias(source_key, r2_key):
+                self.content_manifest.record(content, r2_key)
+                self.content_manifest.count_saved(content.size)
+                return True
+        return False
+
+    def store_content(self, r2_keys: list[str], content: ContentRef, transfer) -> bool:
+        """Store one PDF under every key, transferring its bytes at most once.
+
+        `transfer(r2_key)` sends the bytes and returns their SHA-256 (None on
+        failure). Keys whose content is already stored become aliases.
+        """
+        results = []
+        for r2_key in r2_keys:
+            if content.digest and self.alias_content(content, r2_key):
+                results.append(True)
+                continue
+            digest = transfer(r2_key)
+            if digest:
+                content.digest = digest
+                self.content_manifest.record(content, r2_key)
+            results.append(bool(digest))
+        return any(results)
 
-        subcategory = self.extract_subcategory_from_pdf_name(filename)
+    def resolve_r2_keys(self, pdf_filename: str, exam_type: str, year: str) -> list[str]:
+        """Return every R2 key a PDF is stored under (empty if the subject is unknown)."""
+        r2_key, _clean_filename, subcategory = self._build_r2_key(pdf_filename, exam_type, year)
+        if not r2_key:
+            return []
 
         # Handle bareme files that need to go to both C and Pascal
         if subcategory in ('mate-info-bareme', 'st-nat-bareme'):
             new_sub = subcategory.replace('bareme', '')
             c_key = r2_key.replace(subcategory, new_sub + 'C')
             pascal_key = r2_key.replace(subcategory, new_sub + 'Pascal')
-            if self.upload_enabled:
-                ok_c = self.upload_to_r2(pdf_path, c_key)
-                ok_p = self.upload_to_r2(pdf_path, pascal_key)
-            else:
-                ok_c = self.save_file_locally(pdf_path, c_key)
-                ok_p = self.save_file_locally(pdf_path, pascal_key)
-            return ok_c or ok_p
+            return [c_key, pascal_key]
 
-        if self.upload_enabled:
-            return self.upload_to_r2(pdf_path, r2_key)
-        return self.save_file_locally(pdf_path, r2_key)
+        return [r2_key]
+
+    def upload_pdf(self, pdf_path: Path, exam_type: str, year: str, content: ContentRef) -> bool:
+        """Upload a single PDF to R2 or save it locally with the correct key."""
+        filename = pdf_path.name
+        r2_keys = self.resolve_r2_keys(filename, exam_type, year)
+        if not r2_keys:
+            print(f"Warning: Could not determine subject for: {filename}")
+            return False
+
+        store = self.upload_to_r2 if self.upload_enabled else self.save_file_locally
+        return self.store_content(r2_keys, content, lambda r2_key: content.digest if store(pdf_path, r2_key) else None)
 
     # ── ZIP processing ───────────────────────────────────────────────────────────
 
-    def extract_zip_file(self, zip_path: Path, target_temp_dir: Path, exam_type: str) -> list:
+    def is_lro_pdf(self, filename: str) -> bool:
+        """Keep Romanian (LRO) PDFs: explicit _LRO or no language suffix, and no minority papers."""
+        return (
+            ('_LRO.pdf' in filename or (not any(lang in filename for lang in ['_LMA', '_LGE', '_LSK', '_LSR', '_LUA']) and filename.endswith('.pdf')))
+            and 'pentru_minoritatea' not in filename.lower()
+            and 'minoritatea' not in filename.lower()
+        )
+
+    def select_lro_members(self, zip_ref: zipfile.ZipFile, zip_url: str | None = None) -> list[zipfile.ZipInfo]:
+        """Pick the LRO PDF members of a ZIP by name, before anything is decompressed.
+
+        With `zip_url`, the members are recorded in the state store and the
+        ones already stored by an earlier run are left out.
+        """
+        pdf_members = [
+            zip_info for zip_info in zip_ref.filelist
+            if zip_info.filename.lower().endswith('.pdf') and zip_info.file_size > 0
+        ]
+        print(f"Found {len(pdf_members)} PDF files in {Path(zip_ref.filename or zip_url or '').name}")
+
+        lro_members = [zip_info for zip_info in pdf_members if self.is_lro_pdf(Path(zip_info.filename).name)]
+        if zip_url:
+            pending = self.state.record_members(zip_url, [zip_info.filename for zip_info in lro_members])
+            if len(pending) < len(lro_members):
+                print(f"Skipping {len(lro_members) - len(pending)} LRO file(s) stored by an earlier run")
+            lro_members = [zip_info for zip_info in lro_members if zip_info.filename in pending]
+        print(f"Processing {len(lro_members)} LRO files")
+        return lro_members
+
+    def finish_member(self, zip_url: str, member_name: str, exam_type: str, year: str, ok: bool,
+                      error: str | None = None) -> None:
+        """Record the outcome of one member; members with no known subject are skipped, not failed."""
+        if ok:
+            status = state_store.UPLOADED
+        elif not self.resolve_r2_keys(Path(member_name).name, exam_type, year):
+            status = state_store.SKIPPED
+        else:
+            status = state_store.FAILED
+        self.state.mark_member(zip_url, member_name, status, error)
+
+    def extract_member(self, zip_ref: zipfile.ZipFile, zip_info: zipfile.ZipInfo, target: Path) -> ContentRef:
+        """Extract one member to `target`, hashing it in the same read loop."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with zip_ref.open(zip_info) as member, open(target, 'wb') as f:
+            reader = HashingReader(member)
+            shutil.copyfileobj(reader, f, 1024 * 1024)
+        return ContentRef(reader.hexdigest(), reader.size, zip_info.CRC)
+
+    def extract_lro_pdfs(self, zip_path: Path, temp_extract_dir: Path,
+                         zip_url: str | None = None) -> list[tuple[Path, ContentRef]]:
+        """Extract the LRO (Romanian) PDFs of a ZIP file, with the content hash of each."""
+        temp_extract_dir.mkdir(exist_ok=True)
+        extract_root = temp_extract_dir.resolve()
+
+        lro_files = []
+        with self.metrics.stage('extract') as stage, zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            for zip_info in self.select_lro_members(zip_ref, zip_url):
+                try:
+                    pdf_path_extracted = temp_extract_dir / zip_info.filename
+                    if not pdf_path_extracted.resolve().is_relative_to(extract_root):
+                        print(f"Skipping unsafe member path: {zip_info.filename}")
+                        if zip_url:
+                            self.state.mark_member(zip_url, zip_info.filename, state_store.SKIPPED, 'unsafe path')
+                        continue
+                    content = self.extract_member(zip_ref, zip_info, pdf_path_extracted)
+                    if content.size > 0:
+                        lro_files.append((pdf_path_extracted, content))
+                        if zip_url:
+                            self.state.mark_member(zip_url, zip_info.filename, state_store.DOWNLOADED)
+                except Exception as e:
+                    print(f"Error extracting {zip_info.filename}: {e}")
+                    stage.errors += 1
+                    if zip_url:
+                        self.state.mark_member(zip_url, zip_info.filename, state_store.FAILED, str(e))
+                    continue
+            stage.items = len(lro_files)
+            stage.bytes = sum(content.size for _path, content in lro_files)
+        return lro_files
+
+    def store_zip_member(self, zip_ref: zipfile.ZipFile, zip_info: zipfile.ZipInfo, exam_type: str, year: str) -> bool:
+        """Stream one ZIP member into its uploads or local files without a temp copy."""
+        filename = Path(zip_info.filename).name
+        r2_keys = self.resolve_r2_keys(filename, exam_type, year)
+        if not r2_keys:
+            print(f"Warning: Could not determine subject for: {filename}")
+            return False
+
+        content = ContentRef(None, zip_info.file_size, zip_info.CRC)
+        candidate = self.content_manifest.digest_for_crc(zip_info.file_size, zip_info.CRC)
+        if candidate:
+            # Same size and CRC as stored content: confirm with SHA-256 before aliasing
+            with zip_ref.open(zip_info) as member:
+                reader = HashingReader(member)
+                while reader.read(1024 * 1024):
+                    pass
+            content.digest = reader.hexdigest()
+
+        def transfer(r2_key: str) -> str | None:
+            # Each key re-opens the member, so only one chunk is ever held in memory
+            with zip_ref.open(zip_info) as member:
+                reader = HashingReader(member)
+                if self.upload_enabled:
+                    ok = self.upload_fileobj_to_r2(reader, filename, zip_info.file_size, r2_key)
+                else:
+                    ok = self.save_fileobj_locally(reader, r2_key)
+            return reader.hexdigest() if ok else None
+
+        return self.store_content(r2_keys, content, transfer)
+
+    def upload_zip_member(self, zip_source, member_name: str, exam_type: str, year: str) -> bool:
+        """Open a ZIP (path or RemoteZipFile) on this thread and stream a single member."""
+        with zipfile.ZipFile(zip_source, 'r') as zip_ref:
+            return self.store_zip_member(zip_ref, zip_ref.getinfo(member_name), exam_type, year)
+
+    def stream_members(self, zip_source, exam_type: str, zip_url: str | None = None) -> list:
+        """Stream the LRO PDFs of a ZIP (path or RemoteZipFile) into uploads or local files."""
+        stored_members = []
+        try:
+            with zipfile.ZipFile(zip_source, 'r') as zip_ref:
+                for zip_info in self.select_lro_members(zip_ref, zip_url):
+                    error = None
+                    try:
+                        ok = self.store_zip_member(zip_ref, zip_info, exam_type, self.current_year)
+                    except Exception as e:
+                        print(f"Error processing PDF {zip_info.filename}: {e}")
+                        ok, error = False, str(e)
+                    if ok:
+                        stored_members.append(zip_info.filename)
+                    if zip_url:
+                        self.finish_member(zip_url, zip_info.filename, exam_type, self.current_year, ok, error)
+        except zipfile.BadZipFile as e:
+            print(f"Error extracting {zip_source}: {e}")
+        except Exception as e:
+            print(f"Error processing {zip_source}: {e}")
+        return stored_members
+
+    def stream_zip_file(self, zip_path: Path, exam_type: str, zip_url: str | None = None) -> list:
+        """Stream the LRO PDFs of a ZIP straight into uploads, skipping the temp directory."""
+        try:
+            return self.stream_members(zip_path, exam_type, zip_url)
+        finally:
+            if zip_path.exists():
+                zip_path.unlink()
+                print(f"Removed ZIP: {zip_path.name}")
+
+    def open_remote_zip(self, zip_url: str) -> RemoteZipFile | None:
+        """Probe a ZIP URL for Range support; None means it has to be downloaded in full."""
+        request_url = self.listing_cache.effective_url(zip_url) if self.listing_cache else zip_url
+        with self.metrics.stage('download') as stage:
+            try:
+                remote = RemoteZipFile.probe(self.session, request_url, {'User-Agent': USER_AGENT})
+            except requests.RequestException as e:
+                print(f"Range probe failed for {zip_url}: {e}")
+                stage.errors = 1
+                return None
+            if remote:
+                # Only the central directory so far; member ranges are fetched by the upload stage
+                stage.items, stage.bytes = 1, remote.bytes_fetched
+                self.zip_manifest.record(zip_url, remote.response_headers)
+        return remote
+
+    def stream_remote_zip(self, remote: RemoteZipFile, exam_type: str, zip_url: str | None = None) -> list:
+        """Fetch only the central directory and the byte ranges of the wanted members."""
+        stored_members = self.stream_members(remote, exam_type, zip_url)
+        print(f"Fetched {remote.bytes_fetched} of {remote.size} bytes in {remote.requests} range request(s)")
+        return stored_members
+
+    def extract_zip_file(self, zip_path: Path, target_temp_dir: Path, exam_type: str,
+                         zip_url: str | None = None) -> list:
         """Extract ZIP file and upload PDFs to R2."""
         uploaded_files = []
         temp_extract_dir = target_temp_dir / f"temp_{zip_path.stem}"
-        temp_extract_dir.mkdir(exist_ok=True)
         
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # Process each file in the ZIP
-                pdf_files = []
-                for zip_info in zip_ref.filelist:
-                    if zip_info.filename.lower().endswith('.pdf') and zip_info.file_size > 0:
-                        try:
-                            zip_ref.extract(zip_info, temp_extract_dir)
-                            pdf_path_extracted = temp_extract_dir / zip_info.filename
-                            if pdf_path_extracted.exists() and pdf_path_extracted.is_file() and pdf_path_extracted.stat().st_size > 0:
-                                pdf_files.append(pdf_path_extracted)
-                        except Exception as e:
-                            print(f"Error extracting {zip_info.filename}: {e}")
-                            continue
-                
-                print(f"Found {len(pdf_files)} PDF files in {zip_path.name}")
-                
-                # Filter for LRO (Romanian) files only
-                lro_files = [f for f in pdf_files if 
-                           ('_LRO.pdf' in f.name or (not any(lang in f.name for lang in ['_LMA', '_LGE', '_LSK', '_LSR', '_LUA']) and f.name.endswith('.pdf'))) 
-                           and 'pentru_minoritatea' not in f.name.lower() 
-                           and 'minoritatea' not in f.name.lower()]
-                print(f"Processing {len(lro_files)} LRO files")
-                
-                for pdf_file in lro_files:
-                    try:
-                        if self.upload_pdf(pdf_file, exam_type, self.current_year):
-                            uploaded_files.append(pdf_file)
-                    except Exception as e:
-                        print(f"Error processing PDF {pdf_file.name}: {e}")
-                        continue
+            for pdf_file, content in self.extract_lro_pdfs(zip_path, temp_extract_dir, zip_url):
+                error = None
+                try:
+                    ok = self.upload_pdf(pdf_file, exam_type, self.current_year, content)
+                except Exception as e:
+                    print(f"Error processing PDF {pdf_file.name}: {e}")
+                    ok, error = False, str(e)
+                if ok:
+                    uploaded_files.append(pdf_file)
+                if zip_url:
+                    member_name = pdf_file.relative_to(temp_extract_dir).as_posix()
+                    self.finish_member(zip_url, member_name, exam_type, self.current_year, ok, error)
             
         except zipfile.BadZipFile as e:
             print(f"Error extracting {zip_path}: {e}")
@@ -372,60 +704,402 @@ class BacExamScraper:
         parsed_url = urlparse(zip_url)
         zip_filename = os.path.basename(parsed_url.path)
         print(f"Processing: {zip_filename}")
+        self.state.begin_zip(zip_url, self.current_year, exam_type)
         
-        # Create a temporary download directory
-        self.temp_dir.mkdir(exist_ok=True)
-        zip_path = self.temp_dir / zip_filename
-        
-        # Download ZIP file
-        if not self.download_file(zip_url, zip_path):
-            return False
-        
-        # Extract ZIP file and organize PDFs by subject
-        uploaded_files = self.extract_zip_file(zip_path, self.temp_dir, exam_type)
+        uploaded_files = None
+        if self.ranged:
+            remote = self.open_remote_zip(zip_url)
+            if remote:
+                uploaded_files = self.stream_remote_zip(remote, exam_type, zip_url)
+            else:
+                print("Server ignores Range requests, downloading the whole ZIP")
+
+        if uploaded_files is None:
+            # Create a temporary download directory
+            self.temp_dir.mkdir(exist_ok=True)
+            zip_path = self.temp_dir / zip_filename
+
+            # Download ZIP file
+            if not self.download_file(zip_url, zip_path):
+                self.state.fail_zip(zip_url, 'download failed')
+                return False
+
+            # Extract ZIP file and organize PDFs by subject
+            if self.stream:
+                uploaded_files = self.stream_zip_file(zip_path, exam_type, zip_url)
+            else:
+                uploaded_files = self.extract_zip_file(zip_path, self.temp_dir, exam_type, zip_url)
         
-        if uploaded_files:
+        # Seen only once every member is stored; failed members are retried next run
+        if self.state.finish_zip(zip_url):
             self.seen_urls.add(zip_url)
-            return True
-        
-        return False
+        return bool(uploaded_files)
     
-    def run(self):
-        """Main scraper execution."""
-        print(f"Starting BAC exam scraper for year {self.current_year}")
-        mode = "R2 upload" if self.upload_enabled else "local save"
-        print(f"Mode: {mode}")
-        print(f"Worker URL: {self.worker_url}")
-        
-        zips_count = 0
-        
+    def recheck_seen_urls(self, zip_links: list) -> None:
+        """HEAD already-seen ZIPs and forget the ones that were re-published."""
+        with self.seen_lock:
+            seen = [zip_url for zip_url in zip_links if zip_url in self.seen_urls]
+        if not seen:
+            return
+
+        request_urls = {
+            zip_url: self.listing_cache.effective_url(zip_url) if self.listing_cache else zip_url
+            for zip_url in seen
+        }
+        changed = self.zip_manifest.find_changed(
+            self.session, request_urls, {'User-Agent': USER_AGENT}, max_workers=max(8, self.jobs)
+        )
+        print(f"Rechecked {len(seen)} seen ZIP(s), {len(changed)} re-published")
+
+        with self.seen_lock:
+            for zip_url in changed:
+                print(f"Re-published: {zip_url}")
+                self.seen_urls.discard(zip_url)
+                self.state.reset_zip(zip_url)
+
+    def plan(self) -> int:
+        """Print the R2 keys every listed ZIP would produce, reading only central directories."""
+        keys_count = 0
+        for zip_url, exam_type in self.iter_zip_links():
+            marker = " (seen)" if zip_url in self.seen_urls else ""
+            print(f"\n{zip_url}{marker}")
+
+            remote = self.open_remote_zip(zip_url)
+            if remote is None:
+                print("  Server ignores Range requests, skipped")
+                continue
+
+            try:
+                with zipfile.ZipFile(remote, 'r') as zip_ref:
+                    for zip_info in self.select_lro_members(zip_ref):
+                        filename = Path(zip_info.filename).name
+                        r2_keys = self.resolve_r2_keys(filename, exam_type, self.current_year)
+                        if not r2_keys:
+                            print(f"  ? {filename} (unknown subject)")
+                        for r2_key in r2_keys:
+                            print(f"  {r2_key}")
+                            keys_count += 1
+            except (zipfile.BadZipFile, OSError, requests.RequestException) as e:
+                print(f"  Error reading {zip_url}: {e}")
+            print(f"  Central directory: {remote.bytes_fetched} of {remote.size} bytes")
+
+        if self.listing_cache:
+            self.listing_cache.save()
+        return keys_count
+
+    def iter_zip_links(self):
+        """Fetch the listing pages and yield (zip_url, exam_type) for every ZIP link."""
         for url in self.urls:
             print(f"\nProcessing URL: {url}")
             
             # Fetch webpage
-            html_content = self.fetch_page(url)
-            if not html_content:
+            with self.metrics.stage('listing'):
+                response = self.request_page(url)
+            if response is None:
+                # 304: reuse the links extracted on the run that cached this page
+                zip_links = self.listing_cache.links(url)
+                if zip_links is None:
+                    zip_links = self.extract_links(self.listing_cache.body(url), url)
+                    self.listing_cache.set_links(url, zip_links)
+                self.metrics.add('listing', items=len(zip_links))
+                print(f"Listing unchanged (cache hit): {len(zip_links)} ZIP files")
+            elif not response:
                 continue
+            elif self.jobs > 1 and not self.recheck:
+                # Hand each link to the download stage as soon as it is parsed
+                for zip_url in self.stream_links(url, response):
+                    yield zip_url, self.determine_exam_type(url, os.path.basename(urlparse(zip_url).path))
+                continue
+            else:
+                zip_links = list(self.stream_links(url, response))
+
+            if self.recheck:
+                self.recheck_seen_urls(zip_links)
             
-            # Extract ZIP links
-            zip_links = self.extract_links(html_content, url)
-            print(f"Found {len(zip_links)} ZIP files")
-            
-            # Process each ZIP link
             for zip_url in zip_links:
                 # Parse URL to get filename for exam type determination
                 parsed_url = urlparse(zip_url)
                 zip_filename = os.path.basename(parsed_url.path)
-                exam_type = self.determine_exam_type(url, zip_filename)
-                
+                yield zip_url, self.determine_exam_type(url, zip_filename)
+
+    # ── Concurrent pipeline ─────────────────────────────────────────────────────
+
+    def run_concurrent(self, sources: list['BacExamScraper'] | None = None, links=None) -> int:
+        """Download, extract and upload ZIPs as overlapping stages.
+
+        Each stage has its own worker threads and a bounded input queue, so a
+        slow stage applies backpressure instead of buffering every ZIP on disk.
+        `sources` are per-year views (see for_year) whose listing pages are
+        read in parallel into the same pipeline; the default is this scraper.
+        `links` replaces the listing pages with (zip_url, exam_type, year) tuples.
+        """
+        sources = sources or [self]
+        download_queue: queue.Queue = queue.Queue(maxsize=self.jobs * 2)
+        extract_queue: queue.Queue = queue.Queue(maxsize=self.extract_jobs * 2)
+        upload_queue: queue.Queue = queue.Queue(maxsize=self.upload_jobs * 2)
+        completed = []
+        completed_lock = threading.Lock()
+
+        def finish(job: _ZipJob) -> None:
+            shutil.rmtree(job.zip_path.parent, ignore_errors=True)
+            try:
+                # Seen only once every member is stored; failed members are retried next run
+                if self.state.finish_zip(job.url):
+                    with self.seen_lock:
+                        self.seen_urls.add(job.url)
+            except Exception as e:
+                print(f"Error recording {job.url}: {e}")
+            if job.uploaded:
+                with completed_lock:
+                    completed.append(job.url)
+
+        def fail(job: _ZipJob, error: str) -> None:
+            try:
+                self.state.fail_zip(job.url, error)
+            except Exception as e:
+                print(f"Error recording {job.url}: {e}")
+            finish(job)
+
+        # Every item is settled even if a stage raises, so no worker thread dies
+        # and no job is left unfinished with schedule() blocked on a full queue.
+
+        def download_worker() -> None:
+            while (job := download_queue.get()) is not None:
+                try:
+                    if self.ranged:
+                        with self.host_limiter.slot(job.url):
+                            job.remote = self.open_remote_zip(job.url)
+                    if job.remote:
+                        downloaded = True
+                    else:
+                        with self.host_limiter.slot(job.url):
+                            downloaded = self.download_file(job.url, job.zip_path)
+                    error = 'download failed'
+                except Exception as e:
+                    print(f"Error downloading {job.url}: {e}")
+                    downloaded, error = False, str(e)
+                if downloaded:
+                    extract_queue.put(job)
+                else:
+                    fail(job, error)
+
+        def extract_worker() -> None:
+            while (job := extract_queue.get()) is not None:
+                streamed = self.stream or job.remote is not None
+                try:
+                    if streamed:
+                        # Members are streamed by the upload workers; the ZIP stays until finish()
+                        with self.metrics.stage('extract') as stage:
+                            with zipfile.ZipFile(job.remote or job.zip_path, 'r') as zip_ref:
+                                pdf_files = [zip_info.filename for zip_info in self.select_lro_members(zip_ref, job.url)]
+                            stage.items = len(pdf_files)
+                    else:
+                        pdf_files = self.extract_lro_pdfs(job.zip_path, job.extract_dir, job.url)
+                except Exception as e:
+                    print(f"Error processing {job.url}: {e}")
+                    pdf_files = []
+                finally:
+                    if not streamed:
+                        job.zip_path.unlink(missing_ok=True)
+
+                # Set the counter before queueing so an early upload cannot finish the job
+                job.pending = len(pdf_files)
+                if not pdf_files:
+                    finish(job)
+                for pdf_file in pdf_files:
+                    upload_queue.put((job, pdf_file))
+
+        def upload_worker() -> None:
+            while (item := upload_queue.get()) is not None:
+                job, pdf_file = item
+                ok, error = False, None
+                try:
+                    if job.remote:
+                        # Member bytes come from the source host, so they count against its limit;
+                        # the clone reuses the central directory the extract stage already fetched
+                        with self.host_limiter.slot(job.url):
+                            ok = self.upload_zip_member(job.remote.clone(), pdf_file, job.exam_type, job.year)
+                    elif self.stream:
+                        ok = self.upload_zip_member(job.zip_path, pdf_file, job.exam_type, job.year)
+                    else:
+                        pdf_path, content = pdf_file
+                        ok = self.upload_pdf(pdf_path, job.exam_type, job.year, content)
+                except Exception as e:
+                    name = pdf_file if isinstance(pdf_file, str) else pdf_file[0].name
+                    print(f"Error processing PDF {Path(name).name}: {e}")
+                    ok, error = False, str(e)
+
+                try:
+                    member_name = pdf_file if isinstance(pdf_file, str) else pdf_file[0].relative_to(job.extract_dir).as_posix()
+                    self.finish_member(job.url, member_name, job.exam_type, job.year, ok, error)
+                except Exception as e:
+                    # The member stays unfinished in the state store, so the ZIP is retried next run
+                    print(f"Error recording a member of {job.url}: {e}")
+                with job.lock:
+                    job.pending -= 1
+                    job.uploaded += int(ok)
+                    done = job.pending == 0
+                if done:
+                    finish(job)
+
+        def start(target, count: int) -> list[threading.Thread]:
+            threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            return threads
+
+        def drain(stage_queue: queue.Queue, threads: list[threading.Thread]) -> None:
+            for _ in threads:
+                stage_queue.put(None)
+            for thread in threads:
+                thread.join()
+
+        print(f"Pipeline: {self.jobs} download / {self.extract_jobs} extract / {self.upload_jobs} upload workers")
+        downloaders = start(download_worker, self.jobs)
+        extractors = start(extract_worker, self.extract_jobs)
+        uploaders = start(upload_worker, self.upload_jobs)
+
+        self.temp_dir.mkdir(exist_ok=True)
+        scheduled = set()
+
+        def schedule(links) -> None:
+            for zip_url, exam_type, year in links:
+                with self.seen_lock:
+                    if zip_url in self.seen_urls or zip_url in scheduled:
+                        continue
+                    scheduled.add(zip_url)
+                    job_number = len(scheduled)
+
+                # One directory per job keeps same-named ZIPs from different pages apart
+                zip_filename = os.path.basename(urlparse(zip_url).path)
+                job_dir = self.temp_dir / f"job_{job_number:04d}"
+                job_dir.mkdir(exist_ok=True)
+                print(f"Queued: {zip_filename}")
+                self.state.begin_zip(zip_url, year, exam_type)
+                download_queue.put(_ZipJob(zip_url, exam_type, job_dir / zip_filename, year))
+
+        def listed(source: 'BacExamScraper'):
+            for zip_url, exam_type in source.iter_zip_links():
+                yield zip_url, exam_type, source.current_year
+
+        if links is not None:
+            schedule(links)
+        elif len(sources) == 1:
+            schedule(listed(sources[0]))
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(sources), self.host_limiter.per_host)) as executor:
+                for future in [executor.submit(schedule, listed(source)) for source in sources]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error reading listings: {e}")
+
+        drain(download_queue, downloaders)
+        drain(extract_queue, extractors)
+        drain(upload_queue, uploaders)
+        return len(completed)
+
+    def save_content_manifest(self) -> None:
+        """Persist the content manifest and report what deduplication saved."""
+        self.content_manifest.save()
+        if self.content_manifest.aliases:
+            print(
+                f"Deduplicated {self.content_manifest.aliases} PDF(s): "
+                f"{self.content_manifest.bytes_saved / (1024 * 1024):.1f} MB not transferred"
+            )
+
+    def run(self):
+        """Main scraper execution."""
+        print(f"Starting BAC exam scraper for year {self.current_year}")
+        mode = "R2 upload" if self.upload_enabled else "local save"
+        print(f"Mode: {mode}")
+        print(f"Worker URL: {self.worker_url}")
+        
+        if self.jobs > 1:
+            zips_count = self.run_concurrent()
+        else:
+            zips_count = 0
+            for zip_url, exam_type in self.iter_zip_links():
                 if self.process_zip_url(zip_url, exam_type):
                     zips_count += 1
         
-        # Save updated seen URLs
+        self.save_state()
+        return zips_count
+
+    def run_resume(self) -> int:
+        """Re-run the ZIPs the state store has not finished, without reading listing pages."""
+        unfinished = self.state.unfinished_zips()
+        print(f"Resuming {len(unfinished)} unfinished ZIP(s) from {self.state.db_path.name}")
+        if self.jobs > 1:
+            zips_count = self.run_concurrent(links=unfinished)
+        else:
+            zips_count = 0
+            for zip_url, exam_type, year in unfinished:
+                if self.for_year(year, self.archive_on).process_zip_url(zip_url, exam_type):
+                    zips_count += 1
+        self.save_state()
+        return zips_count
+
+    def save_state(self) -> None:
+        """Write seen URLs, manifests and the listing cache once at the end of a run."""
+        if self.upload_enabled:
+            # Also picks up keys a crashed run stored but never indexed
+            with self.metrics.stage('index'):
+                self.deferred_index.commit()
+        counts = self.state.counts()
+        print(
+            "State: " + ", ".join(f"{count} {status}" for status, count in sorted(counts['zips'].items())) + " ZIP(s); "
+            + ", ".join(f"{count} {status}" for status, count in sorted(counts['members'].items())) + " member(s)"
+        )
         self.save_seen_urls()
+        self.zip_manifest.save()
+        self.save_content_manifest()
+
+        if self.listing_cache:
+            self.listing_cache.save()
+            print(f"Listing cache: {self.listing_cache.hits} hit(s), {self.listing_cache.misses} miss(es)")
+
+    def year_sources(self, years: list[int]) -> list['BacExamScraper']:
+        """Per-year views for a backfill, each pointed at the host that serves its listings."""
+        with ThreadPoolExecutor(max_workers=min(len(years), 8)) as executor:
+            hosts = dict(zip(years, executor.map(self.detect_archive, [str(year) for year in years])))
+
+        sources = []
+        for year in years:
+            archive = hosts[year]
+            if archive is None:
+                print(f"{year}: no listings on subiecte.edu.ro or subiecte{year}.edu.ro, skipped")
+                continue
+            print(f"{year}: {'subiecte' + str(year) if archive else 'subiecte'}.edu.ro")
+            sources.append(self.for_year(str(year), archive))
+        return sources
 
+    def run_backfill(self, years: list[int]) -> int:
+        """Scrape several years through one shared pipeline and save state once."""
+        print(f"Starting BAC exam backfill for {years[0]}-{years[-1]}")
+        mode = "R2 upload" if self.upload_enabled else "local save"
+        print(f"Mode: {mode}")
+        print(f"Worker URL: {self.worker_url}")
+        print(f"Per-host ZIP transfers: {self.host_limiter.per_host}")
+
+        sources = self.year_sources(years)
+        zips_count = self.run_concurrent(sources) if sources else 0
+        self.save_state()
         return zips_count
 
+def parse_years(value: str) -> list[int]:
+    """`2015-2026` or `2019,2021,2024` -> sorted list of years."""
+    years = set()
+    try:
+        for part in value.split(','):
+            first, _, last = part.strip().partition('-')
+            years.update(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year range: {value!r}")
+    if not years:
+        raise argparse.ArgumentTypeError(f"invalid year range: {value!r}")
+    return sorted(years)
+
 
 def main():
     """Entry point for the scraper."""
@@ -446,6 +1120,12 @@ def main():
         default=datetime.now().year,
         help=f'Year to scrape exam files for (default: {datetime.now().year})'
     )
+    parser.add_argument(
+        '--years',
+        type=parse_years,
+        default=None,
+        help='Backfill several years through one shared pipeline, e.g. 2015-2026 or 2019,2021'
+    )
     parser.add_argument(
         '--worker-url', '-w',
         type=str,
@@ -463,22 +1143,137 @@ def main():
         action='store_true',
         help='Upload files to R2 (default: save files locally in ./files)'
     )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Concurrent ZIP downloads; above 1 runs download/extract/upload as a pipeline (default: 1)'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream LRO members straight from the ZIP into uploads/local files (no temp extraction)'
+    )
+    parser.add_argument(
+        '--ranged',
+        action='store_true',
+        help='Fetch only the wanted ZIP members with HTTP Range requests (falls back to full downloads)'
+    )
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='List the R2 keys each remote ZIP would produce, reading only the ZIP central directories'
+    )
+    parser.add_argument(
+        '--recheck',
+        action='store_true',
+        help='HEAD already-seen ZIPs and re-download the ones whose ETag/size/date changed'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Re-run only the ZIPs and members the state store has not finished, skipping listing pages'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always download listing pages in full instead of sending conditional GETs'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=('threads', 'async'),
+        default='threads',
+        help='threads: requests.Session (default); async: asyncio + aiohttp coroutines (needs the optional aiohttp package)'
+    )
+    parser.add_argument(
+        '--extract-jobs',
+        type=int,
+        default=None,
+        help='Concurrent ZIP extractions in pipeline mode (default: min(jobs, CPU count))'
+    )
+    parser.add_argument(
+        '--upload-jobs',
+        type=int,
+        default=None,
+        help='Concurrent PDF uploads in pipeline mode (default: 2 x jobs)'
+    )
+    parser.add_argument(
+        '--host-jobs',
+        type=int,
+        default=None,
+        help='Concurrent ZIP transfers per source host with --years (default: jobs)'
+    )
+    parser.add_argument(
+        '--site-url',
+        default=None,
+        help='Scrape listings from this site instead of subiecte.edu.ro (e.g. the benchmark stand-in)'
+    )
+    parser.add_argument(
+        '--work-dir',
+        type=Path,
+        default=None,
+        help='Directory for files/, temp/ and the state files (default: the web-scraper directory)'
+    )
+    parser.add_argument(
+        '--metrics-dir',
+        type=Path,
+        default=os.environ.get('METRICS_DIR') or None,
+        help='Append per-stage metrics to scrape.jsonl and write cuza_scrape.prom here at the end of the run'
+    )
     
     args = parser.parse_args()
     
+    if (args.years or args.resume) and args.engine == 'async':
+        print("Error: --years and --resume run on the threaded pipeline; drop --engine async.")
+        import sys
+        sys.exit(1)
+
+    if (args.stream or args.ranged) and args.engine == 'async':
+        # The async engine always downloads whole ZIPs and extracts them to disk
+        print("Error: --stream and --ranged run on the threaded pipeline; drop --engine async.")
+        import sys
+        sys.exit(1)
+
     if args.upload and not args.password:
         print("Error: Upload password is required in upload mode. Set UPLOAD_PASSWORD env var or use --password.")
         import sys
         sys.exit(1)
     
+    metrics = Metrics('scrape')
+    zips_count = None
     try:
         scraper = BacExamScraper(
             worker_url=args.worker_url,
             upload_password=args.password,
             year=args.year,
             upload_enabled=args.upload,
+            jobs=args.jobs,
+            extract_jobs=args.extract_jobs,
+            upload_jobs=args.upload_jobs,
+            use_cache=not args.no_cache,
+            recheck=args.recheck,
+            stream=args.stream,
+            ranged=args.ranged,
+            host_jobs=args.host_jobs,
+            site_url=args.site_url,
+            work_dir=args.work_dir,
+            metrics=metrics,
         )
-        zips_count = scraper.run()
+        if args.plan:
+            sources = scraper.year_sources(args.years) if args.years else [scraper]
+            keys_count = sum(source.plan() for source in sources)
+            print(f"\nPlan: {keys_count} R2 key(s)")
+            return
+
+        if args.resume:
+            zips_count = scraper.run_resume()
+        elif args.years:
+            zips_count = scraper.run_backfill(args.years)
+        elif args.engine == 'async':
+            from async_scraper import AsyncBacExamScraper
+            zips_count = AsyncBacExamScraper(scraper).run()
+        else:
+            zips_count = scraper.run()
         
         if zips_count > 0:
             print(f"Scraping completed. Downloaded {zips_count} new ZIPs.")
@@ -493,6 +1288,9 @@ def main():
         print(f"Error during scraping: {e}")
         import sys
         sys.exit(1)
+    finally:
+        if args.metrics_dir and not args.plan:
+            metrics.write(args.metrics_dir, success=zips_count is not None, zips=zips_count or 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Per-stage run metrics, written as JSON lines and as a Prometheus textfile.
+
+A Metrics object sums, for each stage of a run (listing, download, extract,
+upload, ...), the calls into it, the items and bytes they handled, their
+errors, the HTTP retries made on their thread and the seconds they took. Stage
+seconds are summed over threads, so in the pipeline they can add up to more
+than the run's wall time; compare stages with each other, not with the run.
+
+A session made by utils.create_retry_session(metrics=...) also reports every
+response into a latency histogram per method, host and route. The latency is
+requests' `elapsed`, the time to the response headers of the last attempt;
+bodies read afterwards (ZIPs, PDFs) count towards their stage instead.
+
+write() appends one JSON line per stage, per HTTP route and for the run to
+<dir>/<job>.jsonl and replaces <dir>/cuza_<job>.prom, for node_exporter's
+textfile collector, with the values of the last run.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the HTTP latency histogram buckets; +Inf is implied
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_FIELDS = ('calls', 'items', 'bytes', 'errors', 'retries', 'seconds')
+STAGE_HELP = {
+    'calls': 'Calls into the stage',
+    'items': 'Items (pages, ZIPs, PDFs) the stage handled',
+    'bytes': 'Bytes the stage read or sent',
+    'errors': 'Calls that failed',
+    'retries': 'HTTP retries made by the stage',
+    'seconds': 'Seconds spent in the stage, summed over threads',
+}
+
+
+def http_route(url: str) -> str:
+    """A low-cardinality label for a URL: `/<first segment>` on the worker, `zip` or `listing` on exam hosts."""
+    path = urlparse(url).path
+    if path.lower().endswith('.zip'):
+        return 'zip'
+    first = path.strip('/').split('/', 1)[0]
+    # subiecte.edu.ro paths start with the year; the benchmark stand-in serves archive hosts under /subiecte{year}
+    if not first or first.isdigit() or first.startswith('subiecte'):
+        return 'listing'
+    return f"/{first}"
+
+
+def _labels(**labels: Any) -> str:
+    def escape(value: Any) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+class StageCall:
+    """One `with metrics.stage(...)` block; set `items`, `bytes` or `errors` before it ends."""
+
+    def __init__(self):
+        self.items = 0
+        self.bytes = 0
+        self.errors = 0
+        self.retries = 0
+
+
+class Metrics:
+    """Counters of one run of `job` (scrape, upload, download), shared by its threads."""
+
+    def __init__(self, job: str):
+        self.job = job
+        self.started = time.time()
+        self.started_perf = time.perf_counter()
+        self.run_id = datetime.fromtimestamp(self.started, timezone.utc).strftime('%Y%m%dT%H%M%S.%fZ')
+        self.stages: dict[str, dict[str, float]] = {}
+        self.http: dict[tuple[str, str, str], dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def add(
+        self, stage: str, calls: int = 0, items: int = 0, bytes: int = 0, errors: int = 0, retries: int = 0,  # noqa: A002
+        seconds: float = 0.0,
+    ) -> None:
+        with self.lock:
+            totals = self.stages.setdefault(stage, dict.fromkeys(STAGE_FIELDS, 0))
+            totals['calls'] += calls
+            totals['items'] += items
+            totals['bytes'] += bytes
+            totals['errors'] += errors
+            totals['retries'] += retries
+            totals['seconds'] += seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageCall]:
+        """Time one call into stage `name`; HTTP retries on this thread meanwhile are counted to it."""
+        call = StageCall()
+        outer = getattr(self.local, 'call', None)
+        self.local.call = call
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            call.errors += 1
+            raise
+        finally:
+            self.local.call = outer
+            self.add(
+                name, calls=1, items=call.items, bytes=call.bytes, errors=call.errors, retries=call.retries,
+                seconds=time.perf_counter() - start,
+            )
+
+    def timed(self, name: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Yield from `chunks`, adding their bytes and the time spent waiting for them to stage `name`.
+
+        Time the consumer spends between chunks is not counted, so a stage
+        read by a pipeline that applies backpressure is not charged for it.
+        """
+        iterator = iter(chunks)
+        size = 0
+        seconds = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                chunk = next(iterator, None)
+                seconds += time.perf_counter() - start
+                if chunk is None:
+                    return
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.add(name, bytes=size, seconds=seconds)
+
+    def observe_http(self, method: str, url: str, status: int, seconds: float, retries: int = 0) -> None:
+        key = (method, urlparse(url).netloc, http_route(url))
+        with self.lock:
+            route = self.http.get(key)
+            if route is None:
+                route = self.http[key] = {
+                    'count': 0, 'sum': 0.0, 'retries': 0, 'buckets': [0] * len(HTTP_BUCKETS), 'statuses': {},
+                }
+            route['count'] += 1
+            route['sum'] += seconds
+            route['retries'] += retries
+            bucket = bisect.bisect_left(HTTP_BUCKETS, seconds)
+            if bucket < len(HTTP_BUCKETS):
+                route['buckets'][bucket] += 1
+            route['statuses'][status] = route['statuses'].get(status, 0) + 1
+        call = getattr(self.local, 'call', None)
+        if call is not None:
+            call.retries += retries
+
+    def response_hook(self, response, *args, **kwargs) -> None:
+        """requests `response` hook: one histogram sample, plus the urllib3 retries behind the response."""
+        retries = getattr(response.raw, 'retries', None)
+        self.observe_http(
+            response.request.method, response.url, response.status_code, response.elapsed.total_seconds(),
+            len(retries.history) if retries is not None else 0,
+        )
+
+    def records(self, **run: Any) -> list[dict[str, Any]]:
+        """The JSON lines of this run; `run` adds fields (outcome, totals) to the run line."""
+        common = {'run_id': self.run_id, 'job': self.job}
+        with self.lock:
+            lines = [
+                {**common, 'type': 'stage', 'stage': stage, **{field: round(value, 6) for field, value in totals.items()}}
+                for stage, totals in sorted(self.stages.items())
+            ]
+            for (method, host, route), totals in sorted(self.http.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(HTTP_BUCKETS, totals['buckets']):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                lines.append({
+                    **common, 'type': 'http', 'method': method, 'host': host, 'route': route,
+                    'count': totals['count'], 'seconds': round(totals['sum'], 6), 'retries': totals['retries'],
+                    'statuses': {str(status): count for status, count in sorted(totals['statuses'].items())},
+                    'buckets': buckets,
+                })
+        lines.append({
+            **common, 'type': 'run',
+            'started': datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec='seconds'),
+            'seconds': round(time.perf_counter() - self.started_perf, 6), **run,
+        })
+        return lines
+
+    def prometheus(self, success: bool | None = None) -> str:
+        """The textfile-collector exposition of this run; every value is of the last run, so all are gauges."""
+        job = {'job': self.job}
+        out = [
+            '# HELP cuza_run_start_timestamp_seconds Start of the last run',
+            '# TYPE cuza_run_start_timestamp_seconds gauge',
+            f"cuza_run_start_timestamp_seconds{_labels(**job)} {_number(round(self.started, 3))}",
+            '# HELP cuza_run_duration_seconds Wall time of the last run',
+            '# TYPE cuza_run_duration_seconds gauge',
+            f"cuza_run_duration_seconds{_labels(**job)} {_number(time.perf_counter() - self.started_perf)}",
+        ]
+        if success is not None:
+            out += [
+                '# HELP cuza_run_success 1 if the last run finished without failures',
+                '# TYPE cuza_run_success gauge',
+                f"cuza_run_success{_labels(**job)} {int(success)}",
+            ]
+        with self.lock:
+            stages = sorted(self.stages.items())
+            routes = sorted(self.http.items())
+            for field in STAGE_FIELDS:
+                name = f"cuza_stage_{field}"
+                out += [f"# HELP {name} {STAGE_HELP[field]}", f"# TYPE {name} gauge"]
+                out += [f"{name}{_labels(**job, stage=stage)} {_number(totals[field])}" for stage, totals in stages]
+
+            name = 'cuza_http_response_seconds'
+            out += [f"# HELP {name} Time to the response headers of HTTP calls", f"# TYPE {name} histogram"]
+            for (method, host, route), totals in routes:
+                labels = {**job, 'method': method, 'host': host, 'route': route}
+                cumulative = 0
+                for bound, count in zip(HTTP_BUCKETS, totals['buckets']):
+                    cumulative += count
+                    out.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+                out.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {totals['count']}")
+                out.append(f"{name}_sum{_labels(**labels)} {_number(totals['sum'])}")
+                out.append(f"{name}_count{_labels(**labels)} {totals['count']}")
+
+            out += ['# HELP cuza_http_responses HTTP responses by status code', '# TYPE cuza_http_responses gauge']
+            for (method, host, route), totals in routes:
+                out += [
+                    f"cuza_http_responses{_labels(**job, method=method, host=host, route=route, code=status)} {count}"
+                    for status, count in sorted(totals['statuses'].items())
+                ]
+            out += ['# HELP cuza_http_retries urllib3 retries behind HTTP responses', '# TYPE cuza_http_retries gauge']
+            out += [
+                f"cuza_http_retries{_labels(**job, method=method, host=host, route=route)} {totals['retries']}"
+                for (method, host, route), totals in routes
+            ]
+        return '\n'.join(out) + '\n'
+
+    def write(self, directory: Path, success: bool | None = None, **run: Any) -> None:
+        """Append the JSON lines to <job>.jsonl and atomically replace cuza_<job>.prom."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        if success is not None:
+            run['success'] = success
+        with open(directory / f"{self.job}.jsonl", 'a', encoding='utf-8') as f:
+            for line in self.records(**run):
+                f.write(json.dumps(line) + '\n')
+
+        # The collector may read at any moment, so the file is renamed into place
+        target = directory / f"cuza_{self.job}.prom"
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=f".{target.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus(success))
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, target)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Local manifest of a worker mirror made by download_from_worker.py --sync.
+
+For every synced key it stores the size, ETag and time of the last download.
+It also stores a cursor: the newest `uploadedAt` seen on the worker's
+/recent-changes feed. The next sync can then ask the feed what changed since
+then, and only diffs the whole /index when the feed no longer reaches back
+that far.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+
+from utils import load_json_file, utc_now, write_json_atomic
+
+MANIFEST_NAME = '.mirror-manifest.json'
+
+
+class MirrorManifest:
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+        self.manifest_file = output_dir / MANIFEST_NAME
+        data = load_json_file(self.manifest_file, {})
+        # key -> {'size': int, 'etag': str | None, 'synced_at': str}
+        self.files: dict[str, dict] = data.get('files', {})
+        self.cursor: str | None = data.get('cursor')
+        self.last_sync: str | None = data.get('last_sync')
+        self.lock = threading.Lock()
+
+    def is_current(self, key: str) -> bool:
+        """True if `key` was synced and the local file still has the recorded size."""
+        entry = self.files.get(key)
+        if not entry:
+            return False
+        try:
+            return (self.output_dir / key).stat().st_size == entry['size']
+        except OSError:
+            return False
+
+    def adopt(self, key: str, headers) -> bool:
+        """Take an existing local file into the manifest without downloading it again.
+
+        `headers` are those of HEAD /file/<key>. The file must have the remote
+        size, and the remote SHA-256 too when the worker has one, so a
+        truncated or stale copy is downloaded instead.
+        """
+        path = self.output_dir / key
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return False
+        if size <= 0 or headers.get('Content-Length') != str(size):
+            return False
+
+        expected = headers.get('X-Content-SHA256')
+        if expected:
+            sha256 = hashlib.sha256()
+            with path.open('rb') as f:
+                while chunk := f.read(1024 * 1024):
+                    sha256.update(chunk)
+            if sha256.hexdigest() != expected.lower():
+                return False
+        with self.lock:
+            self.files[key] = {'size': size, 'etag': headers.get('ETag'), 'synced_at': utc_now()}
+        return True
+
+    def record(self, key: str, headers) -> None:
+        size = (self.output_dir / key).stat().st_size
+        with self.lock:
+            self.files[key] = {'size': size, 'etag': headers.get('ETag'), 'synced_at': utc_now()}
+
+    def forget(self, key: str) -> None:
+        with self.lock:
+            self.files.pop(key, None)
+
+    def save(self) -> None:
+        with self.lock:
+            write_json_atomic(self.manifest_file, {
+                'cursor': self.cursor,
+                'last_sync': self.last_sync,
+                'files': self.files,
+            })
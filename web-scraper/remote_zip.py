@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Read ZIP archives over HTTP Range requests.
+
+zipfile only needs seek/tell/read on its file object, so wrapping a URL in
+RemoteZipFile lets ZipFile read the central directory from the end of the
+archive and then fetch just the byte ranges of the members that are opened.
+The subiecte.edu.ro ZIPs carry every language variant, so reading only the
+Romanian members skips most of each archive.
+"""
+
+from __future__ import annotations
+
+import io
+
+from utils import _range_validator
+
+
+class RangeNotSupported(IOError):
+    """The server answered a ranged request with something other than 206."""
+
+
+class RemoteZipFile(io.RawIOBase):
+    def __init__(
+        self,
+        session,
+        url: str,
+        size: int,
+        headers: dict | None = None,
+        validator: str | None = None,
+        response_headers=None,
+        block_size: int = 256 * 1024,
+        max_blocks: int = 4,
+    ):
+        super().__init__()
+        self.session = session
+        self.url = url
+        self.name = url
+        self.size = size
+        self.headers = dict(headers or {})
+        self.validator = validator
+        self.response_headers = response_headers or {}
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+
+        self.bytes_fetched = 0
+        self.requests = 0
+        self._pos = 0
+        # Recently fetched (start, data) ranges, most recent last
+        self._blocks: list[tuple[int, bytes]] = []
+
+    @classmethod
+    def probe(cls, session, url: str, headers: dict | None = None, timeout: int = 30) -> RemoteZipFile | None:
+        """HEAD the archive and return a RemoteZipFile, or None if Range is not honoured."""
+        headers = dict(headers or {})
+        head = session.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        head.raise_for_status()
+
+        size = int(head.headers.get('Content-Length') or 0)
+        if size <= 0:
+            return None
+
+        if head.headers.get('Accept-Ranges', '').lower() != 'bytes':
+            # Some servers honour Range without advertising it, so check with one byte
+            with session.get(head.url, headers={**headers, 'Range': 'bytes=0-0'}, stream=True, timeout=timeout) as response:
+                if response.status_code != 206:
+                    return None
+
+        return cls(session, head.url, size, headers, _range_validator(head.headers), head.headers)
+
+    def clone(self) -> RemoteZipFile:
+        """Independent reader for another thread; the probe is not repeated.
+
+        The clone starts with this reader's cached blocks, so a ZipFile opened
+        on it after this one has read the central directory parses it again
+        without another request.
+        """
+        clone = RemoteZipFile(
+            self.session, self.url, self.size, self.headers, self.validator, self.response_headers,
+            self.block_size, self.max_blocks,
+        )
+        clone._blocks = list(self._blocks)
+        return clone
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self._pos = offset
+        return self._pos
+
+    def _fetch(self, start: int, end: int) -> tuple[int, bytes]:
+        headers = {**self.headers, 'Range': f'bytes={start}-{end}'}
+        if self.validator:
+            # A changed object comes back as a full 200 instead of mixing two versions
+            headers['If-Range'] = self.validator
+
+        length = end - start + 1
+        # Streamed, so a 200 with the whole archive is closed instead of downloaded
+        with self.session.get(self.url, headers=headers, stream=True, timeout=60) as response:
+            self.requests += 1
+            if response.status_code != 206:
+                raise RangeNotSupported(f"expected 206 for {self.url}, got {response.status_code}")
+            buffer = bytearray()
+            # Exactly the requested length, even if the server sends more
+            while len(buffer) < length:
+                chunk = response.raw.read(length - len(buffer), decode_content=True)
+                if not chunk:
+                    break
+                buffer += chunk
+        data = bytes(buffer)
+        if len(data) != length:
+            raise IOError(f"short range read from {self.url}: {len(data)} of {length} bytes")
+
+        self.bytes_fetched += len(data)
+        self._blocks.append((start, data))
+        del self._blocks[:-self.max_blocks]
+        return start, data
+
+    def _block_at(self, pos: int, wanted: int) -> tuple[int, bytes]:
+        for start, data in reversed(self._blocks):
+            if start <= pos < start + len(data):
+                return start, data
+
+        if pos >= self.size - self.block_size:
+            # The end-of-central-directory lookup lands here first; one request
+            # for the tail usually covers the whole central directory as well
+            return self._fetch(max(0, self.size - self.block_size), self.size - 1)
+        return self._fetch(pos, min(self.size, pos + max(wanted, self.block_size)) - 1)
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self.size or len(buffer) == 0:
+            return 0
+
+        start, data = self._block_at(self._pos, len(buffer))
+        offset = self._pos - start
+        count = min(len(buffer), len(data) - offset)
+        buffer[:count] = data[offset:offset + count]
+        self._pos += count
+        return count
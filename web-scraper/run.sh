@@ -29,11 +29,24 @@ Usage:
 
 Global options:
     --skip-install                     Skip venv / dependency setup
+    --metrics-dir DIR                  Write run metrics (JSON lines + .prom) for scrape, upload, download
     -h, --help                         Show this help
 
 Scrape options:
     -y, --year YEAR                    Year to scrape (default: current year)
+    --years RANGE                      Backfill several years, e.g. 2015-2026
     -u, --upload                       Upload to R2 (default: save in ./files)
+    -j, --jobs N                       Concurrent ZIP downloads (default: 1, sequential)
+    --extract-jobs N                   Concurrent ZIP extractions when --jobs > 1
+    --upload-jobs N                    Concurrent PDF uploads when --jobs > 1
+    --host-jobs N                      Concurrent ZIP transfers per host with --years
+    --resume                           Re-run only unfinished ZIPs/members from the state store
+    --engine threads|async             Transfer engine (default: threads; async needs aiohttp)
+    --no-cache                         Skip the conditional-GET listing cache
+    --recheck                          HEAD seen ZIPs, re-download re-published ones
+    --stream                           Stream PDFs out of the ZIP (no temp extraction)
+    --ranged                           Fetch only wanted ZIP members via HTTP Range
+    --plan                             List the R2 keys each remote ZIP would produce
     -w, --worker-url URL               Override worker URL
     -p, --password PASS                Override upload password
 
@@ -43,6 +56,11 @@ Upload options:
     -k, --key KEY                      Explicit R2 key (single file only)
     --deploy                           Trigger deploy after successful uploads
     --dry-run                          Print planned uploads, no API calls
+    -j, --jobs N                       Concurrent uploads (default: 1, sequential)
+    --rate N                           POSTs per minute with --jobs (default: 60)
+    --batch N                          Files per request, one index update each (max 50)
+    --delta                            Only upload new or changed files
+    --verify                           With --delta, re-check every file on the worker
     -w, --worker-url URL               Override worker URL
     -p, --password PASS                Override upload password
 
@@ -68,6 +86,9 @@ Download options:
     -y, --year YEAR                   Filter to a specific year
     --output-dir DIR                  Where to save files (default: ./files)
     --dry-run                         List files without downloading
+    -j, --jobs N                      Concurrent downloads (default: 1)
+    --sync                            Only fetch keys new/changed since the last sync
+    --delete                          With --sync, remove local files gone from the worker
     -w, --worker-url URL              Override worker URL
 EOF
 }
@@ -136,6 +157,42 @@ run_scrape() {
   if [[ -n "$SCRAPE_PASSWORD" ]]; then
     cmd+=(--password "$SCRAPE_PASSWORD")
   fi
+  if [[ "$SCRAPE_JOBS" -gt 1 ]]; then
+    cmd+=(--jobs "$SCRAPE_JOBS")
+  fi
+  if [[ -n "$SCRAPE_EXTRACT_JOBS" ]]; then
+    cmd+=(--extract-jobs "$SCRAPE_EXTRACT_JOBS")
+  fi
+  if [[ -n "$SCRAPE_UPLOAD_JOBS" ]]; then
+    cmd+=(--upload-jobs "$SCRAPE_UPLOAD_JOBS")
+  fi
+  if [[ -n "$SCRAPE_YEARS" ]]; then
+    cmd+=(--years "$SCRAPE_YEARS")
+  fi
+  if [[ -n "$SCRAPE_HOST_JOBS" ]]; then
+    cmd+=(--host-jobs "$SCRAPE_HOST_JOBS")
+  fi
+  if [[ -n "$SCRAPE_ENGINE" ]]; then
+    cmd+=(--engine "$SCRAPE_ENGINE")
+  fi
+  if [[ "$SCRAPE_RESUME" -eq 1 ]]; then
+    cmd+=(--resume)
+  fi
+  if [[ "$SCRAPE_NO_CACHE" -eq 1 ]]; then
+    cmd+=(--no-cache)
+  fi
+  if [[ "$SCRAPE_RECHECK" -eq 1 ]]; then
+    cmd+=(--recheck)
+  fi
+  if [[ "$SCRAPE_STREAM" -eq 1 ]]; then
+    cmd+=(--stream)
+  fi
+  if [[ "$SCRAPE_RANGED" -eq 1 ]]; then
+    cmd+=(--ranged)
+  fi
+  if [[ "$SCRAPE_PLAN" -eq 1 ]]; then
+    cmd+=(--plan)
+  fi
 
   echo "Running scraper..."
   "${cmd[@]}"
@@ -171,6 +228,21 @@ run_upload() {
   if [[ "$UPLOAD_DRY_RUN" -eq 1 ]]; then
     cmd+=(--dry-run)
   fi
+  if [[ "$UPLOAD_JOBS" -gt 1 ]]; then
+    cmd+=(--jobs "$UPLOAD_JOBS")
+  fi
+  if [[ -n "$UPLOAD_RATE" ]]; then
+    cmd+=(--rate "$UPLOAD_RATE")
+  fi
+  if [[ -n "$UPLOAD_BATCH" ]]; then
+    cmd+=(--batch "$UPLOAD_BATCH")
+  fi
+  if [[ "$UPLOAD_DELTA" -eq 1 ]]; then
+    cmd+=(--delta)
+  fi
+  if [[ "$UPLOAD_VERIFY" -eq 1 ]]; then
+    cmd+=(--verify)
+  fi
 
   echo "Running uploader..."
   "${cmd[@]}"
@@ -329,6 +401,15 @@ run_download() {
   if [[ "$DOWNLOAD_DRY_RUN" -eq 1 ]]; then
     cmd+=(--dry-run)
   fi
+  if [[ "$DOWNLOAD_JOBS" -gt 1 ]]; then
+    cmd+=(--jobs "$DOWNLOAD_JOBS")
+  fi
+  if [[ "$DOWNLOAD_SYNC" -eq 1 ]]; then
+    cmd+=(--sync)
+  fi
+  if [[ "$DOWNLOAD_DELETE" -eq 1 ]]; then
+    cmd+=(--delete)
+  fi
 
   echo "Running download..."
   "${cmd[@]}"
@@ -467,12 +548,29 @@ SCRAPE_YEAR="$(date +%Y)"
 SCRAPE_UPLOAD=0
 SCRAPE_WORKER_URL=""
 SCRAPE_PASSWORD=""
+SCRAPE_JOBS=1
+SCRAPE_EXTRACT_JOBS=""
+SCRAPE_UPLOAD_JOBS=""
+SCRAPE_YEARS=""
+SCRAPE_HOST_JOBS=""
+SCRAPE_ENGINE=""
+SCRAPE_RESUME=0
+SCRAPE_NO_CACHE=0
+SCRAPE_RECHECK=0
+SCRAPE_STREAM=0
+SCRAPE_RANGED=0
+SCRAPE_PLAN=0
 
 UPLOAD_FILES=()
 UPLOAD_BASE_DIR="./files"
 UPLOAD_KEY=""
 UPLOAD_DEPLOY=0
 UPLOAD_DRY_RUN=0
+UPLOAD_JOBS=1
+UPLOAD_RATE=""
+UPLOAD_BATCH=""
+UPLOAD_DELTA=0
+UPLOAD_VERIFY=0
 UPLOAD_WORKER_URL=""
 UPLOAD_PASSWORD=""
 
@@ -493,6 +591,9 @@ DOWNLOAD_PAGE=""
 DOWNLOAD_YEAR=""
 DOWNLOAD_OUTPUT_DIR="./files"
 DOWNLOAD_DRY_RUN=0
+DOWNLOAD_JOBS=1
+DOWNLOAD_SYNC=0
+DOWNLOAD_DELETE=0
 DOWNLOAD_WORKER_URL=""
 DOWNLOAD_PASSWORD=""
 
@@ -525,6 +626,11 @@ while [[ $# -gt 0 ]]; do
       SKIP_INSTALL=1
       shift
       ;;
+    --metrics-dir)
+      # Read by main.py, upload_local_files.py and download_from_worker.py
+      export METRICS_DIR="${2:-}"
+      shift 2
+      ;;
     -h | --help)
       show_usage
       exit 0
@@ -542,6 +648,58 @@ while [[ $# -gt 0 ]]; do
       SCRAPE_UPLOAD=1
       shift
       ;;
+    -j | --jobs)
+      case "$MODE" in
+        download) DOWNLOAD_JOBS="${2:-1}" ;;
+        upload) UPLOAD_JOBS="${2:-1}" ;;
+        *) SCRAPE_JOBS="${2:-1}" ;;
+      esac
+      shift 2
+      ;;
+    --extract-jobs)
+      SCRAPE_EXTRACT_JOBS="${2:-}"
+      shift 2
+      ;;
+    --upload-jobs)
+      SCRAPE_UPLOAD_JOBS="${2:-}"
+      shift 2
+      ;;
+    --years)
+      SCRAPE_YEARS="${2:-}"
+      shift 2
+      ;;
+    --host-jobs)
+      SCRAPE_HOST_JOBS="${2:-}"
+      shift 2
+      ;;
+    --engine)
+      SCRAPE_ENGINE="${2:-}"
+      shift 2
+      ;;
+    --resume)
+      SCRAPE_RESUME=1
+      shift
+      ;;
+    --no-cache)
+      SCRAPE_NO_CACHE=1
+      shift
+      ;;
+    --recheck)
+      SCRAPE_RECHECK=1
+      shift
+      ;;
+    --stream)
+      SCRAPE_STREAM=1
+      shift
+      ;;
+    --ranged)
+      SCRAPE_RANGED=1
+      shift
+      ;;
+    --plan)
+      SCRAPE_PLAN=1
+      shift
+      ;;
 
     # Shared — dispatched by current mode
     -w | --worker-url)
@@ -584,6 +742,22 @@ while [[ $# -gt 0 ]]; do
       UPLOAD_DEPLOY=1
       shift
       ;;
+    --rate)
+      UPLOAD_RATE="${2:-}"
+      shift 2
+      ;;
+    --batch)
+      UPLOAD_BATCH="${2:-}"
+      shift 2
+      ;;
+    --delta)
+      UPLOAD_DELTA=1
+      shift
+      ;;
+    --verify)
+      UPLOAD_VERIFY=1
+      shift
+      ;;
     --dry-run)
       case "$MODE" in
         cleanup-index) CLEANUP_DRY_RUN=1 ;;
@@ -622,6 +796,14 @@ while [[ $# -gt 0 ]]; do
       DOWNLOAD_OUTPUT_DIR="${2:-}"
       shift 2
       ;;
+    --sync)
+      DOWNLOAD_SYNC=1
+      shift
+      ;;
+    --delete)
+      DOWNLOAD_DELETE=1
+      shift
+      ;;
 
     # Preview
     --files-dir)
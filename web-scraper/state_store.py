@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""SQLite run state: the status of every ZIP and of every PDF inside it.
+
+seen_urls.txt could only say "some PDF of this ZIP was stored once", and it
+was written when the run ended. Here each ZIP URL and each LRO member has its
+own row with a status and an attempt count. Every change is committed as soon
+as it happens, so a crash keeps what was done, and a later run re-processes
+only the members that did not make it.
+
+ZIP status:     discovered -> downloaded -> uploaded | failed
+Member status:  discovered -> downloaded -> uploaded | failed | skipped
+
+A ZIP is "downloaded" once its member list has been read. It becomes
+"uploaded" when every member is uploaded or skipped (no known subject), and
+only those ZIPs count as seen. seen_urls.txt is imported into a new store once
+and is still written at the end of a run, as a sorted export of finished ZIPs.
+
+Uploads are stored with the worker's index update deferred; their keys wait
+in `unindexed` until a batch commit adds them to the index, so a crash
+between the two leaves them queued for the next run instead of lost.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DISCOVERED = 'discovered'
+DOWNLOADED = 'downloaded'
+UPLOADED = 'uploaded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+# Member states that need no further work
+MEMBER_DONE = (UPLOADED, SKIPPED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS zips (
+    url TEXT PRIMARY KEY,
+    year TEXT,
+    exam_type TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    zip_url TEXT NOT NULL REFERENCES zips(url) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (zip_url, name)
+);
+CREATE TABLE IF NOT EXISTS unindexed (
+    key TEXT PRIMARY KEY,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS zips_status ON zips(status);
+"""
+
+
+class StateStore:
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the pipeline threads; the lock serialises them
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute('PRAGMA foreign_keys=ON')
+            self.connection.executescript(SCHEMA)
+
+    def _execute(self, sql: str, parameters=()) -> list[tuple]:
+        with self.lock, self.connection:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    # ── seen_urls.txt ────────────────────────────────────────────────────────────
+
+    def import_seen_urls(self, seen_urls_file: Path) -> int:
+        """Load seen_urls.txt as finished ZIPs, once per store; returns the number imported."""
+        with self.lock, self.connection:
+            if self.connection.execute("SELECT 1 FROM meta WHERE key = 'seen_urls_imported'").fetchone():
+                return 0
+            urls = []
+            if seen_urls_file.exists():
+                with open(seen_urls_file, 'r', encoding='utf-8') as f:
+                    urls = [line.strip() for line in f if line.strip()]
+            now = time.time()
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO zips (url, status, attempts, updated_at) VALUES (?, ?, 1, ?)",
+                [(url, UPLOADED, now) for url in urls],
+            )
+            self.connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('seen_urls_imported', ?)", (str(now),)
+            )
+        return len(urls)
+
+    def finished_urls(self) -> set[str]:
+        return {url for url, in self._execute("SELECT url FROM zips WHERE status = ?", (UPLOADED,))}
+
+    # ── ZIPs ─────────────────────────────────────────────────────────────────────
+
+    def begin_zip(self, url: str, year: str, exam_type: str) -> None:
+        """Start an attempt at a ZIP; members already uploaded keep their status."""
+        self._execute(
+            """
+            INSERT INTO zips (url, year, exam_type, status, attempts, updated_at) VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                year = excluded.year, exam_type = excluded.exam_type, status = excluded.status,
+                attempts = attempts + 1, error = NULL, updated_at = excluded.updated_at
+            """,
+            (url, year, exam_type, DISCOVERED, time.time()),
+        )
+
+    def fail_zip(self, url: str, error: str) -> None:
+        self._execute(
+            "UPDATE zips SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+            (FAILED, error, time.time(), url),
+        )
+
+    def finish_zip(self, url: str) -> bool:
+        """Settle a ZIP after its members were processed; True if nothing is left to do."""
+        with self.lock, self.connection:
+            row = self.connection.execute("SELECT status FROM zips WHERE url = ?", (url,)).fetchone()
+            if row is None or row[0] == FAILED:
+                return False
+            if row[0] == DISCOVERED:
+                # The member list was never read: download or ZIP error
+                status, error = FAILED, 'ZIP could not be read'
+            else:
+                placeholders = ', '.join('?' * len(MEMBER_DONE))
+                (unfinished,) = self.connection.execute(
+                    f"SELECT COUNT(*) FROM members WHERE zip_url = ? AND status NOT IN ({placeholders})",
+                    (url, *MEMBER_DONE),
+                ).fetchone()
+                status = FAILED if unfinished else UPLOADED
+                error = f"{unfinished} member(s) not uploaded" if unfinished else None
+            self.connection.execute(
+                "UPDATE zips SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+                (status, error, time.time(), url),
+            )
+        return status == UPLOADED
+
+    def reset_zip(self, url: str) -> None:
+        """Forget a re-published ZIP's members so every one of them is stored again."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM members WHERE zip_url = ?", (url,))
+            self.connection.execute(
+                "UPDATE zips SET status = ?, updated_at = ? WHERE url = ?", (DISCOVERED, time.time(), url)
+            )
+
+    def unfinished_zips(self) -> list[tuple[str, str, str]]:
+        """(url, exam_type, year) of every ZIP that was started but is not finished."""
+        return self._execute(
+            "SELECT url, exam_type, year FROM zips WHERE status != ? AND year IS NOT NULL ORDER BY year, url",
+            (UPLOADED,),
+        )
+
+    # ── Members ──────────────────────────────────────────────────────────────────
+
+    def record_members(self, zip_url: str, names: list[str]) -> set[str]:
+        """Register the LRO members of a ZIP; returns the names that still need work."""
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO members (zip_url, name, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(zip_url, name, DISCOVERED, now) for name in names],
+            )
+            self.connection.execute(
+                "UPDATE zips SET status = ?, updated_at = ? WHERE url = ? AND status = ?",
+                (DOWNLOADED, now, zip_url, DISCOVERED),
+            )
+            done = {
+                name for name, in self.connection.execute(
+                    f"SELECT name FROM members WHERE zip_url = ? AND status IN ({', '.join('?' * len(MEMBER_DONE))})",
+                    (zip_url, *MEMBER_DONE),
+                )
+            }
+        return set(names) - done
+
+    def mark_member(self, zip_url: str, name: str, status: str, error: str | None = None) -> None:
+        """Record a member's new status; an upload attempt (uploaded/failed/skipped) counts."""
+        attempt = 0 if status == DOWNLOADED else 1
+        self._execute(
+            "UPDATE members SET status = ?, attempts = attempts + ?, error = ?, updated_at = ? "
+            "WHERE zip_url = ? AND name = ?",
+            (status, attempt, error, time.time(), zip_url, name),
+        )
+
+    # ── Deferred index commits ───────────────────────────────────────────────────
+
+    def defer_index(self, key: str) -> int:
+        """Queue a stored key for the next index commit; returns the queue length."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO unindexed (key, added_at) VALUES (?, ?)", (key, time.time())
+            )
+            (queued,) = self.connection.execute("SELECT COUNT(*) FROM unindexed").fetchone()
+        return queued
+
+    def unindexed_keys(self) -> list[str]:
+        return [key for key, in self._execute("SELECT key FROM unindexed ORDER BY added_at, key")]
+
+    def mark_indexed(self, keys: list[str]) -> None:
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM unindexed WHERE key = ?", [(key,) for key in keys])
+
+    # ── Reporting ────────────────────────────────────────────────────────────────
+
+    def counts(self) -> dict[str, dict[str, int]]:
+        return {
+            table: dict(self._execute(f"SELECT status, COUNT(*) FROM {table} GROUP BY status"))
+            for table in ('zips', 'members')
+        }
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
@@ -4,6 +4,10 @@
 
 import argparse
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 import sys
 
@@ -12,7 +16,16 @@ try:
 except ModuleNotFoundError:
     requests = None
 
-from utils import build_bearer_auth_header, create_retry_session, load_local_env
+from batch_upload import MAX_BATCH_FILES, plan_batches, send_batch
+from metrics import Metrics
+from upload_manifest import UploadManifest
+from utils import (
+    RETRY_STATUS_CODES, AdaptiveConcurrency, RateLimiter, build_bearer_auth_header, create_retry_session,
+    load_local_env, multipart_files, retry_backoff,
+)
+
+# The worker's RATE_LIMITER binding: 60 POSTs per 60 s per client IP (cuza-worker/wrangler.toml)
+WORKER_POSTS_PER_MINUTE = 60
 
 
 def ensure_requests_installed() -> None:
@@ -30,16 +43,25 @@ def auth_header(password: str) -> dict:
     return build_bearer_auth_header('scraper', password)
 
 
-def upload_file(session, worker_url: str, password: str, file_path: Path, key: str) -> bool:
+def send_file(session, worker_url: str, password: str, file_path: Path, key: str, idempotency_key: str | None = None):
+    headers = auth_header(password)
+    if idempotency_key:
+        # The file's SHA-256: a re-sent upload of the same bytes is a no-op on the worker
+        headers['Idempotency-Key'] = idempotency_key
+    with multipart_files({'key': key}, [('file', file_path)]) as body:
+        return session.post(
+            f"{worker_url.rstrip('/')}/upload-scraper",
+            headers={**headers, 'Content-Type': body.content_type},
+            data=body,
+            timeout=120,
+        )
+
+
+def upload_file(
+    session, worker_url: str, password: str, file_path: Path, key: str, idempotency_key: str | None = None
+) -> bool:
     try:
-        with file_path.open('rb') as file_handle:
-            response = session.post(
-                f"{worker_url.rstrip('/')}/upload-scraper",
-                headers=auth_header(password),
-                files={'file': (file_path.name, file_handle, 'application/pdf')},
-                data={'key': key},
-                timeout=120,
-            )
+        response = send_file(session, worker_url, password, file_path, key, idempotency_key)
     except requests.RequestException as error:
         print(f"Upload error for {file_path}: {error}")
         return False
@@ -52,6 +74,232 @@ def upload_file(session, worker_url: str, password: str, file_path: Path, key: s
     return False
 
 
+def fetch_index_keys(session, worker_url: str) -> set[str] | None:
+    """Every key in the worker's /index, or None if it could not be read."""
+    try:
+        response = session.get(f"{worker_url.rstrip('/')}/index", timeout=60)
+        response.raise_for_status()
+        index = response.json()
+    except (requests.RequestException, ValueError) as error:
+        print(f'Could not read the worker index ({error}); checking files one by one')
+        return None
+
+    keys = set()
+    branches = [index]
+    while branches:
+        for value in branches.pop().values():
+            if isinstance(value, dict):
+                branches.append(value)
+            elif isinstance(value, str):
+                keys.add(value)
+    return keys
+
+
+def remote_matches(session, worker_url: str, key: str, size: int, sha256: str, md5: str) -> bool:
+    """True if the worker already stores these bytes under `key` (HEAD /file/<key>)."""
+    try:
+        response = session.head(f"{worker_url.rstrip('/')}/file/{key}", timeout=30)
+    except requests.RequestException:
+        return False
+    if response.status_code != 200:
+        return False
+
+    remote_sha256 = response.headers.get('X-Content-SHA256')
+    if remote_sha256:
+        return remote_sha256.lower() == sha256
+    # Stored without an Idempotency-Key: the ETag of a single-part R2 upload is its MD5
+    etag = response.headers.get('ETag', '').strip('"')
+    return response.headers.get('Content-Length') == str(size) and etag == md5
+
+
+def plan_delta(
+    session, worker_url: str, uploads: list[tuple[Path, str]], manifest: UploadManifest, verify: bool, jobs: int
+) -> tuple[list[tuple[Path, str]], dict[str, tuple[str, str]]]:
+    """Drop the files the worker already has; returns the pending uploads and every file's digests."""
+    index_keys = fetch_index_keys(session, worker_url)
+
+    def check(upload: tuple[Path, str]) -> tuple[str, tuple[str, str]]:
+        path, key = upload
+        sha256, md5 = manifest.digests(path, key)
+        if index_keys is not None and key not in index_keys:
+            return 'new', (sha256, md5)
+        if not verify and manifest.is_uploaded(key, sha256):
+            return 'cached', (sha256, md5)
+        if remote_matches(session, worker_url, key, path.stat().st_size, sha256, md5):
+            manifest.record(key, path, sha256, md5)
+            return 'verified', (sha256, md5)
+        return 'changed', (sha256, md5)
+
+    # HEADs are not POSTs, so the worker's rate limit does not apply to them
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(executor.map(check, uploads))
+
+    pending = [upload for upload, (status, _) in zip(uploads, results) if status in ('new', 'changed')]
+    digests = {key: digest for (_, key), (_, digest) in zip(uploads, results)}
+    counts = {status: sum(1 for result, _ in results if result == status) for status in ('new', 'changed', 'cached', 'verified')}
+    print(
+        f"Delta: {counts['new']} new, {counts['changed']} changed, "
+        f"{counts['cached'] + counts['verified']} unchanged "
+        f"({counts['cached']} from the manifest, {counts['verified']} verified on the worker); "
+        f"hashed {manifest.hashed} file(s)"
+    )
+    return pending, digests
+
+
+class BulkReport:
+    """Counters for a --jobs or --batch run, shared by the upload threads."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.uploaded = 0
+        self.bytes = 0
+        self.failed: list[str] = []
+        self.retried: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def print(self, total: int, concurrency: AdaptiveConcurrency) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        print(
+            f'Completed uploads: {self.uploaded}/{total} in {elapsed:.1f}s '
+            f'({self.uploaded / elapsed:.2f} files/s, {self.bytes / elapsed / (1024 * 1024):.2f} MB/s)'
+        )
+        if concurrency.reductions:
+            print(f'429 responses cut concurrency {concurrency.reductions} time(s), ending at {concurrency.limit}')
+        if self.retried:
+            print(f'Retried {len(self.retried)} key(s):')
+            for key, retries in sorted(self.retried.items()):
+                print(f'  {key} ({retries} retr{"y" if retries == 1 else "ies"})')
+        if self.failed:
+            print(f'Failed {len(self.failed)} key(s):')
+            for key in sorted(self.failed):
+                print(f'  {key}')
+
+
+def upload_paced(
+    send, files: list[tuple[Path, str]], limiter: RateLimiter, concurrency: AdaptiveConcurrency,
+    report: BulkReport, attempts: int = 5, already_stored=None, on_uploaded=None,
+) -> bool:
+    """Send one request (a file or a batch) inside the run's rate limit; a 429 shrinks the pool and is retried.
+
+    `send()` makes the POST. `already_stored()`, if given, is asked before a
+    retry whether the failed attempt was stored after all.
+    """
+    stored = False
+    for attempt in range(1, attempts + 1):
+        # Check before sending the whole body again
+        if attempt > 1 and already_stored and already_stored():
+            stored = True
+            break
+
+        with concurrency.slot():
+            limiter.acquire()
+            try:
+                response = send()
+            except requests.RequestException as error:
+                response, failure = None, str(error)
+
+        if response is not None and response.ok:
+            stored = True
+            break
+
+        if response is not None:
+            failure = f"{response.status_code}: {response.text}"
+            if response.status_code == 429:
+                concurrency.throttled()
+            if response.status_code not in RETRY_STATUS_CODES:
+                break
+        if attempt < attempts:
+            with report.lock:
+                for _path, key in files:
+                    report.retried[key] = report.retried.get(key, 0) + 1
+            retry_after = response.headers.get('Retry-After') if response is not None else None
+            time.sleep(retry_backoff(attempt + 1, retry_after=retry_after))
+
+    if not stored:
+        label = files[0][0] if len(files) == 1 else f'batch of {len(files)} file(s) from {files[0][0]}'
+        print(f"Upload failed for {label} ({failure})")
+        with report.lock:
+            report.failed.extend(key for _path, key in files)
+        return False
+
+    concurrency.succeeded()
+    with report.lock:
+        report.uploaded += len(files)
+        report.bytes += sum(path.stat().st_size for path, _key in files)
+    for path, key in files:
+        print(f"Uploaded: {path} -> {key}")
+        if on_uploaded:
+            on_uploaded(path, key)
+    return True
+
+
+def upload_bulk(
+    worker_url: str, password: str, uploads: list[tuple[Path, str]], jobs: int, posts_per_minute: int,
+    digests: dict[str, tuple[str, str]] | None = None, on_uploaded=None, batch_size: int = 0,
+    metrics: Metrics | None = None,
+) -> BulkReport:
+    metrics = metrics or Metrics('upload')
+    # 429 is left to upload_paced, so the pool can shrink instead of the adapter sleeping on it
+    session = create_retry_session(
+        pool_maxsize=max(10, jobs), status_forcelist=RETRY_STATUS_CODES - {429}, metrics=metrics
+    )
+    limiter = RateLimiter(posts_per_minute, 60.0)
+    concurrency = AdaptiveConcurrency(jobs)
+    report = BulkReport()
+
+    def single(path: Path, key: str):
+        file_digests = digests.get(key) if digests else None
+        send = partial(send_file, session, worker_url, password, path, key, file_digests[0] if file_digests else None)
+        already_stored = None
+        if file_digests:
+            already_stored = partial(remote_matches, session, worker_url, key, path.stat().st_size, *file_digests)
+        return send, [(path, key)], already_stored
+
+    def batch(files: list[tuple[Path, str]]):
+        sha256s = {key: digests[key][0] for _path, key in files} if digests else None
+        send = partial(send_batch, session, worker_url, auth_header(password), files, sha256s)
+        return send, files, None
+
+    def paced(send, files: list[tuple[Path, str]], already_stored) -> None:
+        with metrics.stage('upload') as stage:
+            ok = upload_paced(
+                send, files, limiter, concurrency, report, already_stored=already_stored, on_uploaded=on_uploaded,
+            )
+            with report.lock:
+                # Attempts repeated by upload_paced; the adapter's own retries are counted by the session hook
+                stage.retries += max(report.retried.get(key, 0) for _path, key in files)
+            if ok:
+                stage.items, stage.bytes = len(files), sum(path.stat().st_size for path, _key in files)
+            else:
+                stage.errors = 1
+
+    if batch_size:
+        units = [batch(files) for files in plan_batches(uploads, batch_size)]
+        requests_label = f'{len(units)} batch request(s)'
+    else:
+        units = [single(path, key) for path, key in uploads]
+        requests_label = f'{len(units)} request(s)'
+
+    print(
+        f'Uploading {len(uploads)} file(s) in {requests_label} with {jobs} job(s), '
+        f'at most {posts_per_minute} POST(s)/min'
+    )
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(paced, send, files, already_stored): files for send, files, already_stored in units}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as error:
+                # e.g. a file that vanished or shrank mid-upload, or a failing on_uploaded
+                files = futures[future]
+                label = files[0][0] if len(files) == 1 else f'batch of {len(files)} file(s) from {files[0][0]}'
+                print(f"Upload failed for {label} ({error!r})")
+                with report.lock:
+                    report.failed.extend(key for _path, key in files)
+    report.print(len(uploads), concurrency)
+    return report
+
+
 def trigger_deploy(session, worker_url: str, password: str) -> bool:
     try:
         response = session.post(
@@ -115,7 +363,7 @@ def main() -> int:
     script_dir = Path(__file__).parent
     load_local_env(script_dir / '.env')
     ensure_requests_installed()
-    session = create_retry_session()
+    metrics = Metrics('upload')
 
     default_password = (
         os.environ.get('UPLOAD_PASSWORD')
@@ -131,7 +379,29 @@ def main() -> int:
     parser.add_argument('--key', '-k', default=None, help='Explicit R2 key (allowed only when uploading one file)')
     parser.add_argument('--deploy', action='store_true', help='Trigger deploy after successful uploads')
     parser.add_argument('--dry-run', action='store_true', help='Show planned uploads without sending files')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Concurrent uploads (default: 1)')
+    parser.add_argument(
+        '--rate', type=int, default=WORKER_POSTS_PER_MINUTE,
+        help=f'POSTs per minute for this run with --jobs or --batch (default: {WORKER_POSTS_PER_MINUTE}, the worker rate limit)'
+    )
+    parser.add_argument(
+        '--batch', type=int, default=0, metavar='N',
+        help=f'Send up to N files per request, with one index update each (max {MAX_BATCH_FILES})'
+    )
+    parser.add_argument(
+        '--delta', action='store_true',
+        help='Only upload files that are new or changed, by the upload manifest, /index and HEAD checks'
+    )
+    parser.add_argument(
+        '--verify', action='store_true', help='With --delta, check every file on the worker even if the manifest has it'
+    )
+    parser.add_argument(
+        '--metrics-dir', type=Path, default=os.environ.get('METRICS_DIR') or None,
+        help='Append per-stage metrics to upload.jsonl and write cuza_upload.prom here at the end of the run'
+    )
     args = parser.parse_args()
+    # plan_delta sends --jobs HEADs at once, like the upload session
+    session = create_retry_session(pool_maxsize=max(10, args.jobs), metrics=metrics)
 
     if not args.dry_run and not args.password:
         print('Error: Upload password is required. Set UPLOAD_PASSWORD env var or use --password.')
@@ -153,36 +423,69 @@ def main() -> int:
 
     base_dir = Path(args.base_dir).expanduser().resolve()
 
-    if args.dry_run:
-        print(f'Dry run: {len(file_paths)} file(s) would be uploaded')
-        for path in file_paths:
-            try:
-                key = derive_key(path, base_dir, args.key)
-            except ValueError as error:
-                print(f'Error: {error}')
-                return 1
-            print(f'  {path} -> {key}')
-        if args.deploy:
-            print('  Deploy trigger would run after successful uploads.')
-        return 0
-
-    success_count = 0
+    uploads = []
     for path in file_paths:
         try:
-            key = derive_key(path, base_dir, args.key)
+            uploads.append((path, derive_key(path, base_dir, args.key)))
         except ValueError as error:
             print(f'Error: {error}')
             return 1
 
-        if upload_file(session, args.worker_url, args.password, path, key):
-            success_count += 1
+    manifest = digests = None
+    if args.delta:
+        manifest = UploadManifest(script_dir / '.cache' / 'upload-manifest.json', args.worker_url)
+        with metrics.stage('delta') as stage:
+            stage.items = len(uploads)
+            uploads, digests = plan_delta(session, args.worker_url, uploads, manifest, args.verify, args.jobs)
 
-    print(f'Completed uploads: {success_count}/{len(file_paths)}')
+    if args.dry_run:
+        print(f'Dry run: {len(uploads)} file(s) would be uploaded')
+        for path, key in uploads:
+            print(f'  {path} -> {key}')
+        if args.deploy:
+            print('  Deploy trigger would run after successful uploads.')
+        return 0
+
+    def record_upload(path: Path, key: str) -> None:
+        if manifest is not None:
+            manifest.record(key, path, *digests[key])
+
+    try:
+        if args.jobs > 1 or args.batch:
+            # The deploy trigger is a POST too, so it takes one request from the budget
+            rate = max(1, args.rate - int(args.deploy))
+            report = upload_bulk(
+                args.worker_url, args.password, uploads, args.jobs, rate, digests=digests,
+                on_uploaded=record_upload, batch_size=args.batch, metrics=metrics,
+            )
+            # A unit that raised after its POST succeeded counts as uploaded and as failed
+            success_count = min(report.uploaded, len(uploads) - len(set(report.failed)))
+        else:
+            success_count = 0
+            for path, key in uploads:
+                idempotency_key = digests[key][0] if digests else None
+                with metrics.stage('upload') as stage:
+                    if upload_file(session, args.worker_url, args.password, path, key, idempotency_key):
+                        record_upload(path, key)
+                        success_count += 1
+                        stage.items, stage.bytes = 1, path.stat().st_size
+                    else:
+                        stage.errors = 1
+
+            print(f'Completed uploads: {success_count}/{len(uploads)}')
+    finally:
+        if manifest is not None:
+            manifest.save()
 
     if success_count > 0 and args.deploy:
-        trigger_deploy(session, args.worker_url, args.password)
+        with metrics.stage('deploy') as stage:
+            stage.errors = int(not trigger_deploy(session, args.worker_url, args.password))
 
-    return 0 if success_count == len(file_paths) else 1
+    if args.metrics_dir:
+        metrics.write(
+            args.metrics_dir, success=success_count == len(uploads), files=len(uploads), uploaded=success_count
+        )
+    return 0 if success_count == len(uploads) else 1
 
 
 if __name__ == '__main__':
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""Manifest of local PDFs already uploaded by upload_local_files.py --delta.
+
+For every key stored on a worker it keeps the SHA-256 and MD5 of the bytes
+that were sent, plus the size and mtime of the local file they were read
+from. A file whose size and mtime did not change is not hashed again, and a
+key whose recorded SHA-256 matches the local file is not uploaded again.
+Entries are grouped by worker URL, so a local preview and production keep
+separate records.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+
+from utils import load_json_file, utc_now, write_json_atomic
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digests(path: Path) -> tuple[str, str]:
+    """(sha256, md5) hex digests of a file, read once."""
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with path.open('rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha256.update(chunk)
+            md5.update(chunk)
+    return sha256.hexdigest(), md5.hexdigest()
+
+
+class UploadManifest:
+    def __init__(self, manifest_file: Path, worker_url: str):
+        self.manifest_file = manifest_file
+        self.data: dict[str, dict] = load_json_file(manifest_file, {})
+        # key -> {'size': int, 'mtime_ns': int, 'sha256': str, 'md5': str, 'uploaded_at': str}
+        self.files: dict[str, dict] = self.data.setdefault(worker_url.rstrip('/'), {})
+        self.lock = threading.Lock()
+        self.hashed = 0
+
+    def digests(self, path: Path, key: str) -> tuple[str, str]:
+        """Digests of the file for `key`, reused from the manifest while its size and mtime hold."""
+        stat = path.stat()
+        with self.lock:
+            entry = self.files.get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256'], entry['md5']
+        self.hashed += 1
+        return file_digests(path)
+
+    def is_uploaded(self, key: str, sha256: str) -> bool:
+        with self.lock:
+            entry = self.files.get(key)
+            return bool(entry) and entry['sha256'] == sha256
+
+    def record(self, key: str, path: Path, sha256: str, md5: str) -> None:
+        stat = path.stat()
+        with self.lock:
+            self.files[key] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': sha256,
+                'md5': md5,
+                'uploaded_at': utc_now(),
+            }
+
+    def save(self) -> None:
+        with self.lock:
+            write_json_atomic(self.manifest_file, self.data)
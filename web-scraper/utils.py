@@ -4,8 +4,24 @@
 from __future__ import annotations
 
 import base64
+import bisect
+import hashlib
+import json
 import os
+import secrets
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+# Retry rules shared by the requests adapter and the asyncio engine
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+RETRY_METHODS = frozenset(['GET', 'POST'])
+RETRY_BACKOFF_MAX = 120.0
 
 
 def load_local_env(env_path: Path) -> None:
@@ -25,12 +41,282 @@ def load_local_env(env_path: Path) -> None:
             os.environ[key] = value
 
 
+def load_json_file(path: Path, default: Any) -> Any:
+    """Read a JSON state file, returning `default` if it is missing or corrupt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write JSON next to `path` and rename it into place, so a crash never leaves half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def utc_now() -> str:
+    # Same shape as the worker's Date.toISOString(), so timestamps compare as strings
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class MultipartStream:
+    """multipart/form-data body, generated while it is sent.
+
+    Text fields are encoded up front; file parts are read `chunk_size` bytes
+    at a time, so memory stays at one chunk whatever the file sizes and the
+    number of files. The total length is computed from the declared sizes,
+    which lets requests send a Content-Length header instead of buffering the
+    body. seek()/tell() let urllib3 rewind the body on retries.
+
+    `files` lists (field, filename, fileobj, size) parts, each file object
+    positioned at its start.
+    """
+
+    def __init__(
+        self,
+        fields: dict[str, str],
+        files: list[tuple[str, str, Any, int]],
+        content_type: str = 'application/pdf',
+        chunk_size: int = 64 * 1024,
+    ):
+        boundary = secrets.token_hex(16)
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        self.chunk_size = chunk_size
+
+        # Alternating encoded text and (fileobj, size) file segments
+        self._segments: list[bytes | tuple[Any, int]] = []
+        text = b''.join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+            for name, value in fields.items()
+        )
+        for field, filename, fileobj, size in files:
+            text += (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                f'filename="{filename.replace(chr(34), "%22")}"\r\nContent-Type: {content_type}\r\n\r\n'
+            ).encode('utf-8')
+            self._segments += [text, (fileobj, size)]
+            text = b'\r\n'
+        self._segments.append(text + f'--{boundary}--\r\n'.encode('utf-8'))
+
+        self._starts = []
+        self._length = 0
+        for segment in self._segments:
+            self._starts.append(self._length)
+            self._length += len(segment) if isinstance(segment, bytes) else segment[1]
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        while chunk := self.read(self.chunk_size):
+            yield chunk
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._length
+        self._pos = max(0, min(offset, self._length))
+
+        # Files at or after the new position are read again from the right offset
+        for start, segment in zip(self._starts, self._segments):
+            if not isinstance(segment, bytes) and start + segment[1] > self._pos:
+                segment[0].seek(max(0, self._pos - start))
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length - self._pos
+
+        parts = []
+        while size > 0 and self._pos < self._length:
+            index = bisect.bisect_right(self._starts, self._pos) - 1
+            segment, start = self._segments[index], self._starts[index]
+            offset = self._pos - start
+            if isinstance(segment, bytes):
+                data = segment[offset:offset + size]
+            else:
+                fileobj, file_size = segment
+                data = fileobj.read(min(size, file_size - offset))
+                if not data:
+                    raise IOError('file part ended before its declared size')
+            parts.append(data)
+            self._pos += len(data)
+            size -= len(data)
+        return b''.join(parts)
+
+
+@contextmanager
+def multipart_files(fields: dict[str, str], files: list[tuple[str, Path]], content_type: str = 'application/pdf'):
+    """A MultipartStream over local files, which stay open for the `with` block."""
+    with ExitStack() as stack:
+        parts = []
+        for field, path in files:
+            handle = stack.enter_context(open(path, 'rb'))
+            parts.append((field, path.name, handle, os.fstat(handle.fileno()).st_size))
+        yield MultipartStream(fields, parts, content_type)
+
+
+class HashingReader:
+    """Read-through wrapper that SHA-256 hashes a binary stream as it is consumed.
+
+    Rewinding to the start (as MultipartStream does on a retry) restarts the
+    hash; any other seek makes hexdigest() return None.
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._sha256 = hashlib.sha256()
+        self._valid = True
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self._sha256.update(data)
+        self.size += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        position = self._fileobj.seek(offset, whence)
+        if position == 0:
+            self._sha256 = hashlib.sha256()
+            self._valid = True
+            self.size = 0
+        elif position != self.size:
+            self._valid = False
+        return position
+
+    def tell(self) -> int:
+        return self._fileobj.tell()
+
+    def hexdigest(self) -> str | None:
+        return self._sha256.hexdigest() if self._valid else None
+
+
+class HostLimiter:
+    """Cap the number of concurrent transfers per host, across all worker threads."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).hostname or ''
+        with self._lock:
+            semaphore = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with semaphore:
+            yield
+
+
+class RateLimiter:
+    """Allow at most `limit` calls per `period` seconds (sliding window), across threads.
+
+    Mirrors the worker's RATE_LIMITER binding (60 POSTs per 60 s per IP), so a
+    bulk run paces itself instead of collecting 429s.
+    """
+
+    def __init__(self, limit: int, period: float = 60.0):
+        self.limit = max(1, limit)
+        self.period = period
+        self._calls: list[float] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._calls = [call for call in self._calls if now - call < self.period]
+                if len(self._calls) < self.limit:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """Concurrency cap that halves on a 429 and grows by one after a window of successes."""
+
+    def __init__(self, maximum: int):
+        self.maximum = max(1, maximum)
+        self.limit = self.maximum
+        self.reductions = 0
+        self._active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def throttled(self) -> None:
+        with self._condition:
+            if self.limit > 1:
+                self.limit = max(1, self.limit // 2)
+                self.reductions += 1
+            self._successes = 0
+
+    def succeeded(self) -> None:
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+
 def build_bearer_auth_header(username: str, password: str) -> dict[str, str]:
     token = base64.b64encode(f"{username}:{password}".encode('utf-8')).decode('utf-8')
     return {'Authorization': f'Bearer {token}'}
 
 
-def create_retry_session(total_retries: int = 3, backoff_factor: float = 0.5) -> "requests.Session":
+def retry_backoff(attempt: int, backoff_factor: float = 0.5, retry_after: str | None = None) -> float:
+    """Seconds to sleep before retry number `attempt`, mirroring urllib3's Retry.
+
+    The first retry is immediate, later ones back off exponentially; a numeric
+    Retry-After header from the server takes precedence.
+    """
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    if attempt <= 1:
+        return 0.0
+    return min(RETRY_BACKOFF_MAX, backoff_factor * (2 ** (attempt - 1)))
+
+
+def create_retry_session(
+    total_retries: int = 3,
+    backoff_factor: float = 0.5,
+    pool_maxsize: int = 10,
+    status_forcelist=RETRY_STATUS_CODES,
+    metrics=None,
+) -> "requests.Session":
+    """A requests session with urllib3 retries; `metrics` (a metrics.Metrics) gets every response."""
     import requests
     from requests.adapters import HTTPAdapter
     from urllib3.util.retry import Retry
@@ -40,13 +326,130 @@ def create_retry_session(total_retries: int = 3, backoff_factor: float = 0.5) ->
         read=total_retries,
         connect=total_retries,
         backoff_factor=backoff_factor,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=frozenset(['GET', 'POST']),
+        status_forcelist=status_forcelist,
+        allowed_methods=RETRY_METHODS,
         raise_on_status=False,
+        # urllib3 retries any 429 carrying Retry-After; callers that drop 429 handle it themselves
+        respect_retry_after_header=429 in status_forcelist,
     )
 
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
     session = requests.Session()
     session.mount('http://', adapter)
     session.mount('https://', adapter)
+    if metrics is not None:
+        session.hooks['response'].append(metrics.response_hook)
     return session
+
+
+def _range_validator(headers) -> str | None:
+    """Strong ETag or Last-Modified usable in If-Range; weak ETags never match (RFC 9110)."""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+def download_resumable(
+    session,
+    url: str,
+    dest: Path,
+    headers: dict | None = None,
+    timeout: int = 60,
+    chunk_size: int = 1024 * 1024,
+    max_resumes: int = 5,
+    progress=None,
+) -> "CaseInsensitiveDict":
+    """Download `url` to `dest` through `dest.part`, resuming after dropped connections.
+
+    The response validator is kept in `dest.part.json`, so an interrupted
+    download is continued with `Range: bytes=N-` both within this call and by
+    a later run. `If-Range` makes the server send the whole object again if it
+    changed since the first bytes were written. The .part file is renamed to
+    `dest` only once every byte has arrived. Returns the response headers of
+    the complete object (Content-Length is the full size, even after a resume).
+    `progress`, if given, is called with the size of every chunk received.
+    """
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    part_path = dest.with_name(dest.name + '.part')
+    meta_path = dest.with_name(dest.name + '.part.json')
+    meta = load_json_file(meta_path, {}) if part_path.exists() else {}
+    validator = meta.get('validator') if meta.get('url') == url else None
+    offset = part_path.stat().st_size if validator else 0
+    # Full size of the object the .part belongs to, 0 if unknown
+    size = (meta.get('size') or 0) if validator else 0
+    object_headers = CaseInsensitiveDict()
+    resumes = 0
+
+    while True:
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers['Range'] = f'bytes={offset}-'
+            request_headers['If-Range'] = validator
+        try:
+            with session.get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+                if offset and response.status_code == 416:
+                    if offset == size:
+                        # Every byte arrived before the rename was interrupted; a 416 ignores
+                        # If-Range, so check the object is still that version before keeping it
+                        head = session.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+                        if (
+                            head.ok and int(head.headers.get('Content-Length') or 0) == size
+                            and _range_validator(head.headers) == validator
+                        ):
+                            object_headers.update(head.headers)
+                            break
+                    # The .part no longer fits the object: start over
+                    offset, validator = 0, None
+                    continue
+                response.raise_for_status()
+
+                if response.status_code == 206:
+                    content_range = response.headers.get('Content-Range', '')
+                    first = content_range.partition(' ')[2].split('-', 1)[0]
+                    if not first.isdigit() or int(first) != offset:
+                        # Not the bytes after the .part: appending them would corrupt it
+                        offset, validator = 0, None
+                        continue
+                    total_text = content_range.rsplit('/', 1)[-1]
+                    total = int(total_text) if total_text.isdigit() else 0
+                else:
+                    # Full body: first request, Range ignored, or the object changed (If-Range)
+                    offset = 0
+                    validator = _range_validator(response.headers)
+                    total = int(response.headers.get('Content-Length') or 0)
+                    size = total
+                    write_json_atomic(meta_path, {'url': url, 'validator': validator, 'size': total})
+                    object_headers.clear()
+                if not object_headers:
+                    object_headers.update(response.headers)
+                    object_headers.pop('Content-Range', None)
+                    object_headers.pop('Content-Length', None)
+                    if total:
+                        object_headers['Content-Length'] = str(total)
+
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            offset += len(chunk)
+                            if progress:
+                                progress(len(chunk))
+
+                if total and offset < total:
+                    raise requests.exceptions.ChunkedEncodingError(f"connection closed at {offset} of {total} bytes")
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            if resumes >= max_resumes or not validator:
+                raise
+            resumes += 1
+            time.sleep(retry_backoff(resumes))
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            print(f"Resuming {dest.name} at byte {offset}")
+            continue
+        break
+
+    os.replace(part_path, dest)
+    meta_path.unlink(missing_ok=True)
+    return object_headers
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""HTTP metadata manifest for the ZIP archives published on subiecte.edu.ro.
+
+seen_urls.txt only says that a URL was processed once. This manifest stores
+the ETag, Content-Length and Last-Modified of the version that was downloaded,
+so a cheap HEAD request can tell whether the ministry has re-published a ZIP
+under the same URL.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from utils import load_json_file, write_json_atomic
+
+METADATA_FIELDS = ('etag', 'content_length', 'last_modified')
+
+
+def metadata_from_headers(headers) -> dict[str, str | None]:
+    return {
+        'etag': headers.get('ETag'),
+        'content_length': headers.get('Content-Length'),
+        'last_modified': headers.get('Last-Modified'),
+    }
+
+
+def metadata_changed(old: dict, new: dict) -> bool:
+    """True if any validator present on both sides differs."""
+    return any(
+        old.get(field) and new.get(field) and old[field] != new[field]
+        for field in METADATA_FIELDS
+    )
+
+
+class ZipManifest:
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = manifest_file
+        self.entries: dict[str, dict] = load_json_file(manifest_file, {})
+        self.lock = threading.Lock()
+
+    def record(self, url: str, headers) -> None:
+        """Store the metadata of the version that was just downloaded."""
+        metadata = metadata_from_headers(headers)
+        if not any(metadata.values()):
+            return
+        with self.lock:
+            self.entries[url] = metadata
+
+    def head(self, session, url: str, request_url: str, headers: dict) -> dict | None:
+        try:
+            response = session.head(request_url, headers=headers, timeout=30, allow_redirects=True)
+        except requests.RequestException as e:
+            print(f"HEAD failed for {url}: {e}")
+            return None
+        if not response.ok:
+            print(f"HEAD failed for {url} ({response.status_code})")
+            return None
+        return metadata_from_headers(response.headers)
+
+    def find_changed(self, session, urls: dict[str, str], headers: dict, max_workers: int = 8) -> list[str]:
+        """HEAD every URL in parallel and return the ones whose metadata changed.
+
+        `urls` maps the canonical URL (as stored in seen_urls) to the URL that
+        should actually be requested. URLs without a stored entry get their
+        current metadata recorded as a baseline instead of being re-downloaded.
+        """
+        changed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                url: executor.submit(self.head, session, url, request_url, headers)
+                for url, request_url in urls.items()
+            }
+            for url, future in futures.items():
+                metadata = future.result()
+                if metadata is None:
+                    continue
+                with self.lock:
+                    previous = self.entries.get(url)
+                    if previous is None:
+                        if any(metadata.values()):
+                            self.entries[url] = metadata
+                        continue
+                    if metadata_changed(previous, metadata):
+                        changed.append(url)
+        return changed
+
+    def save(self) -> None:
+        with self.lock:
+            write_json_atomic(self.manifest_file, self.entries)